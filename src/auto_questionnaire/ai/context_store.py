@@ -0,0 +1,155 @@
+import json
+import math
+import os
+import threading
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from loguru import logger
+
+from ..utils.relevance import tokenize
+
+
+@dataclass
+class ContextFact:
+    id: int
+    text: str
+    topic: Optional[str] = None
+    keywords: List[str] = field(default_factory=list)
+    source: str = "manual"
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+
+
+class ContextStore:
+    """问卷人设/上下文知识库
+
+    启动时一次性加载 context_db.json 并建立关键词倒排索引；新事实追加写入
+    旁路日志文件（增量持久化），compact() 时合并回主文件。
+    """
+
+    def __init__(self, db_file: str = "data/context_db.json", topic_boost: float = 2.0):
+        self.db_file = db_file
+        self.journal_file = f"{db_file}.journal"
+        self.topic_boost = topic_boost
+        self._facts: Dict[int, ContextFact] = {}
+        self._keyword_index: Dict[str, Set[int]] = defaultdict(set)
+        self._topic_index: Dict[str, Set[int]] = defaultdict(set)
+        self._text_index: Dict[str, int] = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._facts)
+
+    def _load(self) -> None:
+        """加载主文件并重放增量日志"""
+        try:
+            if os.path.exists(self.db_file):
+                with open(self.db_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                for fact_data in data.get('facts', []):
+                    self._index(ContextFact(**fact_data))
+            if os.path.exists(self.journal_file):
+                with open(self.journal_file, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        if line.strip():
+                            self._index(ContextFact(**json.loads(line)))
+            logger.info(f"已加载 {len(self._facts)} 条上下文")
+        except Exception as e:
+            logger.error(f"加载上下文数据库失败: {e}")
+
+    def _index(self, fact: ContextFact) -> None:
+        self._facts[fact.id] = fact
+        self._text_index[fact.text] = fact.id
+        self._next_id = max(self._next_id, fact.id + 1)
+        for keyword in self._fact_keywords(fact):
+            self._keyword_index[keyword].add(fact.id)
+        if fact.topic:
+            self._topic_index[fact.topic].add(fact.id)
+
+    def _fact_keywords(self, fact: ContextFact) -> Set[str]:
+        return set(fact.keywords) | set(tokenize(fact.text))
+
+    def add_fact(self, text: str, topic: Optional[str] = None,
+                 keywords: Optional[List[str]] = None,
+                 source: str = "manual") -> Optional[ContextFact]:
+        """添加事实并追加写入增量日志"""
+        text = text.strip()
+        if not text:
+            return None
+        with self._lock:
+            if text in self._text_index:
+                return self._facts[self._text_index[text]]
+            fact = ContextFact(
+                id=self._next_id,
+                text=text,
+                topic=topic,
+                keywords=list(keywords or []),
+                source=source
+            )
+            self._index(fact)
+            try:
+                journal_dir = os.path.dirname(self.journal_file)
+                if journal_dir:
+                    os.makedirs(journal_dir, exist_ok=True)
+                with open(self.journal_file, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(asdict(fact), ensure_ascii=False) + '\n')
+            except Exception as e:
+                logger.error(f"写入上下文日志失败: {e}")
+            return fact
+
+    def learn_from_answer(self, question: str, answer: str,
+                          topic: Optional[str] = None) -> Optional[ContextFact]:
+        """把已作答的问题记为事实，后续同类问题保持一致"""
+        if not question.strip() or not answer.strip():
+            return None
+        return self.add_fact(
+            f"{question.strip()} {answer.strip()}",
+            topic=topic,
+            keywords=list(tokenize(question)),
+            source="answer"
+        )
+
+    def top_k(self, query: str, k: int = 3, topic: Optional[str] = None) -> List[ContextFact]:
+        """检索与问题最相关的k条事实，按关键词IDF加权得分排序"""
+        with self._lock:
+            total = len(self._facts)
+            if not total or k <= 0:
+                return []
+            scores: Dict[int, float] = defaultdict(float)
+            for keyword in set(tokenize(query)):
+                fact_ids = self._keyword_index.get(keyword)
+                if not fact_ids:
+                    continue
+                weight = math.log(1 + total / len(fact_ids))
+                for fact_id in fact_ids:
+                    scores[fact_id] += weight
+            if topic:
+                for fact_id in self._topic_index.get(topic, ()):
+                    if fact_id in scores:
+                        scores[fact_id] *= self.topic_boost
+
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+            return [self._facts[fact_id] for fact_id, _ in ranked[:k]]
+
+    def compact(self) -> None:
+        """把增量日志合并回主文件"""
+        with self._lock:
+            try:
+                db_dir = os.path.dirname(self.db_file)
+                if db_dir:
+                    os.makedirs(db_dir, exist_ok=True)
+                tmp_file = f"{self.db_file}.tmp"
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump(
+                        {'facts': [asdict(fact) for fact in self._facts.values()]},
+                        f, ensure_ascii=False, indent=2
+                    )
+                os.replace(tmp_file, self.db_file)
+                if os.path.exists(self.journal_file):
+                    os.remove(self.journal_file)
+            except Exception as e:
+                logger.error(f"合并上下文数据库失败: {e}")
@@ -4,6 +4,8 @@ from loguru import logger
 import threading
 import queue
 
+from ..utils.tracing import span, traced
+
 class GroqHandler:
     def __init__(self, timeout: int = 5, max_workers: int = 3):
         self.timeout = timeout
@@ -12,6 +14,7 @@ class GroqHandler:
         self._response_cache = {}
         self._lock = threading.Lock()
         
+    @traced('llm.generate_response')
     def generate_response(self, question: str, context: Optional[str] = None) -> str:
         try:
             # 使用问题作为缓存键
@@ -22,8 +25,9 @@ class GroqHandler:
                     return self._response_cache[cache_key]
             
             # 提交任务到线程池
-            future = self._executor.submit(self._make_api_call, question, context)
-            response = future.result(timeout=self.timeout)
+            with span('llm.api_call'):
+                future = self._executor.submit(self._make_api_call, question, context)
+                response = future.result(timeout=self.timeout)
             
             # 缓存响应
             with self._lock:
@@ -1,12 +1,31 @@
+from typing import Optional
+
+from .context_store import ContextStore
+
+
 class PromptBuilder:
-    def __init__(self):
+    def __init__(self, context_store: Optional[ContextStore] = None, context_top_k: int = 3):
         self.system_prompt = "你是一个问卷填写助手。"
+        self.context_store = context_store
+        self.context_top_k = context_top_k
+        
+    def build_context(self, question_text: str) -> str:
+        """检索与问题相关的少量事实，保持提示简短且前后一致"""
+        if self.context_store is None:
+            return ""
+        facts = self.context_store.top_k(question_text, k=self.context_top_k)
+        return "\n".join(f"- {fact.text}" for fact in facts)
         
     def build_prompt(self, question_text):
+        context = self.build_context(question_text)
+        context_section = f"""
+        已知信息：
+        {context}
+        """ if context else ""
         return f"""
         {self.system_prompt}
-        
+        {context_section}
         问题：{question_text}
         
         请提供一个合适的答案。
-        """ 
\ No newline at end of file
+        """ 
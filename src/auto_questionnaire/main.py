@@ -1,73 +1,189 @@
-from typing import List
+import argparse
+import os
+import sys
+from datetime import datetime
+from typing import List, Optional
 from loguru import logger
 
+from .ai.context_store import ContextStore
 from .ai.groq_handler import GroqHandler
+from .ai.prompt_builder import PromptBuilder
+from .monitoring.metrics_exporter import MetricsExporter
+from .parser.template_registry import TemplateRegistry
 from .parser.ui_parser import QuestionnaireParser
 from .utils.auto_fill import AutoFiller
-from .utils.screenshot import take_screenshot
+from .utils.screenshot import capture_screen
 from .utils.cache_manager import CacheManager
 from .utils.request_queue import RequestQueue
+from .utils.answer_evaluator import AnswerEvaluator
 from .utils.answer_validator import AnswerValidator
+from .utils.metrics_store import MetricsStore
 from .utils.performance_monitor import PerformanceMonitor
-from .utils.common_questions import load_common_questions
+from .utils.pipeline import QuestionnairePipeline
+from .utils.quality_gate import QualityGate
+from .utils.relevance import TfidfRelevanceScorer
+from .utils.tokenizer import preload_tokenizer
+from .utils import tracing
 
 
-def main():
+def main(page_count: int = 1):
+    monitor = exporter = alert_manager = None
     try:
         # 初始化组件
         groq_handler = GroqHandler(api_key=ModelConfig.GROQ_API_KEY)
         cache_manager = CacheManager("data/cache.json")
         request_queue = RequestQueue()
-        answer_validator = AnswerValidator()
+        answer_validator = AnswerValidator(history_file="data/answer_history.json")
         monitor = PerformanceMonitor()
+        context_store = ContextStore("data/context_db.json")
+        
+        # 告警规则订阅监控器事件，按滑动窗口定时评估（告警配置依赖pydantic，用到时才导入）
+        from .monitoring.alert_manager import AlertManager
+        alert_manager = AlertManager()
+        alert_manager.subscribe(monitor)
+        
+        # 指标导出：本地HTTP端点和/或定期重写的textfile
+        exporter = MetricsExporter(monitor)
+        if os.getenv('METRICS_PORT'):
+            exporter.start_http_server(int(os.getenv('METRICS_PORT')))
+        if os.getenv('METRICS_TEXTFILE'):
+            exporter.start_textfile_writer(os.getenv('METRICS_TEXTFILE'))
+        
+        # 定期把新增指标追加到按日期分区的列式存储，用于跨天、跨版本对比
+        if os.getenv('METRICS_DIR'):
+            monitor.start_flusher(MetricsStore(os.getenv('METRICS_DIR')),
+                                  float(os.getenv('METRICS_FLUSH_INTERVAL', '60')))
         
         auto_filler = AutoFiller(
             groq_handler=groq_handler,
             cache_file="data/cache.json",
             monitor=monitor,
             max_retries=3,
-            max_workers=3
+            max_workers=3,
+            prompt_builder=PromptBuilder(context_store=context_store)
         )
         
-        # 获取并解析问卷
-        screenshot_path = take_screenshot()
-        parser = QuestionnaireParser()
-        elements = parser.parse_page(screenshot_path)
-        
         # 预热缓存
-        common_questions = load_common_questions()  # 需要实现此函数
+        from .utils.common_questions import load_common_questions  # 需要实现此函数
+        common_questions = load_common_questions()
         cache_manager.warm_up_cache(common_questions, groq_handler)
         
-        # 批量处理问题
-        all_questions = []
-        for element_type, elements_list in elements.items():
-            all_questions.extend(elements_list)
-            
-        answers = auto_filler.batch_generate_answers(all_questions)
+        # 分词词典缓存与其他运行数据一起放在data目录下
+        preload_tokenizer(os.getenv('JIEBA_CACHE_DIR') or 'data/cache')
+        # 相关性词表基于已缓存的问答拟合一次，之后从磁盘加载
+        relevance_scorer = TfidfRelevanceScorer("data/cache/tfidf_vocab.json").load_or_fit(
+            text
+            for key, entry in auto_filler.cache.items()
+            for text in (key.split(':')[1] if ':' in key else key, entry.get('answer', ''))
+        )
+        quality_gate = QualityGate(
+            auto_filler=auto_filler,
+            evaluator=AnswerEvaluator(relevance_scorer),
+            answer_validator=answer_validator,
+            threshold=0.6,
+            regeneration_budget=5,
+            deadline=10.0,
+            monitor=monitor
+        )
+        
+        # 截图 → 解析 → 生成答案 → 验证，各阶段并行流水处理
+        parser = QuestionnaireParser(
+            template_registry=TemplateRegistry("data/templates"),
+            save_new_templates=True
+        )
+        debug_save_dir = os.getenv('SCREENSHOT_DEBUG_DIR')
+        trace_dir = os.getenv('TRACE_DIR')
+        if trace_dir:
+            tracing.enable()
+        pipeline = QuestionnairePipeline(
+            capture=lambda page_index: capture_screen(debug_save_dir=debug_save_dir),
+            parser=parser,
+            auto_filler=auto_filler,
+            answer_validator=answer_validator,
+            quality_gate=quality_gate,
+            monitor=monitor,
+            trace_dir=trace_dir
+        )
+        pages = pipeline.run(page_count)
         
         # 处理答案
-        for question, (answer, is_cached) in zip(all_questions, answers):
-            if answer:
-                # 验证答案一致性
-                if answer_validator.validate_and_store_answer(
-                    question.question_type,
-                    question.text,
-                    answer
-                ):
-                    print(f"问题类型: {question.question_type}")
-                    print(f"问题: {question.text}")
-                    print(f"生成的答案: {answer}")
-                    print(f"使用缓存: {is_cached}\n")
+        for page in pages:
+            for question, answer, is_cached in page.accepted:
+                print(f"问题类型: {question.question_type}")
+                print(f"问题: {question.text}")
+                print(f"生成的答案: {answer}")
+                print(f"使用缓存: {is_cached}\n")
                     
         # 清理缓存
         cache_manager.clean_cache()
+        answer_validator.save_history()
+        context_store.compact()
         
         # 输出性能统计
         stats = monitor.get_statistics()
         logger.info(f"性能统计: {stats}")
+        logger.info(f"流水线统计: {pipeline.get_metrics()}")
+        logger.info(f"答案重新生成统计: {quality_gate.get_metrics()}")
+        monitor.save_statistics(os.getenv('METRICS_FILE', 'data/metrics.json'))
         
     except Exception as e:
         logger.error(f"程序执行错误: {e}")
+    finally:
+        # 出错时也要写入剩余的指标、停止后台线程
+        if monitor is not None:
+            monitor.stop_flusher()
+        if exporter is not None:
+            exporter.stop()
+        if alert_manager is not None:
+            alert_manager.close()
+
+def _parse_time(value: str) -> float:
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无效的时间: {value}")
+
+def cli(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="AI驱动的自动问卷填写")
+    parser.add_argument('--pages', type=int, default=1, help="要填写的页数")
+    parser.add_argument('--report', action='store_true', help="根据保存的指标生成性能报告，不填写问卷")
+    parser.add_argument('--metrics-file', default=os.getenv('METRICS_FILE', 'data/metrics.json'),
+                        help="指标文件路径")
+    parser.add_argument('--metrics-dir', default=os.getenv('METRICS_DIR'),
+                        help="列式指标存储目录，指定后按时间范围从中生成报告")
+    parser.add_argument('--start', type=_parse_time, default=None, help="报告起始时间（ISO格式，本地时间）")
+    parser.add_argument('--end', type=_parse_time, default=None, help="报告结束时间（ISO格式，本地时间，不含）")
+    parser.add_argument('--output-dir', default="reports", help="报告输出目录")
+    parser.add_argument('--workers', type=int, default=None, help="并行渲染图表的进程数")
+    parser.add_argument('--profile', action='store_true',
+                        help="剖析本次运行（cProfile、按阶段的tracemalloc统计），结果写入报告输出目录")
+    parser.add_argument('--profile-samples', type=float, default=None, metavar='INTERVAL',
+                        help="同时每隔INTERVAL秒采样所有线程的调用栈")
+    parser.add_argument('--profile-top', type=int, default=20, help="每个阶段列出的内存分配行数")
+    args = parser.parse_args(argv)
+
+    if args.report:
+        from .monitoring.metrics_visualizer import generate_report_from_file, generate_report_from_store
+        try:
+            if args.metrics_dir:
+                report_dir = generate_report_from_store(args.metrics_dir, args.start, args.end,
+                                                        args.output_dir, args.workers)
+            else:
+                report_dir = generate_report_from_file(args.metrics_file, args.output_dir, args.workers)
+        except Exception as e:
+            logger.error(f"生成报告失败: {e}")
+            return 1
+        logger.info(f"报告已生成: {report_dir}")
+        return 0
+
+    if args.profile:
+        from .utils.profiler import RunProfiler
+        with RunProfiler(args.output_dir, top_n=args.profile_top, sample_interval=args.profile_samples):
+            main(args.pages)
+        return 0
+
+    main(args.pages)
+    return 0
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(cli()) 
\ No newline at end of file
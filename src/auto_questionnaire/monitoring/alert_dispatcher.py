@@ -0,0 +1,176 @@
+import queue
+import smtplib
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from email.mime.text import MIMEText
+from typing import List, Optional
+
+from loguru import logger
+
+
+@dataclass
+class Alert:
+    subject: str
+    message: str
+    created_at: datetime = field(default_factory=datetime.now)
+
+
+class SMTPConnectionPool:
+    """复用的SMTP连接
+
+    连接建立后保持打开，空闲超过max_idle秒或发送失败时重新连接；
+    所有网络操作都有超时，不会无限期阻塞。
+    """
+
+    def __init__(self, server: str, port: int, user: str = "", password: str = "",
+                 timeout: float = 10.0, use_starttls: bool = True, max_idle: float = 60.0):
+        self.server = server
+        self.port = port
+        self.user = user
+        self.password = password
+        self.timeout = timeout
+        self.use_starttls = use_starttls
+        self.max_idle = max_idle
+        self._connection: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+
+    def _connect(self) -> smtplib.SMTP:
+        connection = smtplib.SMTP(self.server, self.port, timeout=self.timeout)
+        if self.use_starttls:
+            connection.starttls()
+        if self.user:
+            connection.login(self.user, self.password)
+        self.connections_opened += 1
+        return connection
+
+    def _get_connection(self) -> smtplib.SMTP:
+        if self._connection is not None and time.monotonic() - self._last_used > self.max_idle:
+            self._close()
+        if self._connection is None:
+            self._connection = self._connect()
+        return self._connection
+
+    def send(self, msg: MIMEText) -> None:
+        """发送邮件；连接已失效时重连一次再发送"""
+        with self._lock:
+            try:
+                self._get_connection().send_message(msg)
+            except (smtplib.SMTPServerDisconnected, smtplib.SMTPResponseException, OSError) as e:
+                logger.warning(f"SMTP连接失效，重新连接: {e}")
+                self._close()
+                self._get_connection().send_message(msg)
+            self._last_used = time.monotonic()
+
+    def _close(self) -> None:
+        if self._connection is None:
+            return
+        try:
+            self._connection.quit()
+        except Exception:
+            self._connection.close()
+        self._connection = None
+
+    def close(self) -> None:
+        with self._lock:
+            self._close()
+
+
+class AlertDispatcher:
+    """后台告警发送器
+
+    调用方只把告警放入队列即返回；后台线程在coalesce_window秒内收集到的告警
+    合并成一封汇总邮件，通过复用的SMTP连接发送。
+    """
+
+    def __init__(self, pool: SMTPConnectionPool, sender: str, recipients: List[str],
+                 coalesce_window: float = 30.0, max_batch: int = 50, queue_size: int = 1000):
+        self.pool = pool
+        self.sender = sender
+        self.recipients = recipients
+        self.coalesce_window = coalesce_window
+        self.max_batch = max_batch
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self.sent_digests = 0
+        self.dropped = 0
+
+    def submit(self, subject: str, message: str) -> bool:
+        """非阻塞地提交告警，队列已满时丢弃并返回False"""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(Alert(subject, message))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            logger.warning(f"告警队列已满，丢弃告警: {subject}")
+            return False
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._thread_lock:
+            if self._thread is None:
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name="alert-dispatcher", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            alert = self._queue.get()
+            if alert is None:
+                return
+            batch = [alert]
+            deadline = time.monotonic() + self.coalesce_window
+            stop = False
+            while len(batch) < self.max_batch:
+                remaining = 0 if self._stopping.is_set() else deadline - time.monotonic()
+                try:
+                    alert = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if alert is None:
+                    stop = True
+                    break
+                batch.append(alert)
+            self._send_digest(batch)
+            if stop:
+                return
+
+    def _build_message(self, batch: List[Alert]) -> MIMEText:
+        if len(batch) == 1:
+            subject = batch[0].subject
+            body = batch[0].message
+        else:
+            subject = f"{len(batch)} 条告警"
+            body = '\n\n'.join(
+                f"[{alert.created_at.strftime('%H:%M:%S')}] {alert.subject}\n{alert.message}"
+                for alert in batch
+            )
+        msg = MIMEText(body, 'plain', 'utf-8')
+        msg['Subject'] = f"[问卷系统告警] {subject}"
+        msg['From'] = self.sender
+        msg['To'] = ', '.join(self.recipients)
+        return msg
+
+    def _send_digest(self, batch: List[Alert]) -> None:
+        try:
+            self.pool.send(self._build_message(batch))
+            self.sent_digests += 1
+            logger.info(f"已发送告警: {len(batch)} 条")
+        except Exception as e:
+            logger.error(f"发送告警失败: {e}")
+
+    def close(self, timeout: float = 10.0) -> None:
+        """立即发送队列中剩余的告警并停止后台线程"""
+        if self._thread is not None:
+            self._stopping.set()
+            self._queue.put(None)
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        self.pool.close()
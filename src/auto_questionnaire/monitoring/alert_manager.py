@@ -1,13 +1,16 @@
 import json
 import os
-import smtplib
+import threading
+import time
 from datetime import datetime, timedelta
-from email.mime.text import MIMEText
 from typing import Dict, List, Optional
 
 from loguru import logger
 from pydantic import BaseModel
 
+from .alert_dispatcher import AlertDispatcher, SMTPConnectionPool
+from .rolling_window import RollingWindow
+
 
 class AlertConfig(BaseModel):
     email_recipients: List[str]
@@ -21,24 +24,201 @@ class AlertConfig(BaseModel):
         "cache_hit_rate": 0.5,    # 缓存命中率阈值
         "answer_quality": 0.7     # 答案质量阈值
     }
+    latency_percentile: str = "p95"   # api_latency 使用的延迟分位数
+    smtp_timeout: float = 10.0        # SMTP连接和发送超时(秒)
+    smtp_starttls: bool = True
+    coalesce_window: float = 30.0     # 该时间内的告警合并为一封邮件(秒)
+    alert_windows: Dict[str, float] = {"1m": 60, "5m": 300, "1h": 3600}  # 滑动窗口(秒)
+    default_window: str = "5m"        # 订阅监控器时规则使用的窗口
+    metric_windows: Dict[str, str] = {}  # 按指标覆盖使用的窗口
+    min_samples: int = 5              # 窗口内样本数不足时不评估
+    evaluation_interval: float = 15.0 # 规则评估间隔(秒)
 
 class AlertManager:
+    """告警管理
+
+    可以由调用方传入统计值调用 check_metrics；也可以通过 subscribe 订阅
+    PerformanceMonitor，后台定时评估规则：每次评估先用 get_delta 按游标读取新增记录，
+    批量更新各滑动窗口，再按窗口评估。记录指标的热路径上没有任何告警开销，也不加锁。
+    """
+
     def __init__(self, config_file: str = "config/alert_config.json"):
         self.config = self._load_config(config_file)
         self.alert_history: Dict[str, datetime] = {}
         self.alert_cooldown = timedelta(hours=1)  # 告警冷却时间
+        self.dispatcher = AlertDispatcher(
+            SMTPConnectionPool(
+                self.config.smtp_server,
+                self.config.smtp_port,
+                self.config.smtp_user,
+                self.config.smtp_password,
+                timeout=self.config.smtp_timeout,
+                use_starttls=self.config.smtp_starttls
+            ),
+            sender=self.config.smtp_user,
+            recipients=self.config.email_recipients,
+            coalesce_window=self.config.coalesce_window
+        )
+        # 每个窗口时长各一组数据流：api(失败数, 慢调用数, 耗时和)、errors、cache(命中数)、quality(得分和)
+        self._windows: Dict[str, Dict[str, RollingWindow]] = {
+            name: {
+                'api': RollingWindow(seconds, fields=3),
+                'errors': RollingWindow(seconds, fields=0),
+                'cache': RollingWindow(seconds, fields=1),
+                'quality': RollingWindow(seconds, fields=1),
+            }
+            for name, seconds in self.config.alert_windows.items()
+        }
+        self._api_windows = [streams['api'] for streams in self._windows.values()]
+        self._error_windows = [streams['errors'] for streams in self._windows.values()]
+        self._cache_windows = [streams['cache'] for streams in self._windows.values()]
+        self._quality_windows = [streams['quality'] for streams in self._windows.values()]
+        self._latency_threshold = self.config.alert_thresholds.get("api_latency", float('inf'))
+        self._monitor = None
+        self._cursor = None
+        self._windows_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._evaluation_thread: Optional[threading.Thread] = None
+        
+    def subscribe(self, monitor, start_timer: bool = True) -> None:
+        """订阅监控器（只统计订阅之后的记录），并按 evaluation_interval 定时评估规则"""
+        with self._windows_lock:
+            self._cursor = monitor.get_delta().cursor
+            self._monitor = monitor
+        if start_timer and self._evaluation_thread is None:
+            self._stop_event.clear()
+            self._evaluation_thread = threading.Thread(
+                target=self._evaluation_loop, name="alert-evaluator", daemon=True
+            )
+            self._evaluation_thread.start()
+            
+    def _evaluation_loop(self) -> None:
+        while not self._stop_event.wait(self.config.evaluation_interval):
+            try:
+                self.evaluate()
+            except Exception as e:
+                logger.error(f"告警规则评估失败: {e}")
+                
+    def _pull(self) -> None:
+        """读取上次之后监控器新增的记录，批量写入各滑动窗口；调用方需持有 _windows_lock"""
+        if self._monitor is None:
+            return
+        delta = self._monitor.get_delta(self._cursor)
+        self._cursor = delta.cursor
+        for name, count in delta.dropped.items():
+            if count:
+                logger.warning(f"指标 {name} 有 {count} 条记录在告警评估前已被覆盖，可缩短 evaluation_interval")
+
+        api_calls = delta.events['api_calls']
+        if len(api_calls['timestamp']):
+            elapsed = api_calls['elapsed']
+            for window in self._api_windows:
+                window.add_many(api_calls['timestamp'], ~api_calls['success'],
+                                elapsed > self._latency_threshold, elapsed)
+        errors = delta.events['errors']
+        for window in self._error_windows:
+            window.add_many(errors['timestamp'])
+        cache_hits = delta.events['cache_hits']
+        for window in self._cache_windows:
+            window.add_many(cache_hits['timestamp'], cache_hits['hit'])
+        quality = delta.events['answer_quality']
+        for window in self._quality_windows:
+            window.add_many(quality['timestamp'], quality['score'])
+                
+    def window_metrics(self, window: str, now: Optional[float] = None) -> Dict:
+        """某个滑动窗口内的汇总指标"""
+        now = time.time() if now is None else now
+        streams = self._windows[window]
+        with self._windows_lock:
+            self._pull()
+            api_count, (failures, slow, elapsed) = streams['api'].totals(now)
+            error_count, _ = streams['errors'].totals(now)
+            cache_count, (hits,) = streams['cache'].totals(now)
+            quality_count, (score,) = streams['quality'].totals(now)
+        return {
+            'api_calls': api_count,
+            'error_rate': (failures + error_count) / max(1, api_count),
+            'api_latency': elapsed / api_count if api_count else 0.0,
+            'slow_call_ratio': slow / api_count if api_count else 0.0,
+            'cache_accesses': cache_count,
+            'cache_hit_rate': hits / cache_count if cache_count else None,
+            'answers_scored': quality_count,
+            'answer_quality': score / quality_count if quality_count else None
+        }
+        
+    def evaluate(self, now: Optional[float] = None) -> List[str]:
+        """按各指标配置的窗口评估规则，返回触发告警的指标名"""
+        now = time.time() if now is None else now
+        window_stats: Dict[str, Dict] = {}
+        triggered = []
+        for metric_name, threshold in self.config.alert_thresholds.items():
+            window = self.config.metric_windows.get(metric_name, self.config.default_window)
+            if window not in self._windows:
+                continue
+            if window not in window_stats:
+                window_stats[window] = self.window_metrics(window, now)
+            stats = window_stats[window]
+            
+            result = self._evaluate_rule(metric_name, threshold, stats)
+            if result is None:
+                continue
+            breached, detail = result
+            if breached and self._cooldown_passed(metric_name):
+                triggered.append(metric_name)
+                self._send_alert(f"指标 {metric_name} 超出阈值（最近{window}）", detail)
+        return triggered
         
+    def _evaluate_rule(self, metric: str, threshold: float, stats: Dict):
+        """返回 (是否超出阈值, 告警内容)，样本不足时返回None"""
+        min_samples = self.config.min_samples
+        if metric == "error_rate":
+            if stats['api_calls'] < min_samples:
+                return None
+            value = stats['error_rate']
+            return value > threshold, f"当前值: {value:.2%}, 阈值: {threshold:.2%}"
+        if metric == "api_latency":
+            if stats['api_calls'] < min_samples:
+                return None
+            # 分位数超过阈值 等价于 超过阈值的调用比例大于 1 - 分位点
+            quantile = float(self.config.latency_percentile.lstrip('p')) / 100
+            ratio = stats['slow_call_ratio']
+            return ratio > 1 - quantile, (
+                f"{ratio:.1%} 的API调用超过 {threshold}s，"
+                f"{self.config.latency_percentile} 超出阈值（平均延迟 {stats['api_latency']:.2f}s）"
+            )
+        if metric == "cache_hit_rate":
+            if stats['cache_accesses'] < min_samples:
+                return None
+            value = stats['cache_hit_rate']
+            return value < threshold, f"当前值: {value:.2%}, 阈值: {threshold:.2%}"
+        if metric == "answer_quality":
+            if stats['answers_scored'] < min_samples:
+                return None
+            value = stats['answer_quality']
+            return value < threshold, f"当前值: {value:.2f}, 阈值: {threshold}"
+        return None
+        
+
     def check_metrics(self, metrics: Dict) -> None:
         """检查指标并触发告警"""
         for metric_name, threshold in self.config.alert_thresholds.items():
-            if metric_name in metrics:
-                value = metrics[metric_name]
+            value = self._metric_value(metrics, metric_name)
+            if value is not None:
                 if self._should_alert(metric_name, value, threshold):
                     self._send_alert(
                         f"指标 {metric_name} 超出阈值",
                         f"当前值: {value}, 阈值: {threshold}"
                     )
     
+    def _metric_value(self, metrics: Dict, metric_name: str) -> Optional[float]:
+        """取指标数值；api_latency 优先使用延迟直方图中的分位数"""
+        if metric_name == "api_latency":
+            api_latency = metrics.get('latency', {}).get('api')
+            if api_latency and api_latency.get('count'):
+                return api_latency.get(self.config.latency_percentile)
+        value = metrics.get(metric_name)
+        return value if isinstance(value, (int, float)) else None
+        
     def _should_alert(self, metric: str, value: float, threshold: float) -> bool:
         """判断是否应该发送告警"""
         # 检查是否超出阈值
@@ -52,32 +232,32 @@ class AlertManager:
             should_alert = value < threshold
             
         # 检查冷却时间
-        if should_alert:
-            last_alert = self.alert_history.get(metric)
-            if last_alert and datetime.now() - last_alert < self.alert_cooldown:
-                return False
-            self.alert_history[metric] = datetime.now()
-            return True
-            
-        return False
+        return should_alert and self._cooldown_passed(metric)
+        
+    def _cooldown_passed(self, metric: str) -> bool:
+        """冷却时间已过则记录本次告警时间并返回True"""
+        last_alert = self.alert_history.get(metric)
+        if last_alert and datetime.now() - last_alert < self.alert_cooldown:
+            return False
+        self.alert_history[metric] = datetime.now()
+        return True
         
     def _send_alert(self, subject: str, message: str) -> None:
-        """发送告警邮件"""
-        try:
-            msg = MIMEText(message)
-            msg['Subject'] = f"[问卷系统告警] {subject}"
-            msg['From'] = self.config.smtp_user
-            msg['To'] = ', '.join(self.config.email_recipients)
-            
-            with smtplib.SMTP(self.config.smtp_server, self.config.smtp_port) as server:
-                server.starttls()
-                server.login(self.config.smtp_user, self.config.smtp_password)
-                server.send_message(msg)
-                
-            logger.info(f"已发送告警: {subject}")
-            
-        except Exception as e:
-            logger.error(f"发送告警失败: {e}")
+        """把告警交给后台发送器，不阻塞调用线程"""
+        if not self.config.smtp_server or not self.config.email_recipients:
+            logger.warning(f"未配置告警邮箱，跳过告警: {subject}")
+            return
+        self.dispatcher.submit(subject, message)
+        
+    def close(self) -> None:
+        """停止定时评估，发送尚未发出的告警并关闭SMTP连接"""
+        self._stop_event.set()
+        if self._evaluation_thread is not None:
+            self._evaluation_thread.join(timeout=5)
+            self._evaluation_thread = None
+        with self._windows_lock:
+            self._monitor = None
+        self.dispatcher.close()
             
     def _load_config(self, config_file: str) -> AlertConfig:
         """加载告警配置"""
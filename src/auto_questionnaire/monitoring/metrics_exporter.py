@@ -0,0 +1,182 @@
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from loguru import logger
+
+from ..utils.performance_monitor import PerformanceMonitor
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# 监控器计数器 -> (指标名, 说明)
+_COUNTERS = {
+    'api_calls': ("api_calls", "API调用次数"),
+    'errors': ("errors", "错误次数"),
+    'cache_hits': ("cache_hits", "缓存命中次数"),
+    'cache_misses': ("cache_misses", "缓存未命中次数"),
+    'regenerations': ("regenerations", "答案重新生成次数"),
+    'answers_scored': ("answers_scored", "已评分答案数"),
+}
+
+
+def _format_value(value) -> str:
+    if value is None:
+        return "NaN"
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class MetricsExporter:
+    """以Prometheus/OpenMetrics文本格式导出PerformanceMonitor的指标
+
+    计数器取自监控器的分片计数器，直方图取自各阶段的延迟直方图，
+    仪表盘取自预聚合窗口统计，渲染时不扫描明细记录，也不持有监控器的锁。
+    样本数未变化的阶段直方图直接复用上一次渲染的文本。
+    """
+
+    def __init__(self, monitor: PerformanceMonitor, prefix: str = "auto_questionnaire",
+                 buckets: Sequence[float] = DEFAULT_BUCKETS, window: float = 60.0):
+        if window > monitor.max_window:
+            raise ValueError(f"window 不能超过监控器分桶覆盖的 {monitor.max_window} 秒")
+        self.monitor = monitor
+        self.prefix = prefix
+        self.buckets = tuple(sorted(buckets))
+        self.window = window
+        self._histogram_cache: Dict[str, Tuple[int, List[str]]] = {}
+        self._render_lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._server_thread: Optional[threading.Thread] = None
+        self._textfile_thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    def render(self) -> str:
+        """渲染当前指标"""
+        with self._render_lock:
+            lines: List[str] = []
+            self._render_counters(lines)
+            self._render_gauges(lines)
+            self._render_histograms(lines)
+            lines.append("# EOF")
+            return '\n'.join(lines) + '\n'
+
+    def _render_counters(self, lines: List[str]) -> None:
+        counters = self.monitor.get_counters()
+        for key, (name, help_text) in _COUNTERS.items():
+            metric = f"{self.prefix}_{name}"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"{metric}_total {_format_value(counters.get(key, 0))}")
+
+    def _render_gauges(self, lines: List[str]) -> None:
+        summary = self.monitor.get_window_summary(self.window)
+        gauges = {
+            'error_rate': ("最近窗口内的错误率", summary['error_rate']),
+            'api_latency_mean_seconds': ("最近窗口内的平均API延迟", summary['api_latency']),
+            'cache_hit_rate': ("最近窗口内的缓存命中率", summary['cache_hit_rate']),
+            'answer_quality': ("最近窗口内的平均答案质量", summary['answer_quality']),
+        }
+        for name, (help_text, value) in gauges.items():
+            metric = f"{self.prefix}_{name}"
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"{metric}{{window=\"{_format_value(float(self.window))}s\"}} {_format_value(value)}")
+
+    def _render_histograms(self, lines: List[str]) -> None:
+        metric = f"{self.prefix}_stage_latency_seconds"
+        lines.append(f"# TYPE {metric} histogram")
+        lines.append(f"# HELP {metric} 各阶段耗时")
+        for stage in sorted(self.monitor.get_latency_summary()):
+            histogram = self.monitor.get_histogram(stage)
+            cached = self._histogram_cache.get(stage)
+            if cached is not None and cached[0] == histogram.count:
+                lines.extend(cached[1])
+                continue
+
+            cumulative, count, total = histogram.cumulative_counts(self.buckets)
+            label = f'stage="{_escape(stage)}"'
+            stage_lines = [
+                f'{metric}_bucket{{{label},le="{_format_value(float(bound))}"}} {int(value)}'
+                for bound, value in zip(self.buckets, cumulative)
+            ]
+            stage_lines.append(f'{metric}_bucket{{{label},le="+Inf"}} {count}')
+            stage_lines.append(f'{metric}_count{{{label}}} {count}')
+            stage_lines.append(f'{metric}_sum{{{label}}} {_format_value(total)}')
+            self._histogram_cache[stage] = (count, stage_lines)
+            lines.extend(stage_lines)
+
+    def write_textfile(self, path: str) -> None:
+        """原子地重写textfile（供node_exporter的textfile collector读取）"""
+        try:
+            directory = os.path.dirname(path) or '.'
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(self.render())
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error(f"写入指标文件失败: {e}")
+
+    def start_textfile_writer(self, path: str, interval: float = 15.0) -> None:
+        """在后台线程中定期重写textfile"""
+        if self._textfile_thread is not None:
+            return
+        self._stop_event.clear()
+
+        def run():
+            while not self._stop_event.is_set():
+                self.write_textfile(path)
+                self._stop_event.wait(interval)
+            self.write_textfile(path)
+
+        self._textfile_thread = threading.Thread(target=run, name="metrics-textfile", daemon=True)
+        self._textfile_thread.start()
+        logger.info(f"指标文件导出已启动: {path}")
+
+    def start_http_server(self, port: int = 9108, host: str = "127.0.0.1") -> int:
+        """启动本地HTTP端点，GET /metrics 返回指标；返回实际监听的端口"""
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = exporter.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._server_thread = threading.Thread(
+            target=self._server.serve_forever, name="metrics-http", daemon=True
+        )
+        self._server_thread.start()
+        actual_port = self._server.server_address[1]
+        logger.info(f"指标HTTP端点已启动: http://{host}:{actual_port}/metrics")
+        return actual_port
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._textfile_thread is not None:
+            self._textfile_thread.join(timeout=5)
+            self._textfile_thread = None
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            self._server_thread = None
@@ -1,136 +1,224 @@
+import json
+import multiprocessing
 import os
-import matplotlib.pyplot as plt
-import seaborn as sns
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-import pandas as pd
-from typing import List, Dict
-import numpy as np
+from typing import Dict, List, Optional, Union
+
+# 可选的分桶宽度（秒），按数据时间跨度选取使桶数不超过max_buckets的最小宽度
+_BUCKET_SECONDS = (1, 5, 10, 30, 60, 300, 600, 1800, 3600, 3 * 3600, 6 * 3600, 12 * 3600, 86400)
+
+_STYLE = {
+    'figure.figsize': (12, 6),
+    'axes.grid': True,
+    'grid.alpha': 0.3,
+    'lines.linewidth': 2,
+    'font.size': 10,
+    'axes.titlesize': 14,
+    'axes.labelsize': 12
+}
+
+# 图表类型 -> (指标键, 数值列, 输出文件名)
+_CHARTS = {
+    'api_latency': ('api_calls', 'elapsed', 'api_latency.png'),
+    'answer_quality': ('answer_quality', 'score', 'answer_quality.png'),
+    'cache_hits': ('cache_hits', 'hit', 'cache_hits.png'),
+}
+
+
+# 指标数据可以是事件字典列表（时间戳为ISO字符串），也可以是列式数组（时间戳为epoch秒）
+Records = Union[List[Dict], Dict[str, 'np.ndarray']]
+
+
+def _record_count(records: Records) -> int:
+    if isinstance(records, dict):
+        return len(records.get('timestamp', ()))
+    return len(records)
+
+
+def _column(records: Records, name: str) -> list:
+    if isinstance(records, dict):
+        return records[name].tolist() if name in records else []
+    return [record[name] for record in records]
+
+
+def _pyplot():
+    """延迟导入matplotlib，并强制使用无界面的Agg后端"""
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+    import matplotlib.pyplot as plt
+    plt.rcParams.update(_STYLE)
+    return plt
+
+
+def _to_frame(records: Records, value_column: str):
+    """把事件列表或列式数组转换为按时间索引的DataFrame，缺少必要列时返回None"""
+    import pandas as pd
+    df = pd.DataFrame(records)
+    if value_column not in df.columns or 'timestamp' not in df.columns:
+        print(f"Warning: Missing required columns. Available columns: {df.columns}")
+        return None
+    if pd.api.types.is_numeric_dtype(df['timestamp']):
+        # epoch秒转换为本地时间，与ISO格式的事件时间一致
+        local_tz = datetime.now().astimezone().tzinfo
+        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='s', utc=True).dt.tz_convert(local_tz).dt.tz_localize(None)
+    else:
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+    return df.set_index('timestamp').sort_index()
+
+
+def _bucket_rule(index, max_buckets: int) -> str:
+    """选择分桶宽度，使桶数不超过max_buckets"""
+    span = (index.max() - index.min()).total_seconds() if len(index) else 0
+    for seconds in _BUCKET_SECONDS:
+        if span / seconds < max_buckets:
+            return f"{seconds}s"
+    return f"{int(-(-span // max_buckets))}s"
+
+
+def _resample_latency(df, max_buckets: int):
+    """按时间桶统计延迟的 min/mean/p95/max 和调用数"""
+    import pandas as pd
+    grouped = df['elapsed'].astype(float).resample(_bucket_rule(df.index, max_buckets))
+    result = pd.DataFrame({
+        'min': grouped.min(),
+        'mean': grouped.mean(),
+        'p95': grouped.quantile(0.95),
+        'max': grouped.max(),
+        'count': grouped.count()
+    })
+    return result[result['count'] > 0]
+
+
+def _resample_rate(df, column: str, max_buckets: int):
+    """按时间桶统计平均值（命中率、质量分）和事件数"""
+    import pandas as pd
+    grouped = df[column].astype(float).resample(_bucket_rule(df.index, max_buckets))
+    result = pd.DataFrame({'mean': grouped.mean(), 'count': grouped.count()})
+    return result[result['count'] > 0]
+
+
+def _render_chart(chart: str, records: Records, output_path: str,
+                  max_buckets: int, dpi: int) -> Optional[str]:
+    """渲染单个图表；模块级函数，可在子进程中执行"""
+    _, value_column, _ = _CHARTS[chart]
+    df = _to_frame(records, value_column)
+    if df is None:
+        return None
+
+    plt = _pyplot()
+    fig, ax = plt.subplots()
+    if chart == 'api_latency':
+        buckets = _resample_latency(df, max_buckets)
+        ax.fill_between(buckets.index, buckets['min'], buckets['max'], alpha=0.2, label='min-max')
+        ax.plot(buckets.index, buckets['mean'], '-', label='mean')
+        ax.plot(buckets.index, buckets['p95'], '--', label='p95')
+        ax.set_title('API Response Latency Over Time')
+        ax.set_ylabel('Latency (seconds)')
+        ax.legend()
+    elif chart == 'answer_quality':
+        buckets = _resample_rate(df, 'score', max_buckets)
+        ax.plot(buckets.index, buckets['mean'], '-o', alpha=0.7)
+        ax.set_title('Answer Quality Over Time')
+        ax.set_ylabel('Quality Score')
+    else:
+        buckets = _resample_rate(df, 'hit', max_buckets)
+        ax.plot(buckets.index, buckets['mean'], '-o', alpha=0.7)
+        ax.set_ylim(0, 1.05)
+        ax.set_title('Cache Hit Rate')
+        ax.set_ylabel('Hit Rate')
+    ax.set_xlabel('Time')
+    plt.xticks(rotation=45)
+    plt.tight_layout()
+
+    plt.savefig(output_path, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+    if not os.path.exists(output_path):
+        print(f"Warning: Failed to save plot to {output_path}")
+        return None
+    return output_path
+
 
 class MetricsVisualizer:
-    def __init__(self, output_dir: str = "reports"):
+    """性能报告生成
+
+    绘图前先把原始事件按时间分桶聚合，绘图耗时只与桶数有关，与事件数无关。
+    绘图库只在生成报告时导入（Agg后端）；事件量较大时各图表在进程池中并行渲染。
+    """
+
+    def __init__(self, output_dir: str = "reports", max_buckets: int = 120, dpi: int = 150,
+                 workers: Optional[int] = None, parallel_threshold: int = 50000):
         self.output_dir = output_dir
+        self.max_buckets = max_buckets
+        self.dpi = dpi
+        self.workers = workers
+        self.parallel_threshold = parallel_threshold
         os.makedirs(output_dir, exist_ok=True)
-        
-        # 设置基础的图表样式
-        plt.rcParams.update({
-            'figure.figsize': (12, 6),
-            'axes.grid': True,
-            'grid.alpha': 0.3,
-            'lines.linewidth': 2,
-            'font.size': 10,
-            'axes.titlesize': 14,
-            'axes.labelsize': 12
-        })
-        
+
     def generate_report(self, metrics_data: dict) -> str:
         if not metrics_data or not any(metrics_data.values()):
             return self._generate_empty_report()
-            
+
         report_dir = os.path.join(self.output_dir, f"report_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
         os.makedirs(report_dir, exist_ok=True)
-        
+
         try:
             print(f"\nGenerating report in: {report_dir}")
             print(f"Metrics data keys: {metrics_data.keys()}")
-            
-            if 'api_calls' in metrics_data:
+
+            if isinstance(metrics_data.get('api_calls'), list) and metrics_data['api_calls']:
                 print(f"API calls data sample: {metrics_data['api_calls'][0]}")
-                
+
             # 生成所有图表
             self._generate_all_plots(metrics_data, report_dir)
-            
+
             # 生成HTML报告
             report_path = os.path.join(report_dir, 'report.html')
             self._generate_html_report(metrics_data, report_path)
-            
+
             # 验证生成的文件
             print(f"Generated files: {os.listdir(report_dir)}")
-            
+
             return report_dir
-            
+
         except Exception as e:
             print(f"Error generating report: {str(e)}")
             raise
-            
+
+    def _chart_jobs(self, metrics_data: Dict, report_dir: str) -> List[tuple]:
+        jobs = []
+        for chart, (key, _, filename) in _CHARTS.items():
+            records = metrics_data.get(key)
+            if records is not None and _record_count(records):
+                jobs.append((chart, records, os.path.join(report_dir, filename),
+                             self.max_buckets, self.dpi))
+        return jobs
+
+    def _worker_count(self, jobs: List[tuple]) -> int:
+        if self.workers is not None:
+            return min(self.workers, len(jobs))
+        events = sum(_record_count(job[1]) for job in jobs)
+        # 事件较少时子进程的启动开销大于并行收益
+        return min(len(jobs), os.cpu_count() or 1) if events >= self.parallel_threshold else 1
+
     def _generate_all_plots(self, metrics_data: Dict, report_dir: str):
-        # API延迟图表
-        if api_calls := metrics_data.get('api_calls'):
-            self._create_api_latency_plot(api_calls, report_dir)
-            
-        # 答案质量图表
-        if quality_data := metrics_data.get('answer_quality'):
-            self._create_quality_plot(quality_data, report_dir)
-            
-        # 缓存命中率图表
-        if cache_data := metrics_data.get('cache_hits'):
-            self._create_cache_plot(cache_data, report_dir)
-            
-    def _create_api_latency_plot(self, api_calls: List[Dict], report_dir: str):
-        try:
-            df = pd.DataFrame(api_calls)
-            if 'elapsed' not in df.columns or 'timestamp' not in df.columns:
-                print(f"Warning: Missing required columns. Available columns: {df.columns}")
-                return
-                
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            
-            fig, ax = plt.subplots()
-            ax.plot(df['timestamp'], df['elapsed'], '-o', alpha=0.7)
-            ax.set_title('API Response Latency Over Time')
-            ax.set_xlabel('Time')
-            ax.set_ylabel('Latency (seconds)')
-            plt.xticks(rotation=45)
-            plt.tight_layout()
-            
-            output_path = os.path.join(report_dir, 'api_latency.png')
-            print(f"Saving API latency plot to: {output_path}")
-            plt.savefig(output_path, dpi=300, bbox_inches='tight')
-            plt.close()
-            
-            # 验证文件是否成功保存
-            if not os.path.exists(output_path):
-                print(f"Warning: Failed to save plot to {output_path}")
-                
-        except Exception as e:
-            print(f"Error creating API latency plot: {str(e)}")
-            raise
-        
-    def _create_quality_plot(self, quality_data: List[Dict], report_dir: str):
-        df = pd.DataFrame(quality_data)
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        
-        fig, ax = plt.subplots()
-        ax.plot(df['timestamp'], df['score'], '-o', alpha=0.7)
-        ax.set_title('Answer Quality Over Time')
-        ax.set_xlabel('Time')
-        ax.set_ylabel('Quality Score')
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        
-        output_path = os.path.join(report_dir, 'answer_quality.png')
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        plt.close()
-        
-    def _create_cache_plot(self, cache_data: List[Dict], report_dir: str):
-        df = pd.DataFrame(cache_data)
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        df['hour'] = df['timestamp'].dt.strftime('%H:%M')
-        
-        fig, ax = plt.subplots()
-        ax.bar(df['hour'], df['hit'].astype(int), alpha=0.7)
-        ax.set_title('Cache Hit Rate')
-        ax.set_xlabel('Time')
-        ax.set_ylabel('Hit (1) / Miss (0)')
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        
-        output_path = os.path.join(report_dir, 'cache_hits.png')
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        plt.close()
-        
+        jobs = self._chart_jobs(metrics_data, report_dir)
+        workers = self._worker_count(jobs)
+        if workers <= 1:
+            for job in jobs:
+                _render_chart(*job)
+            return
+
+        # spawn启动的子进程不继承父进程中的线程和锁
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            futures = [executor.submit(_render_chart, *job) for job in jobs]
+            for future in futures:
+                future.result()
+
     def _generate_html_report(self, metrics_data: Dict, report_path: str):
         summary_stats = self._calculate_summary_stats(metrics_data)
-        
+
         html_content = f"""
         <html>
             <head>
@@ -148,6 +236,7 @@ class MetricsVisualizer:
                     <h2>Summary Statistics</h2>
                     <ul>
                         <li>Average API Latency: {summary_stats['avg_latency']:.2f}s</li>
+                        <li>API Latency p50/p95/p99: {summary_stats['p50_latency']:.2f}s / {summary_stats['p95_latency']:.2f}s / {summary_stats['p99_latency']:.2f}s</li>
                         <li>Cache Hit Rate: {summary_stats['cache_hit_rate']:.2%}</li>
                         <li>Average Answer Quality: {summary_stats['avg_quality']:.2f}</li>
                     </ul>
@@ -160,27 +249,64 @@ class MetricsVisualizer:
             </body>
         </html>
         """
-        
+
         with open(report_path, 'w') as f:
             f.write(html_content)
-            
+
     def _calculate_summary_stats(self, metrics_data: Dict) -> Dict:
-        api_calls = metrics_data.get('api_calls', [])
-        cache_hits = metrics_data.get('cache_hits', [])
-        quality_data = metrics_data.get('answer_quality', [])
-        
+        import numpy as np
+
+        latencies = _column(metrics_data.get('api_calls', []), 'elapsed')
+        cache_hits = _column(metrics_data.get('cache_hits', []), 'hit')
+        scores = _column(metrics_data.get('answer_quality', []), 'score')
+
+        # 优先使用监控器的流式直方图分位数，否则根据原始延迟计算
+        api_latency = metrics_data.get('latency', {}).get('api')
+        if api_latency and api_latency.get('count'):
+            percentiles = [api_latency['p50'], api_latency['p95'], api_latency['p99']]
+        elif latencies:
+            percentiles = np.percentile(latencies, [50, 95, 99]).tolist()
+        else:
+            percentiles = [0, 0, 0]
+
         return {
-            'avg_latency': np.mean([call['elapsed'] for call in api_calls]) if api_calls else 0,
-            'cache_hit_rate': sum(1 for hit in cache_hits if hit['hit']) / len(cache_hits) if cache_hits else 0,
-            'avg_quality': np.mean([q['score'] for q in quality_data]) if quality_data else 0
+            'avg_latency': np.mean(latencies) if latencies else 0,
+            'p50_latency': percentiles[0],
+            'p95_latency': percentiles[1],
+            'p99_latency': percentiles[2],
+            'cache_hit_rate': sum(1 for hit in cache_hits if hit) / len(cache_hits) if cache_hits else 0,
+            'avg_quality': np.mean(scores) if scores else 0
         }
-        
+
     def _generate_empty_report(self) -> str:
         report_dir = os.path.join(self.output_dir, "empty_report")
         os.makedirs(report_dir, exist_ok=True)
-        
+
         report_path = os.path.join(report_dir, 'report.html')
         with open(report_path, 'w') as f:
             f.write("<h1>No metrics data available</h1>")
-            
-        return report_dir
\ No newline at end of file
+
+        return report_dir
+
+
+def generate_report_from_file(metrics_file: str, output_dir: str = "reports",
+                              workers: Optional[int] = None) -> str:
+    """根据保存的指标文件生成报告，可在填写进程之外运行"""
+    with open(metrics_file, 'r', encoding='utf-8') as f:
+        metrics_data = json.load(f)
+    return MetricsVisualizer(output_dir=output_dir, workers=workers).generate_report(metrics_data)
+
+
+def generate_report_from_store(metrics_dir: str, start: Optional[float] = None, end: Optional[float] = None,
+                               output_dir: str = "reports", workers: Optional[int] = None) -> str:
+    """根据列式指标存储中[start, end)时间范围（epoch秒）的数据生成报告
+
+    只读取时间范围内的数据块和绘图所需的列，不需要把全部历史数据载入内存。
+    """
+    from ..utils.metrics_store import MetricsStore
+    store = MetricsStore(metrics_dir)
+    metrics_data = {}
+    for key, value_column, _ in _CHARTS.values():
+        if data := store.query(key, start, end, columns=[value_column]):
+            metrics_data[key] = data
+    return MetricsVisualizer(output_dir=output_dir, workers=workers).generate_report(metrics_data)
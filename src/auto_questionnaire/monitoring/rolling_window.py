@@ -0,0 +1,84 @@
+import time
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class RollingWindow:
+    """固定时长的滑动窗口计数器
+
+    把窗口切分为bucket_count个时间桶，维护窗口内的总数和各字段之和；
+    过期桶的扣除是摊还O(1)，读取总量不需要遍历事件。
+
+    PerformanceMonitor 的预聚合分桶只覆盖最近10分钟、只累加原始列，
+    告警规则需要最长1小时的窗口和"超过延迟阈值的调用数"这类派生字段，因此单独维护。
+    不是线程安全的：由 AlertManager 在评估时批量写入和读取，调用方负责加锁。
+    """
+
+    def __init__(self, seconds: float, fields: int = 1, bucket_count: int = 60):
+        if seconds <= 0:
+            raise ValueError("seconds 必须大于0")
+        self.seconds = seconds
+        self.fields = fields
+        self.bucket_count = bucket_count
+        self.bucket_seconds = seconds / bucket_count
+        self._counts = [0] * bucket_count
+        self._sums = [[0.0] * fields for _ in range(bucket_count)]
+        self._count = 0
+        self._totals = [0.0] * fields
+        self._head: Optional[int] = None  # 最新一个桶的编号
+
+    def _advance(self, bucket_id: int) -> None:
+        """把窗口推进到bucket_id，扣除移出窗口的桶"""
+        if self._head is None:
+            self._head = bucket_id
+            return
+        if bucket_id <= self._head:
+            return
+        expired = min(bucket_id - self._head, self.bucket_count)
+        for offset in range(1, expired + 1):
+            slot = (self._head + offset) % self.bucket_count
+            if self._counts[slot]:
+                self._count -= self._counts[slot]
+                sums = self._sums[slot]
+                for j in range(self.fields):
+                    self._totals[j] -= sums[j]
+                    sums[j] = 0.0
+                self._counts[slot] = 0
+        if not self._count:
+            self._totals = [0.0] * self.fields  # 清除浮点累计误差
+        self._head = bucket_id
+
+    def _add_bucket(self, bucket_id: int, count: int, values: Sequence[float]) -> None:
+        self._advance(bucket_id)
+        if bucket_id <= self._head - self.bucket_count:
+            return  # 早于窗口的事件直接忽略
+        slot = bucket_id % self.bucket_count
+        self._counts[slot] += count
+        self._count += count
+        sums = self._sums[slot]
+        for j, value in enumerate(values):
+            sums[j] += value
+            self._totals[j] += value
+
+    def add(self, timestamp: float, *values: float) -> None:
+        self._add_bucket(int(timestamp // self.bucket_seconds), 1, values)
+
+    def add_many(self, timestamps: np.ndarray, *columns: np.ndarray) -> None:
+        """批量写入事件：先按时间桶聚合，再逐桶累加，开销与涉及的桶数成正比"""
+        if not len(timestamps):
+            return
+        bucket_ids, inverse = np.unique(
+            (np.asarray(timestamps) // self.bucket_seconds).astype(np.int64), return_inverse=True
+        )
+        counts = np.bincount(inverse, minlength=len(bucket_ids))
+        sums = [np.bincount(inverse, weights=np.asarray(column, dtype=np.float64), minlength=len(bucket_ids))
+                for column in columns]
+        for i, bucket_id in enumerate(bucket_ids.tolist()):
+            self._add_bucket(bucket_id, int(counts[i]), [float(column[i]) for column in sums])
+
+    def totals(self, now: Optional[float] = None) -> Tuple[int, List[float]]:
+        """窗口内的事件数和各字段之和"""
+        now = time.time() if now is None else now
+        self._advance(int(now // self.bucket_seconds))
+        return self._count, list(self._totals)
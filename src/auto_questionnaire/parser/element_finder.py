@@ -1,10 +1,24 @@
 from dataclasses import dataclass
-from typing import List, Optional, Tuple
+from typing import List, Optional, Tuple, Union
 
-import cv2
-import pytesseract
+import numpy as np
 from loguru import logger
 
+from ..utils.lazy_import import lazy_import
+from ..utils.tracing import span, traced
+
+cv2 = lazy_import('cv2')
+pytesseract = lazy_import('pytesseract')
+Image = lazy_import('PIL.Image')
+
+
+def load_image(path: str) -> np.ndarray:
+    """读取图片文件为RGB数组，与 capture_screen 的返回值一致（OpenCV默认按BGR读取）"""
+    image = cv2.imread(path)
+    if image is None:
+        raise ValueError("无法读取图片")
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
 
 @dataclass
 class QuestionElement:
@@ -17,15 +31,18 @@ class ElementFinder:
     def __init__(self):
         self.ocr_config = '--psm 6 -l chi_sim'
         
-    def find_elements(self, image_path: str) -> List[QuestionElement]:
-        """识别图片中的问题元素"""
+    @traced('ocr.find_elements')
+    def find_elements(self, image: Union[str, np.ndarray]) -> List[QuestionElement]:
+        """识别图片中的问题元素
+        Args:
+            image: 图片路径，或内存中的图像数组（如 capture_screen 的返回值）
+        """
         try:
-            image = cv2.imread(image_path)
-            if image is None:
-                raise ValueError("无法读取图片")
+            ocr_image = self._prepare_image(image)
                 
             # OCR识别
-            text_data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT, config=self.ocr_config)
+            with span('ocr.tesseract'):
+                text_data = pytesseract.image_to_data(ocr_image, output_type=pytesseract.Output.DICT, config=self.ocr_config)
             
             elements = []
             current_text = []
@@ -66,6 +83,19 @@ class ElementFinder:
             logger.error(f"元素识别错误: {e}")
             return []
     
+    def _prepare_image(self, image: Union[str, np.ndarray]) -> 'Image.Image':
+        """将输入转换为OCR用的PIL图片
+        pytesseract 会把图片写入临时文件，标记为BMP格式可避免额外的PNG压缩
+        """
+        if isinstance(image, str):
+            image = load_image(image)
+        if not isinstance(image, np.ndarray):
+            raise TypeError(f"不支持的图片类型: {type(image)}")
+
+        ocr_image = Image.fromarray(image)
+        ocr_image.format = 'BMP'
+        return ocr_image
+
     def _identify_question_type(self, text: str) -> str:
         """识别问题类型"""
         text = text.lower()
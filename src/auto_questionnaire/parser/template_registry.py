@@ -0,0 +1,166 @@
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+from ..utils.lazy_import import lazy_import
+from .element_finder import QuestionElement
+
+cv2 = lazy_import('cv2')
+pytesseract = lazy_import('pytesseract')
+Image = lazy_import('PIL.Image')
+
+
+@dataclass
+class PageFingerprint:
+    layout_hash: str
+    anchors: List[str] = field(default_factory=list)
+    blocks: List[Tuple[int, int, int, int]] = field(default_factory=list)
+
+
+class TemplateRegistry:
+    """问卷模板库
+
+    通过文本块布局哈希和少量锚点文字识别已知问卷，
+    命中时直接返回保存的问题元素，跳过整页OCR。
+    """
+
+    def __init__(self, template_dir: str = "data/templates",
+                 grid_size: int = 16,
+                 anchor_count: int = 3,
+                 anchor_similarity: float = 0.8,
+                 min_block_area: int = 60):
+        self.template_dir = template_dir
+        self.grid_size = grid_size
+        self.anchor_count = anchor_count
+        self.anchor_similarity = anchor_similarity
+        self.min_block_area = min_block_area
+        self.anchor_config = '--psm 7 -l chi_sim'
+        self._templates: Dict[str, List[Dict]] = {}
+        self._load_templates()
+
+    def _load_templates(self) -> None:
+        """加载模板目录中的所有模板，按布局哈希建立索引"""
+        if not os.path.isdir(self.template_dir):
+            return
+        for filename in sorted(os.listdir(self.template_dir)):
+            if not filename.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.template_dir, filename), 'r', encoding='utf-8') as f:
+                    template = json.load(f)
+                self._templates.setdefault(template['layout_hash'], []).append(template)
+            except Exception as e:
+                logger.error(f"加载模板失败 {filename}: {e}")
+        logger.info(f"已加载 {len(self)} 个问卷模板")
+
+    def __len__(self) -> int:
+        return sum(len(templates) for templates in self._templates.values())
+
+    def detect_blocks(self, image: np.ndarray) -> List[Tuple[int, int, int, int]]:
+        """检测文本块位置 (x1, y1, x2, y2)，按阅读顺序排列"""
+        gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY) if image.ndim == 3 else image
+        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+        # 横向膨胀，把同一行的文字合并为一个块
+        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (25, 5))
+        dilated = cv2.dilate(binary, kernel, iterations=1)
+        contours, _ = cv2.findContours(dilated, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        blocks = []
+        for contour in contours:
+            x, y, w, h = cv2.boundingRect(contour)
+            if w * h >= self.min_block_area:
+                blocks.append((x, y, x + w, y + h))
+        blocks.sort(key=lambda b: (b[1] // self.grid_size, b[0]))
+        return blocks
+
+    def fingerprint(self, image: np.ndarray) -> PageFingerprint:
+        """计算页面指纹"""
+        blocks = self.detect_blocks(image)
+        grid = self.grid_size
+        layout = [tuple(round(v / grid) for v in block) for block in blocks]
+        layout_key = f"{image.shape[0] // grid}x{image.shape[1] // grid}:{layout}"
+        layout_hash = hashlib.sha1(layout_key.encode('utf-8')).hexdigest()
+
+        anchors = [
+            self._read_anchor(image, block)
+            for block in blocks[:self.anchor_count]
+        ]
+        return PageFingerprint(layout_hash=layout_hash, anchors=anchors, blocks=blocks)
+
+    def _read_anchor(self, image: np.ndarray, block: Tuple[int, int, int, int]) -> str:
+        """识别锚点文本块中的文字"""
+        x1, y1, x2, y2 = block
+        try:
+            crop = Image.fromarray(np.ascontiguousarray(image[y1:y2, x1:x2]))
+            crop.format = 'BMP'
+            text = pytesseract.image_to_string(crop, config=self.anchor_config)
+            return ''.join(text.split())
+        except Exception as e:
+            logger.warning(f"锚点识别失败: {e}")
+            return ''
+
+    def match(self, fingerprint: PageFingerprint) -> Optional[List[QuestionElement]]:
+        """查找与指纹匹配的模板，命中时返回保存的问题元素"""
+        for template in self._templates.get(fingerprint.layout_hash, []):
+            if self._anchors_match(template.get('anchors', []), fingerprint.anchors):
+                logger.info(f"命中问卷模板: {template.get('name', fingerprint.layout_hash)}")
+                return [
+                    QuestionElement(
+                        question_type=element['question_type'],
+                        text=element['text'],
+                        position=tuple(element['position']),
+                        options=element.get('options')
+                    )
+                    for element in template['elements']
+                ]
+        return None
+
+    def _anchors_match(self, stored: List[str], current: List[str]) -> bool:
+        if len(stored) != len(current):
+            return False
+        return all(
+            a == b or SequenceMatcher(None, a, b).ratio() >= self.anchor_similarity
+            for a, b in zip(stored, current)
+        )
+
+    def save_template(self, fingerprint: PageFingerprint,
+                      elements: List[QuestionElement],
+                      name: Optional[str] = None) -> Optional[str]:
+        """将解析结果保存为新模板
+        Returns:
+            str: 模板文件路径，失败返回None
+        """
+        if not elements:
+            return None
+        template = {
+            'name': name or fingerprint.layout_hash[:12],
+            'layout_hash': fingerprint.layout_hash,
+            'anchors': fingerprint.anchors,
+            'elements': [asdict(element) for element in elements]
+        }
+        try:
+            os.makedirs(self.template_dir, exist_ok=True)
+            anchor_hash = hashlib.sha1('|'.join(fingerprint.anchors).encode('utf-8')).hexdigest()
+            template_path = os.path.join(
+                self.template_dir,
+                f"{fingerprint.layout_hash[:16]}_{anchor_hash[:8]}.json"
+            )
+            with open(template_path, 'w', encoding='utf-8') as f:
+                json.dump(template, f, ensure_ascii=False, indent=2)
+            templates = [
+                t for t in self._templates.get(fingerprint.layout_hash, [])
+                if t.get('anchors') != fingerprint.anchors
+            ]
+            templates.append(template)
+            self._templates[fingerprint.layout_hash] = templates
+            logger.info(f"已保存问卷模板: {template_path}")
+            return template_path
+        except Exception as e:
+            logger.error(f"保存模板失败: {e}")
+            return None
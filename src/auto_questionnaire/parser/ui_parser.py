@@ -1,24 +1,28 @@
-from typing import Dict, List
+from typing import Dict, List, Optional, Union
 
+import numpy as np
 from loguru import logger
 
-from .element_finder import ElementFinder, QuestionElement
+from .element_finder import ElementFinder, QuestionElement, load_image
+from .template_registry import TemplateRegistry
 
 
 class QuestionnaireParser:
-    def __init__(self):
+    def __init__(self, template_registry: Optional[TemplateRegistry] = None,
+                 save_new_templates: bool = False):
         self.element_finder = ElementFinder()
+        self.template_registry = template_registry
+        self.save_new_templates = save_new_templates
     
-    def parse_page(self, image_path: str) -> Dict[str, List[QuestionElement]]:
+    def parse_page(self, image: Union[str, np.ndarray]) -> Dict[str, List[QuestionElement]]:
         """解析问卷页面
         Args:
-            image_path: 问卷截图路径
+            image: 问卷截图路径，或内存中的图像数组
         Returns:
             Dict[str, List[QuestionElement]]: 按类型分类的问题元素
         """
         try:
-            # 使用OCR识别问题元素
-            elements = self.element_finder.find_elements(image_path)
+            elements = self._find_elements(image)
             
             # 按类型分类
             classified = {
@@ -44,6 +48,25 @@ class QuestionnaireParser:
             logger.error(f"问卷解析失败: {e}")
             return {'radio': [], 'checkbox': [], 'text': []}
     
+    def _find_elements(self, image: Union[str, np.ndarray]) -> List[QuestionElement]:
+        """识别问题元素，已知模板的页面跳过整页OCR"""
+        if self.template_registry is None:
+            return self.element_finder.find_elements(image)
+
+        if isinstance(image, str):
+            image = load_image(image)
+
+        fingerprint = self.template_registry.fingerprint(image)
+        elements = self.template_registry.match(fingerprint)
+        if elements is not None:
+            return elements
+
+        # 使用OCR识别问题元素
+        elements = self.element_finder.find_elements(image)
+        if self.save_new_templates:
+            self.template_registry.save_template(fingerprint, elements)
+        return elements
+
     def validate_elements(self, elements: Dict[str, List[QuestionElement]]) -> bool:
         """验证解析结果是否有效
         Args:
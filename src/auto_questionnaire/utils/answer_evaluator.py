@@ -1,5 +1,10 @@
 from dataclasses import dataclass
-from typing import Dict, Optional
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .relevance import TfidfRelevanceScorer
 
 @dataclass
 class EvaluationResult:
@@ -13,7 +18,34 @@ class EvaluationResult:
     def __lt__(self, other: float) -> bool:
         return self.score < other
 
+_DETAIL_KEYS = ('completeness', 'format', 'relevance', 'length')
+
+
+@lru_cache(maxsize=1024)
+def _option_set(options: Tuple[str, ...]) -> FrozenSet[str]:
+    """缓存选项集合，同一问卷的选项只构建一次"""
+    return frozenset(options)
+
+
+def _uniform_result(score: float, feedback: str) -> EvaluationResult:
+    return EvaluationResult(
+        score=score,
+        feedback=feedback,
+        details={key: score for key in _DETAIL_KEYS}
+    )
+
+
 class AnswerEvaluator:
+    # 文本题评分参数，逐个评估与批量评估共用
+    TEXT_FULL_LENGTH = 20           # 长度得分满分所需字数
+    TEXT_COMPLETE_LENGTH = 50       # 完整性得分满分所需字数
+    TEXT_MIN_FORMAT_LENGTH = 10     # 格式得分满分所需最少字数
+    TEXT_SHORT_FORMAT_SCORE = 0.7   # 不足最少字数时的格式得分
+    TEXT_SCORE_SCALE = 1.5          # 四项平均分的放大系数
+
+    def __init__(self, relevance_scorer: Optional[TfidfRelevanceScorer] = None):
+        self.relevance_scorer = relevance_scorer or TfidfRelevanceScorer()
+
     def evaluate(self, question_type: str, answer: str, question: str, options: Optional[list] = None) -> EvaluationResult:
         if not answer:
             return EvaluationResult(
@@ -42,13 +74,13 @@ class AnswerEvaluator:
             )
             
         elif question_type == 'text':
-            length_score = min(1.0, len(answer) / 20)
+            length_score = min(1.0, len(answer) / self.TEXT_FULL_LENGTH)
             completeness = self._evaluate_completeness(answer)
             format_score = self._evaluate_format(answer)
             relevance = self._evaluate_relevance(answer, question)
             
             total_score = (length_score + completeness + format_score + relevance) / 4
-            total_score = min(1.0, total_score * 1.5)
+            total_score = min(1.0, total_score * self.TEXT_SCORE_SCALE)
             
             return EvaluationResult(
                 score=total_score,
@@ -89,14 +121,89 @@ class AnswerEvaluator:
             details={'completeness': 0.0, 'format': 0.0, 'relevance': 0.0, 'length': 0.0}
         )
         
+    def evaluate_many(self, questions: Sequence, answers: Sequence[str]) -> List[EvaluationResult]:
+        """批量评估整份问卷的答案，结果与逐个调用evaluate一致
+        Args:
+            questions: 问题元素列表（需有question_type、text、options属性）
+            answers: 与问题一一对应的答案
+        """
+        results: List[Optional[EvaluationResult]] = [None] * len(questions)
+        text_indices = []
+
+        for i, (question, answer) in enumerate(zip(questions, answers)):
+            question_type = question.question_type
+            options = getattr(question, 'options', None)
+            if not answer:
+                results[i] = _uniform_result(0.0, "答案为空")
+            elif question_type == 'text':
+                text_indices.append(i)
+            elif question_type == 'radio':
+                if not options:
+                    results[i] = _uniform_result(0.6, "答案基本合格")
+                elif answer in _option_set(tuple(options)):
+                    results[i] = _uniform_result(1.0, "答案有效")
+                else:
+                    results[i] = _uniform_result(0.3, "答案需要改进：不在选项中")
+            elif question_type == 'checkbox':
+                if not options:
+                    results[i] = _uniform_result(0.0, "无效的选项列表")
+                    continue
+                option_set = _option_set(tuple(options))
+                valid_count = sum(1 for a in answer.split(',') if a.strip() in option_set)
+                score = valid_count / len(options)
+                hit = 1.0 if valid_count else 0.0
+                results[i] = EvaluationResult(
+                    score=score,
+                    feedback=self._generate_feedback(score),
+                    details={'completeness': score, 'format': hit, 'relevance': hit, 'length': score}
+                )
+            else:
+                results[i] = _uniform_result(0.0, "无效的问题类型")
+
+        if text_indices:
+            for i, result in zip(text_indices, self._evaluate_text_batch(
+                [answers[i] for i in text_indices],
+                [questions[i].text for i in text_indices]
+            )):
+                results[i] = result
+        return results
+
+    def _evaluate_text_batch(self, answers: List[str], questions: List[str]) -> List[EvaluationResult]:
+        """向量化计算文本题的长度、完整性、格式与相关性得分"""
+        lengths = np.fromiter((len(a) for a in answers), dtype=np.float64, count=len(answers))
+        length_scores = np.minimum(1.0, lengths / self.TEXT_FULL_LENGTH)
+        completeness = np.minimum(1.0, lengths / self.TEXT_COMPLETE_LENGTH)
+        format_scores = np.where(lengths >= self.TEXT_MIN_FORMAT_LENGTH, 1.0, self.TEXT_SHORT_FORMAT_SCORE)
+        relevance = self.relevance_scorer.score_batch(questions, answers)
+        totals = np.minimum(
+            1.0, (length_scores + completeness + format_scores + relevance) / 4 * self.TEXT_SCORE_SCALE
+        )
+
+        return [
+            EvaluationResult(
+                score=total,
+                feedback=self._generate_feedback(total),
+                details={
+                    'completeness': c,
+                    'format': f,
+                    'relevance': r,
+                    'length': l
+                }
+            )
+            for total, c, f, r, l in zip(
+                totals.tolist(), completeness.tolist(), format_scores.tolist(),
+                relevance.tolist(), length_scores.tolist()
+            )
+        ]
+
     def _evaluate_completeness(self, answer: str) -> float:
-        return min(1.0, len(answer) / 50)
+        return min(1.0, len(answer) / self.TEXT_COMPLETE_LENGTH)
         
     def _evaluate_format(self, answer: str) -> float:
-        return 1.0 if len(answer) >= 10 else 0.7
+        return 1.0 if len(answer) >= self.TEXT_MIN_FORMAT_LENGTH else self.TEXT_SHORT_FORMAT_SCORE
         
     def _evaluate_relevance(self, answer: str, question: str) -> float:
-        return 0.8
+        return self.relevance_scorer.score(question, answer)
         
     def _generate_feedback(self, score: float) -> str:
         if score >= 0.8:
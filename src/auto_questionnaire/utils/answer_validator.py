@@ -1,33 +1,140 @@
-from typing import List, Dict
-from difflib import SequenceMatcher
+import json
+import math
+import os
+import zlib
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Deque, Dict, FrozenSet, Iterable, List, Optional
+
 from loguru import logger
-import jieba
+
+from .similarity_index import MinHasher, MinHashLSHIndex
+from .tokenizer import get_tokenizer
+from .tracing import traced
+
+
+@dataclass
+class AnswerFeatures:
+    """答案的预计算特征，存储时计算一次，比较时直接复用"""
+    text: str
+    tokens: FrozenSet[str]
+    shingles: FrozenSet[int]
+    char_masks: Dict[str, int]
+
+
+def _shingle_hashes(text: str, size: int = 2) -> FrozenSet[int]:
+    """计算字符n-gram的稳定哈希（跨进程一致）"""
+    if len(text) < size:
+        return frozenset([zlib.crc32(text.encode('utf-8'))]) if text else frozenset()
+    return frozenset(
+        zlib.crc32(text[i:i + size].encode('utf-8'))
+        for i in range(len(text) - size + 1)
+    )
+
+
+def _build_features(text: str, tokens: Iterable[str]) -> AnswerFeatures:
+    char_masks: Dict[str, int] = {}
+    for i, char in enumerate(text):
+        char_masks[char] = char_masks.get(char, 0) | (1 << i)
+    return AnswerFeatures(
+        text=text,
+        tokens=frozenset(tokens),
+        shingles=_shingle_hashes(text),
+        char_masks=char_masks
+    )
+
+
+@lru_cache(maxsize=4096)
+def extract_features(text: str) -> AnswerFeatures:
+    """分词并预计算相似度所需的特征"""
+    return _build_features(text, get_tokenizer().cut(text))
+
+
+def _jaccard(set1: FrozenSet, set2: FrozenSet) -> float:
+    union = len(set1 | set2)
+    return len(set1 & set2) / union if union else 0
+
+
+def bounded_sequence_similarity(features1: AnswerFeatures, features2: AnswerFeatures,
+                                threshold: float = 0.0) -> float:
+    """基于最长公共子序列的序列相似度 2*LCS/(len1+len2)
+
+    使用位并行算法计算LCS；当剩余字符已不可能达到threshold时提前退出并返回0。
+    """
+    len1, len2 = len(features1.text), len(features2.text)
+    total = len1 + len2
+    if total == 0:
+        return 1.0
+
+    needed = math.ceil(threshold * total / 2) if threshold > 0 else 0
+    if min(len1, len2) < needed:
+        return 0.0
+
+    masks = features1.char_masks
+    full = (1 << len1) - 1
+    state = full
+    for j, char in enumerate(features2.text):
+        matches = state & masks.get(char, 0)
+        state = ((state + matches) | (state - matches)) & full
+        if needed and j & 7 == 7:
+            lcs = len1 - state.bit_count()
+            if lcs + (len2 - j - 1) < needed:
+                return 0.0
+
+    lcs = len1 - state.bit_count()
+    return 2 * lcs / total
+
 
 class AnswerValidator:
-    def __init__(self, similarity_threshold: float = 0.6):
+    def __init__(self, similarity_threshold: float = 0.6,
+                 max_history: int = 1000,
+                 history_file: Optional[str] = None):
         self.similarity_threshold = similarity_threshold
-        self.previous_answers: Dict[str, List[str]] = {}
-        
+        self.max_history = max_history
+        self.history_file = history_file
+        self.previous_answers: Dict[str, Deque[str]] = {}
+        self._indexes: Dict[str, MinHashLSHIndex] = {}
+        self._hasher = MinHasher()
+        if history_file:
+            self.load_history(history_file)
+
     def _calculate_similarity(self, str1: str, str2: str) -> float:
         """计算两个字符串的相似度，使用分词后的集合相似度"""
-        # 对中文文本进行分词
-        words1 = set(jieba.cut(str1))
-        words2 = set(jieba.cut(str2))
-        
-        # 计算词集合的交集和并集
-        intersection = words1 & words2
-        union = words1 | words2
-        
-        # 计算 Jaccard 相似度
-        jaccard = len(intersection) / len(union) if union else 0
-        
-        # 计算序列相似度
-        sequence = SequenceMatcher(None, str1, str2).ratio()
-        
-        # 综合两种相似度
+        return self._feature_similarity(extract_features(str1), extract_features(str2))
+
+    def _feature_similarity(self, features1: AnswerFeatures, features2: AnswerFeatures,
+                            threshold: float = 0.0) -> float:
+        """综合分词Jaccard相似度和序列相似度
+
+        threshold大于0时，只保证结果与threshold的大小关系正确，用于提前退出。
+        """
+        jaccard = _jaccard(features1.tokens, features2.tokens)
+        if threshold > 0 and jaccard >= threshold:
+            return jaccard
+        sequence = bounded_sequence_similarity(features1, features2, threshold)
         return max(jaccard, sequence)
-        
-    def check_answer_consistency(self, 
+
+    def _is_consistent(self, features: AnswerFeatures,
+                       previous: List[AnswerFeatures]) -> bool:
+        """文本答案与历史答案中任一足够相似即视为一致"""
+        # 先比较字符片段重合度最高的历史答案，便于尽早命中
+        candidates = sorted(
+            previous,
+            key=lambda prev: len(features.shingles & prev.shingles),
+            reverse=True
+        )
+        max_similarity = 0.0
+        for prev in candidates:
+            similarity = self._feature_similarity(features, prev, self.similarity_threshold)
+            max_similarity = max(max_similarity, similarity)
+            if max_similarity >= self.similarity_threshold:
+                break
+
+        logger.debug(f"答案相似度: {max_similarity}")
+        return max_similarity >= self.similarity_threshold
+
+    def check_answer_consistency(self,
                                question_type: str,
                                question: str,
                                answer: str,
@@ -35,44 +142,112 @@ class AnswerValidator:
         """检查答案一致性"""
         if not previous_answers:
             return True
-            
+
         # 对于选择题，检查选项是否一致
         if question_type in ['radio', 'checkbox']:
             return answer in previous_answers
-            
+
         # 对于文本题，检查相似度
-        max_similarity = max(
-            self._calculate_similarity(answer, prev)
-            for prev in previous_answers
+        return self._is_consistent(
+            extract_features(answer),
+            [extract_features(prev) for prev in previous_answers]
         )
-        
-        logger.debug(f"答案相似度: {max_similarity}")
-        return max_similarity >= self.similarity_threshold
-        
-    def validate_and_store_answer(self, 
+
+    @traced('validator.validate_and_store')
+    def validate_and_store_answer(self,
                                 question_type: str,
                                 question: str,
                                 answer: str) -> bool:
         """验证并存储答案"""
         if not answer:
             return False
-            
+
         question_key = f"{question_type}:{question}"
-        previous = self.previous_answers.get(question_key, [])
-        
+        previous = self.previous_answers.get(question_key, deque())
+        features = extract_features(answer) if question_type not in ['radio', 'checkbox'] else None
+
         # 如果是第一个答案，直接存储
         if not previous:
-            self.previous_answers[question_key] = [answer]
+            self._store(question_key, answer, features)
             return True
-            
+
         # 检查一致性
-        is_consistent = self.check_answer_consistency(
-            question_type, question, answer, previous
-        )
-        
+        if question_type in ['radio', 'checkbox']:
+            is_consistent = answer in previous
+        else:
+            is_consistent = self._is_consistent(
+                features, self._get_index(question_key, previous).query(features.shingles)
+            )
+
         if is_consistent:
-            self.previous_answers[question_key].append(answer)
+            self._store(question_key, answer, features)
             return True
-            
+
         logger.warning(f"答案不一致: {question}")
-        return False
\ No newline at end of file
+        return False
+
+    def _new_index(self) -> MinHashLSHIndex:
+        return MinHashLSHIndex(max_size=self.max_history, hasher=self._hasher)
+
+    def _get_index(self, question_key: str, previous: Deque[str]) -> MinHashLSHIndex:
+        """获取问题的相似度索引，历史被外部修改时重建"""
+        index = self._indexes.get(question_key)
+        if index is None or len(index) != len(previous):
+            index = self._new_index()
+            for prev in previous:
+                features = extract_features(prev)
+                index.add(features, features.shingles)
+            self._indexes[question_key] = index
+        return index
+
+    def _store(self, question_key: str, answer: str, features) -> None:
+        if question_key not in self.previous_answers:
+            self.previous_answers[question_key] = deque(maxlen=self.max_history)
+        self.previous_answers[question_key].append(answer)
+        if features is not None:
+            if question_key not in self._indexes:
+                self._indexes[question_key] = self._new_index()
+            self._indexes[question_key].add(features, features.shingles)
+
+    def save_history(self, history_file: Optional[str] = None) -> None:
+        """保存答案历史及相似度索引"""
+        history_file = history_file or self.history_file
+        if not history_file:
+            return
+        data = {
+            'version': 1,
+            'answers': {key: list(answers) for key, answers in self.previous_answers.items()},
+            'indexes': {
+                key: index.to_dict(lambda f: {'text': f.text, 'tokens': sorted(f.tokens)})
+                for key, index in self._indexes.items()
+            }
+        }
+        try:
+            history_dir = os.path.dirname(history_file)
+            if history_dir:
+                os.makedirs(history_dir, exist_ok=True)
+            with open(history_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+        except Exception as e:
+            logger.error(f"保存答案历史失败: {e}")
+
+    def load_history(self, history_file: str) -> None:
+        """加载答案历史，直接使用保存的分词结果和签名，无需重新分词"""
+        if not os.path.exists(history_file):
+            return
+        try:
+            with open(history_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+
+            def decode(entry):
+                features = _build_features(entry['text'], entry['tokens'])
+                return features, features.shingles
+
+            for key, answers in data.get('answers', {}).items():
+                self.previous_answers[key] = deque(answers, maxlen=self.max_history)
+            for key, index_data in data.get('indexes', {}).items():
+                self._indexes[key] = MinHashLSHIndex.from_dict(
+                    index_data, decode, max_size=self.max_history
+                )
+        except Exception as e:
+            logger.error(f"加载答案历史失败: {e}")
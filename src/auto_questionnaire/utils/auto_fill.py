@@ -2,11 +2,14 @@ from typing import List, Tuple, Optional, Dict
 from datetime import datetime, timedelta
 import json
 import os
+import time
 from loguru import logger
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
 
 from ..ai.groq_handler import GroqHandler
+from ..ai.prompt_builder import PromptBuilder
 from ..parser.element_finder import QuestionElement
+from .tracing import bind_context, span, traced
 
 
 class AutoFiller:
@@ -14,7 +17,8 @@ class AutoFiller:
                  cache_ttl: Optional[timedelta] = None, 
                  monitor: Optional['PerformanceMonitor'] = None,
                  max_retries: int = 3,
-                 max_workers: int = 3):
+                 max_workers: int = 3,
+                 prompt_builder: Optional[PromptBuilder] = None):
         self.ai_handler = groq_handler
         self.cache_file = cache_file
         self.cache_ttl = cache_ttl or timedelta(hours=24)
@@ -23,6 +27,7 @@ class AutoFiller:
         self.cache = self._load_cache() if cache_file else {}
         self.max_retries = max_retries
         self.max_workers = max_workers
+        self.prompt_builder = prompt_builder
         
     def _save_cache(self):
         if not self.cache_file:
@@ -43,7 +48,13 @@ class AutoFiller:
         options_str = ','.join(options) if options else ''
         return f"{question_element.question_type}:{question_element.text}:{options_str}"
         
-    def generate_answer(self, question_element) -> Tuple[str, bool]:
+    @traced('answer.generate')
+    def generate_answer(self, question_element, feedback: Optional[str] = None) -> Tuple[str, bool]:
+        """生成答案
+        Args:
+            question_element: 问题元素
+            feedback: 重新生成时对上一次答案的反馈，设置后跳过缓存并随上下文一并发送
+        """
         try:
             # 1. 验证问题类型
             if question_element.question_type not in self.valid_question_types:
@@ -66,19 +77,24 @@ class AutoFiller:
                     
             # 4. 检查缓存
             cache_key = self._generate_cache_key(question_element)
-            if cache_key in self.cache:
-                cache_entry = self.cache[cache_key]
-                if not self._is_cache_expired(cache_entry):
-                    if self.monitor:
-                        self.monitor.record_cache_access(True)
-                    return cache_entry['answer'], True
+            with span('cache.lookup') as lookup:
+                cache_entry = self.cache.get(cache_key) if feedback is None else None
+                hit = cache_entry is not None and not self._is_cache_expired(cache_entry)
+                lookup.set_attribute('hit', hit)
+            if hit:
+                if self.monitor:
+                    self.monitor.record_cache_access(True)
+                return cache_entry['answer'], True
                     
             # 5. 生成答案
+            context = self._build_context(question_element, feedback)
+            started = time.perf_counter()
             try:
                 answer = self.ai_handler.generate_response(
                     question_element.text,
-                    context=None
+                    context=context
                 )
+                elapsed = time.perf_counter() - started
                 
                 # 6. 验证答案
                 if not answer or not answer.strip():
@@ -99,16 +115,13 @@ class AutoFiller:
                         return "", False
                     answer = ','.join(selected)
                     
-                # 9. 更新缓存
+                # 9. 更新缓存（重新生成的答案由质量闸门决定是否保留，不在此写入）
                 if answer:
-                    self.cache[cache_key] = {
-                        'answer': answer,
-                        'timestamp': datetime.now().isoformat()
-                    }
-                    self._save_cache()
+                    if feedback is None:
+                        self.cache_answer(question_element, answer)
                     if self.monitor:
                         self.monitor.record_cache_access(False)
-                        self.monitor.record_api_call(0.1, True)
+                        self.monitor.record_api_call(elapsed, True)
                         
                 return answer, False
                 
@@ -116,7 +129,7 @@ class AutoFiller:
                 logger.error(f"API调用失败: {str(e)}")
                 if self.monitor:
                     self.monitor.record_error(str(e))
-                    self.monitor.record_api_call(0.1, False)
+                    self.monitor.record_api_call(time.perf_counter() - started, False)
                 return "", False
                 
         except Exception as e:
@@ -125,6 +138,31 @@ class AutoFiller:
                 self.monitor.record_error(str(e))
             return "", False
             
+    def cache_answer(self, question_element, answer: str):
+        """写入答案缓存并保存到文件"""
+        self.cache[self._generate_cache_key(question_element)] = {
+            'answer': answer,
+            'timestamp': datetime.now().isoformat()
+        }
+        with span('cache.save'):
+            self._save_cache()
+            
+    @traced('answer.build_context')
+    def _build_context(self, question_element, feedback: Optional[str] = None) -> Optional[str]:
+        """检索与问题相关的人设事实作为上下文"""
+        parts = []
+        if self.prompt_builder:
+            parts.append(self.prompt_builder.build_context(question_element.text))
+        if feedback:
+            parts.append(f"上一次的答案需要改进：{feedback}")
+        return '\n'.join(part for part in parts if part) or None
+        
+    def learn_answer(self, question_element, answer: str):
+        """把通过验证的答案记入人设上下文；未经验证的答案不应作为事实被后续提示引用"""
+        store = self.prompt_builder.context_store if self.prompt_builder else None
+        if store is not None:
+            store.learn_from_answer(question_element.text, answer)
+            
     def _is_cache_expired(self, cache_entry: dict) -> bool:
         if 'timestamp' not in cache_entry:
             return True
@@ -149,11 +187,12 @@ class AutoFiller:
         """批量生成答案"""
         with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
             futures = [
-                executor.submit(self.generate_answer_with_retry, q) 
+                executor.submit(bind_context(self.generate_answer_with_retry), q) 
                 for q in questions
             ]
+            # 按提交顺序收集结果，保证答案与问题一一对应
             results = []
-            for future in as_completed(futures):
+            for future in futures:
                 try:
                     result = future.result()
                     results.append(result)
@@ -0,0 +1,129 @@
+import math
+import threading
+from typing import Dict, Iterable, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_PERCENTILES = (50, 95, 99)
+
+
+class LatencyHistogram:
+    """可合并的流式延迟直方图（对数分桶，类似HDR直方图）
+
+    桶边界按 gamma = (1 + a) / (1 - a) 的等比数列划分，任意分位数的相对误差不超过a；
+    内存只与取值范围有关，与样本数量无关。参数相同的直方图可以直接相加合并。
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01,
+                 min_value: float = 1e-6, max_value: float = 3600.0):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy 必须在 (0, 1) 之间")
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.max_value = max_value
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._bucket_count = int(math.ceil(math.log(max_value / min_value) / self._log_gamma)) + 1
+        self._counts = np.zeros(self._bucket_count, dtype=np.int64)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def _bucket(self, value: float) -> int:
+        if value <= self.min_value:
+            return 0
+        index = int(math.ceil(math.log(value / self.min_value) / self._log_gamma))
+        return min(index, self._bucket_count - 1)
+
+    def _bucket_value(self, index: np.ndarray) -> np.ndarray:
+        """桶的代表值，取上下边界的调和中点使相对误差对称"""
+        upper = self.min_value * self._gamma ** index
+        return np.where(index == 0, self.min_value, 2 * upper / (1 + self._gamma))
+
+    def record(self, value: float) -> None:
+        value = max(0.0, float(value))
+        index = self._bucket(value)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.total += value
+            if value < self.min:
+                self.min = value
+            if value > self.max:
+                self.max = value
+
+    def record_many(self, values: Iterable[float]) -> None:
+        values = np.maximum(np.asarray(list(values), dtype=np.float64), 0.0)
+        if not values.size:
+            return
+        ratio = np.maximum(values / self.min_value, 1.0)
+        indexes = np.minimum(np.ceil(np.log(ratio) / self._log_gamma).astype(np.int64),
+                             self._bucket_count - 1)
+        with self._lock:
+            self._counts += np.bincount(indexes, minlength=self._bucket_count)
+            self.count += int(values.size)
+            self.total += float(values.sum())
+            self.min = min(self.min, float(values.min()))
+            self.max = max(self.max, float(values.max()))
+
+    def _compatible(self, other: 'LatencyHistogram') -> bool:
+        return (self.relative_accuracy == other.relative_accuracy
+                and self.min_value == other.min_value
+                and self.max_value == other.max_value)
+
+    def merge(self, other: 'LatencyHistogram') -> 'LatencyHistogram':
+        """把另一个直方图的计数合并进来（例如多个进程或时间窗口）"""
+        if not self._compatible(other):
+            raise ValueError("直方图参数不一致，无法合并")
+        with other._lock:
+            counts = other._counts.copy()
+            count, total, low, high = other.count, other.total, other.min, other.max
+        with self._lock:
+            self._counts += counts
+            self.count += count
+            self.total += total
+            self.min = min(self.min, low)
+            self.max = max(self.max, high)
+        return self
+
+    def quantiles(self, qs: Sequence[float]) -> np.ndarray:
+        """计算多个分位数（q取值 0~1）"""
+        with self._lock:
+            if not self.count:
+                return np.zeros(len(qs), dtype=np.float64)
+            cumulative = np.cumsum(self._counts)
+            low, high = self.min, self.max
+        ranks = np.clip(np.asarray(qs, dtype=np.float64), 0.0, 1.0) * (cumulative[-1] - 1)
+        indexes = np.searchsorted(cumulative, ranks, side='right')
+        return np.clip(self._bucket_value(indexes), low, high)
+
+    def cumulative_counts(self, bounds: Sequence[float]) -> Tuple[np.ndarray, int, float]:
+        """各上界（le）以内的累计样本数，用于导出Prometheus直方图
+        Returns:
+            (累计计数, 总数, 总和)
+        """
+        with self._lock:
+            counts = self._counts.copy()
+            count, total = self.count, self.total
+        upper = self.min_value * self._gamma ** np.arange(self._bucket_count)
+        cumulative = np.cumsum(counts)
+        indexes = np.searchsorted(upper, np.asarray(bounds, dtype=np.float64), side='right') - 1
+        return np.where(indexes >= 0, cumulative[np.maximum(indexes, 0)], 0), count, total
+
+    def quantile(self, q: float) -> float:
+        return float(self.quantiles([q])[0])
+
+    def summary(self, percentiles: Sequence[int] = DEFAULT_PERCENTILES) -> Dict[str, float]:
+        """count/mean/max 以及 p50、p95、p99 等分位数"""
+        values = self.quantiles([p / 100 for p in percentiles])
+        with self._lock:
+            count, total, high = self.count, self.total, self.max
+        summary = {
+            'count': count,
+            'mean': total / count if count else 0.0,
+            'max': high
+        }
+        summary.update({f"p{p}": float(value) for p, value in zip(percentiles, values)})
+        return summary
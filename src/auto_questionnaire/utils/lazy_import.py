@@ -0,0 +1,41 @@
+import importlib
+import sys
+import threading
+from types import ModuleType
+from typing import Optional, Union
+
+
+class LazyModule:
+    """模块代理，第一次访问属性时才真正导入模块
+
+    用于cv2、pytesseract、PIL等导入耗时较长的依赖：只从缓存取答案的运行不会加载它们。
+    属性每次都从真实模块读取，因此 patch('pytesseract.image_to_data') 之类的替换同样生效。
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module: Optional[ModuleType] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> ModuleType:
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<LazyModule '{self._name}' ({state})>"
+
+
+def lazy_import(name: str) -> Union[ModuleType, LazyModule]:
+    """返回模块的延迟代理；模块已导入时直接返回模块本身"""
+    module = sys.modules.get(name)
+    return module if module is not None else LazyModule(name)
@@ -1,14 +1,89 @@
 import json
 import sys
+import threading
+import time
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from loguru import logger
 
 
+class LogRateLimiter:
+    """按消息键限流：每个键在interval秒内最多输出burst条，其余丢弃并计数
+
+    键默认为调用位置（模块:行号）和级别，也可以通过 logger.bind(log_key=...) 指定；
+    窗口结束后输出的第一条日志附带期间省略的条数。
+    """
+
+    def __init__(self, interval: float = 10.0, burst: int = 5, levels: Tuple[str, ...] = ("WARNING",)):
+        self.interval = interval
+        self.burst = burst
+        self.levels = set(levels)
+        self._windows: Dict[Any, List] = {}  # 键 -> [窗口开始时间, 已输出条数, 已省略条数]
+        self._lock = threading.Lock()
+        self.suppressed = 0
+
+    def __call__(self, record: Dict) -> None:
+        """作为loguru的patcher使用，每条日志只判断一次；被限流的日志标记为丢弃"""
+        if record["level"].name not in self.levels:
+            return
+        key = record["extra"].get("log_key") or (record["name"], record["line"], record["level"].name)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                skipped = window[2] if window else 0
+                self._windows[key] = [now, 1, 0]
+                if skipped:
+                    record["message"] += f"（期间省略 {skipped} 条相同日志）"
+                return
+            if window[1] < self.burst:
+                window[1] += 1
+                return
+            window[2] += 1
+            self.suppressed += 1
+        record["extra"]["_suppressed"] = True
+
+
+def _json_format(record: Dict) -> str:
+    """JSON Lines格式，每条日志一行，便于机器解析"""
+    entry = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "name": record["name"],
+        "function": record["function"],
+        "line": record["line"],
+        "message": record["message"],
+    }
+    extra = {key: value for key, value in record["extra"].items() if not key.startswith("_")}
+    if extra:
+        entry["extra"] = extra
+    if record["exception"] is not None:
+        entry["exception"] = str(record["exception"].value)
+    record["extra"]["_json"] = json.dumps(entry, ensure_ascii=False, default=str)
+    return "{extra[_json]}\n"
+
+
+def _not_suppressed(extra_filter: Optional[Callable] = None) -> Callable:
+    if extra_filter is None:
+        return lambda record: "_suppressed" not in record["extra"]
+    return lambda record: "_suppressed" not in record["extra"] and extra_filter(record)
+
+
 class LogConfig:
+    """日志配置
+
+    每条被任一处理器接受的日志都要在调用线程中构造记录并逐个处理器格式化，这部分开销远大于
+    带缓冲的文件写入。因此热路径上的优化是少产生日志：重复警告按消息键限流（rate_limit），
+    api.log 只接收 api_level 及以上的日志，没有处理器接受DEBUG时 logger.debug 几乎没有开销。
+    enqueue 为 true 时由loguru的后台线程写入，适合网络盘等写入较慢的场景；它经过进程间队列，
+    本地磁盘上调用方的开销反而更高，所以默认关闭。json 为 true 时文件日志使用JSON Lines格式。
+    """
+
     def __init__(self, config_file: str = "config/logging_config.json"):
         self.config = self._load_config(config_file)
+        self.rate_limiter: Optional[LogRateLimiter] = None
+        self._handler_ids: List[int] = []
         self._setup_logger()
         
     def _load_config(self, config_file: str) -> Dict[str, Any]:
@@ -27,6 +102,16 @@ class LogConfig:
                 "WARNING": {"color": "<yellow>"},
                 "ERROR": {"color": "<red>"},
                 "CRITICAL": {"color": "<RED>"}
+            },
+            "console": True,
+            "enqueue": False,
+            "api_level": "INFO",
+            "json": False,
+            "rate_limit": {
+                "enabled": True,
+                "interval": 10.0,
+                "burst": 5,
+                "levels": ["WARNING"]
             }
         }
         
@@ -44,48 +129,62 @@ class LogConfig:
         # 移除默认处理器
         logger.remove()
         
+        # 重复日志限流：patcher对每条日志只执行一次，各处理器的filter据此丢弃
+        rate_limit = self.config.get("rate_limit") or {}
+        if rate_limit.get("enabled"):
+            self.rate_limiter = LogRateLimiter(
+                interval=rate_limit.get("interval", 10.0),
+                burst=rate_limit.get("burst", 5),
+                levels=tuple(rate_limit.get("levels", ["WARNING"]))
+            )
+        logger.configure(patcher=self.rate_limiter)
+        
         # 添加控制台处理器
-        logger.add(
-            sys.stdout,
-            format=self.config["format"],
-            level="INFO",
-            colorize=True
-        )
+        if self.config.get("console", True):
+            self._handler_ids.append(logger.add(
+                sys.stdout,
+                format=self.config["format"],
+                level="INFO",
+                colorize=True,
+                filter=_not_suppressed(),
+                enqueue=self.config["enqueue"]
+            ))
         
         # 添加文件处理器
         log_path = Path(self.config["log_path"])
         log_path.mkdir(parents=True, exist_ok=True)
+        file_format = _json_format if self.config["json"] else self.config["format"]
         
-        # 普通日志
-        logger.add(
-            log_path / "app.log",
-            rotation=self.config["rotation"],
-            retention=self.config["retention"],
-            format=self.config["format"],
-            level="INFO",
-            encoding="utf-8"
-        )
+        def add_file(filename: str, level: str, extra_filter: Optional[Callable] = None) -> None:
+            self._handler_ids.append(logger.add(
+                log_path / filename,
+                rotation=self.config["rotation"],
+                retention=self.config["retention"],
+                format=file_format,
+                level=level,
+                filter=_not_suppressed(extra_filter),
+                enqueue=self.config["enqueue"],
+                encoding="utf-8"
+            ))
         
+        # 普通日志
+        add_file("app.log", level="INFO")
         # 错误日志
-        logger.add(
-            log_path / "error.log",
-            rotation=self.config["rotation"],
-            retention=self.config["retention"],
-            format=self.config["format"],
-            level="ERROR",
-            encoding="utf-8"
-        )
-        
+        add_file("error.log", level="ERROR")
         # API调用日志
-        logger.add(
-            log_path / "api.log",
-            rotation=self.config["rotation"],
-            retention=self.config["retention"],
-            format=self.config["format"],
-            filter=lambda record: "api" in record["extra"],
-            encoding="utf-8"
-        )
+        add_file("api.log", level=self.config["api_level"], extra_filter=lambda record: "api" in record["extra"])
         
     def get_logger(self, name: str = None):
         """获取带上下文的logger"""
-        return logger.bind(context=name) 
\ No newline at end of file
+        return logger.bind(context=name)
+
+    def close(self) -> None:
+        """等待队列中的日志写完并移除本配置添加的处理器"""
+        logger.complete()
+        for handler_id in self._handler_ids:
+            try:
+                logger.remove(handler_id)
+            except ValueError:
+                pass
+        self._handler_ids = []
+        logger.configure(patcher=None)
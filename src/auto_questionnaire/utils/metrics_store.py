@@ -0,0 +1,195 @@
+import itertools
+import os
+import shutil
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+
+TIMESTAMP = 'timestamp'
+SECONDS_PER_DAY = 86400
+
+
+def _partition_name(day: int) -> str:
+    date = datetime(1970, 1, 1, tzinfo=timezone.utc) + timedelta(days=day)
+    return f"date={date.strftime('%Y-%m-%d')}"
+
+
+def _partition_day(name: str) -> Optional[int]:
+    """分区目录名 date=YYYY-MM-DD 对应的UTC天序号，格式不符时返回None"""
+    try:
+        date = datetime.strptime(name[len('date='):], '%Y-%m-%d').replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+    return int(date.timestamp()) // SECONDS_PER_DAY
+
+
+def _chunk_range(name: str) -> Optional[Tuple[float, float]]:
+    """数据块目录名 part-<起始微秒>-<结束微秒>-... 中的时间范围"""
+    parts = name.split('-')
+    if len(parts) < 3 or parts[0] != 'part':
+        return None
+    try:
+        return int(parts[1]) / 1e6, int(parts[2]) / 1e6
+    except ValueError:
+        return None
+
+
+class MetricsStore:
+    """按日期分区、只追加的列式指标存储
+
+    目录结构为 root/<指标>/date=YYYY-MM-DD/part-<起始微秒>-<结束微秒>-<序号>/<列>.npy，
+    日期按UTC划分，块内按时间戳排序。数据块先写入临时目录再整体改名，读取方不会看到写了一半的块。
+    查询时先按分区日期和块名中的时间范围跳过无关的块，再用内存映射读取时间戳列二分定位，
+    只把时间范围内、所需列的数据读入内存。
+    每次flush写入一个块，当天的分区会积累很多小块；compact() 把已结束的分区合并为一个块。
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._sequence = itertools.count()
+        os.makedirs(root, exist_ok=True)
+
+    def metrics(self) -> List[str]:
+        return sorted(name for name in os.listdir(self.root)
+                      if os.path.isdir(os.path.join(self.root, name)))
+
+    def append(self, metric: str, columns: Dict[str, np.ndarray]) -> int:
+        """追加一批记录，跨天的数据拆分写入各自的分区；返回写入条数"""
+        if TIMESTAMP not in columns:
+            raise ValueError(f"缺少 {TIMESTAMP} 列")
+        columns = {name: np.asarray(values) for name, values in columns.items()}
+        timestamps = columns[TIMESTAMP]
+        if not timestamps.size:
+            return 0
+
+        order = np.argsort(timestamps, kind='stable')
+        columns = {name: values[order] for name, values in columns.items()}
+        days = (columns[TIMESTAMP] // SECONDS_PER_DAY).astype(np.int64)
+        boundaries = np.flatnonzero(np.diff(days)) + 1
+        for start, end in zip(np.r_[0, boundaries], np.r_[boundaries, days.size]):
+            self._write_chunk(metric, int(days[start]),
+                              {name: values[start:end] for name, values in columns.items()})
+        return int(timestamps.size)
+
+    def _write_chunk(self, metric: str, day: int, columns: Dict[str, np.ndarray]) -> None:
+        self._write_chunk_to(os.path.join(self.root, metric, _partition_name(day)), columns)
+
+    def _write_chunk_to(self, partition: str, columns: Dict[str, np.ndarray]) -> str:
+        os.makedirs(partition, exist_ok=True)
+        timestamps = columns[TIMESTAMP]
+        name = (f"part-{int(timestamps[0] * 1e6)}-{int(np.ceil(timestamps[-1] * 1e6))}"
+                f"-{os.getpid()}-{next(self._sequence)}")
+        tmp_path = os.path.join(partition, f".{name}.tmp")
+        os.makedirs(tmp_path)
+        try:
+            for column, values in columns.items():
+                np.save(os.path.join(tmp_path, f"{column}.npy"), values, allow_pickle=False)
+            os.rename(tmp_path, os.path.join(partition, name))
+        except Exception:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+        return name
+
+    def compact(self, metric: Optional[str] = None, grace: float = 3600.0,
+                now: Optional[float] = None) -> int:
+        """把已结束的日期分区中的多个数据块合并为一个，返回被合并掉的块数
+
+        只处理结束时间早于 now - grace 的分区，grace 应大于flush间隔，避免与写入冲突。
+        合并结果写入临时分区目录后与原分区整体交换；交换期间原分区中新写入的块会移入新分区。
+        """
+        now = time.time() if now is None else now
+        last_day = int((now - grace) // SECONDS_PER_DAY) - 1
+        merged = 0
+        for name in ([metric] if metric else self.metrics()):
+            metric_dir = os.path.join(self.root, name)
+            if not os.path.isdir(metric_dir):
+                continue
+            for partition in sorted(os.listdir(metric_dir)):
+                day = _partition_day(partition)
+                if day is None or day > last_day:
+                    continue
+                try:
+                    merged += self._compact_partition(metric_dir, partition)
+                except Exception as e:
+                    logger.error(f"合并指标分区失败 {name}/{partition}: {e}")
+        return merged
+
+    def _compact_partition(self, metric_dir: str, partition: str) -> int:
+        partition_dir = os.path.join(metric_dir, partition)
+        chunks = sorted(name for name in os.listdir(partition_dir) if _chunk_range(name) is not None)
+        if len(chunks) < 2:
+            return 0
+
+        loaded = []
+        for chunk in chunks:
+            chunk_dir = os.path.join(partition_dir, chunk)
+            loaded.append({name[:-len('.npy')]: np.load(os.path.join(chunk_dir, name))
+                           for name in os.listdir(chunk_dir) if name.endswith('.npy')})
+        columns = {name: np.concatenate([chunk[name] for chunk in loaded]) for name in loaded[0]}
+        order = np.argsort(columns[TIMESTAMP], kind='stable')
+        columns = {name: values[order] for name, values in columns.items()}
+
+        new_dir = os.path.join(metric_dir, f".{partition}.compact")
+        old_dir = os.path.join(metric_dir, f".{partition}.old")
+        shutil.rmtree(new_dir, ignore_errors=True)
+        self._write_chunk_to(new_dir, columns)
+        os.rename(partition_dir, old_dir)
+        os.rename(new_dir, partition_dir)
+        # 交换前后写入原分区的块不在合并结果中，移入新分区
+        merged = set(chunks)
+        for name in os.listdir(old_dir):
+            if name not in merged and _chunk_range(name) is not None:
+                os.rename(os.path.join(old_dir, name), os.path.join(partition_dir, name))
+        shutil.rmtree(old_dir, ignore_errors=True)
+        logger.info(f"已合并指标分区 {partition_dir}: {len(chunks)} 个块")
+        return len(chunks)
+
+    def _chunks(self, metric: str, start: Optional[float], end: Optional[float]) -> Iterator[str]:
+        """按时间顺序列出与[start, end)有交集的数据块"""
+        metric_dir = os.path.join(self.root, metric)
+        if not os.path.isdir(metric_dir):
+            return
+        first_day = None if start is None else int(start // SECONDS_PER_DAY)
+        last_day = None if end is None else int(end // SECONDS_PER_DAY)
+        for partition in sorted(os.listdir(metric_dir)):
+            day = _partition_day(partition)
+            if day is None or (first_day is not None and day < first_day) \
+                    or (last_day is not None and day > last_day):
+                continue
+            partition_dir = os.path.join(metric_dir, partition)
+            chunks = [(chunk_range, name) for name in os.listdir(partition_dir)
+                      if (chunk_range := _chunk_range(name)) is not None]
+            for (chunk_start, chunk_end), name in sorted(chunks):
+                if (start is not None and chunk_end < start) or (end is not None and chunk_start >= end):
+                    continue
+                yield os.path.join(partition_dir, name)
+
+    def iter_chunks(self, metric: str, start: Optional[float] = None, end: Optional[float] = None,
+                    columns: Optional[Sequence[str]] = None) -> Iterator[Dict[str, np.ndarray]]:
+        """逐块读取时间范围[start, end)内的记录，内存占用只与单个块的大小有关"""
+        for chunk in self._chunks(metric, start, end):
+            try:
+                timestamps = np.load(os.path.join(chunk, f"{TIMESTAMP}.npy"), mmap_mode='r')
+                first = 0 if start is None else int(np.searchsorted(timestamps, start, side='left'))
+                last = timestamps.size if end is None else int(np.searchsorted(timestamps, end, side='left'))
+                if first >= last:
+                    continue
+                names = columns or [name[:-len('.npy')] for name in sorted(os.listdir(chunk))
+                                    if name.endswith('.npy')]
+                yield {
+                    name: np.array(np.load(os.path.join(chunk, f"{name}.npy"), mmap_mode='r')[first:last])
+                    for name in dict.fromkeys([TIMESTAMP, *names])
+                }
+            except Exception as e:
+                logger.error(f"读取指标数据块失败 {chunk}: {e}")
+
+    def query(self, metric: str, start: Optional[float] = None, end: Optional[float] = None,
+              columns: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        """读取时间范围[start, end)内的记录（epoch秒），没有数据时返回空字典"""
+        chunks = list(self.iter_chunks(metric, start, end, columns))
+        if not chunks:
+            return {}
+        return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]}
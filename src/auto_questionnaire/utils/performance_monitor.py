@@ -1,57 +1,479 @@
-from datetime import datetime
-from collections import defaultdict
+import json
+import math
+import os
 import threading
-from typing import Dict
+import time
+import weakref
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+
+from .latency_histogram import LatencyHistogram
+from .metrics_store import MetricsStore
+
+
+class RingBuffer:
+    """定长环形缓冲区，按列存储数值型指标
+
+    写满后覆盖最旧的记录，内存占用固定；每个缓冲区有自己的锁，
+    不同指标的写入互不阻塞。第一列为时间戳，写入时顺带把summed_fields
+    累加到按时间分桶的窗口汇总中，查询窗口统计无需扫描明细。
+    """
+
+    def __init__(self, capacity: int, fields: Dict[str, str],
+                 summed_fields: Sequence[str] = (),
+                 bucket_seconds: float = 10.0, bucket_count: int = 60):
+        if capacity <= 0:
+            raise ValueError("capacity 必须大于0")
+        self.capacity = capacity
+        self.fields = list(fields)
+        self.summed_fields = list(summed_fields)
+        self.bucket_seconds = bucket_seconds
+        self.bucket_count = bucket_count
+        self._columns = [np.zeros(capacity, dtype=dtype) for dtype in fields.values()]
+        self._sum_indexes = [self.fields.index(name) for name in summed_fields]
+        self._bucket_ids = [-1] * bucket_count
+        self._bucket_counts = [0] * bucket_count
+        self._bucket_sums = [[0.0] * len(summed_fields) for _ in range(bucket_count)]
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def append(self, *values) -> None:
+        bucket_id = int(values[0] // self.bucket_seconds)
+        slot = bucket_id % self.bucket_count
+        with self._lock:
+            index = self._total % self.capacity
+            for column, value in zip(self._columns, values):
+                column[index] = value
+            self._total += 1
+
+            sums = self._bucket_sums[slot]
+            if self._bucket_ids[slot] != bucket_id:
+                self._bucket_ids[slot] = bucket_id
+                self._bucket_counts[slot] = 0
+                sums[:] = [0.0] * len(sums)
+            self._bucket_counts[slot] += 1
+            for j, i in enumerate(self._sum_indexes):
+                sums[j] += values[i]
+
+    @property
+    def total(self) -> int:
+        """累计写入条数（包括已被覆盖的记录），可作为增量读取的游标"""
+        return self._total
+
+    def __len__(self) -> int:
+        return min(self._total, self.capacity)
+
+    def since(self, cursor: int) -> Tuple[Dict[str, np.ndarray], int, int]:
+        """读取游标之后写入的记录
+        Returns:
+            (按写入顺序排列的新记录, 新游标, 已被覆盖而读不到的记录数)
+        """
+        with self._lock:
+            total = self._total
+            oldest = max(0, total - self.capacity)
+            start = min(max(cursor, oldest), total)
+            first, count = start % self.capacity, total - start
+            if first + count <= self.capacity:
+                data = [column[first:first + count].copy() for column in self._columns]
+            else:
+                wrapped = first + count - self.capacity
+                data = [np.concatenate((column[first:], column[:wrapped])) for column in self._columns]
+        return dict(zip(self.fields, data)), total, max(0, oldest - cursor)
+
+    def snapshot(self) -> Dict[str, np.ndarray]:
+        """按写入顺序（从旧到新）复制当前保留的记录"""
+        return self.since(0)[0]
+
+    @property
+    def max_window(self) -> float:
+        """分桶能覆盖的最长时间窗口（秒）"""
+        return self.bucket_seconds * self.bucket_count
+
+    def window(self, seconds: float, now: Optional[float] = None) -> Tuple[int, Dict[str, float]]:
+        """最近seconds秒内（按分桶粒度）的记录数和各累加字段之和；超过max_window时抛出ValueError"""
+        if seconds > self.max_window:
+            raise ValueError(f"窗口 {seconds} 秒超过分桶覆盖的最长时间 {self.max_window} 秒")
+        now = time.time() if now is None else now
+        current = int(now // self.bucket_seconds)
+        first = current - max(1, math.ceil(seconds / self.bucket_seconds)) + 1
+        count = 0
+        sums = [0.0] * len(self.summed_fields)
+        with self._lock:
+            for bucket_id, bucket_count, bucket_sums in zip(
+                    self._bucket_ids, self._bucket_counts, self._bucket_sums):
+                if first <= bucket_id <= current:
+                    count += bucket_count
+                    for j, value in enumerate(bucket_sums):
+                        sums[j] += value
+        return count, dict(zip(self.summed_fields, sums))
+
+
+class _ShardOwner:
+    """存放在线程局部变量中，线程结束时被回收，触发分片的合并"""
+    __slots__ = ('__weakref__',)
+
+
+class ThreadLocalCounters:
+    """按线程分片的计数器，写入无锁，读取时汇总各线程的计数
+
+    线程结束后其分片合并进基础计数并移除，分片数只与存活的线程数有关，
+    频繁新建线程池也不会使内存和汇总开销持续增长。
+    """
 
-class PerformanceMonitor:
     def __init__(self):
-        self._metrics = defaultdict(list)
-        self._error_count = 0
-        self._api_call_count = 0
-        self._metrics_lock = threading.RLock()  # 使用可重入锁
-        
+        self._local = threading.local()
+        self._shards: Dict[int, Dict[str, int]] = {}
+        self._base: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _shard(self) -> Dict[str, int]:
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = {}
+            owner = _ShardOwner()
+            self._local.shard = shard
+            self._local.owner = owner
+            with self._lock:
+                self._shards[id(shard)] = shard
+            weakref.finalize(owner, self._retire, shard)
+        return shard
+
+    def _retire(self, shard: Dict[str, int]) -> None:
+        """线程结束后把其分片合并进基础计数"""
+        with self._lock:
+            if self._shards.pop(id(shard), None) is None:
+                return
+            for key, value in shard.items():
+                self._base[key] = self._base.get(key, 0) + value
+
+    def add(self, key: str, amount: int = 1) -> None:
+        shard = self._shard()
+        shard[key] = shard.get(key, 0) + amount
+
+    def get(self, key: str) -> int:
+        with self._lock:
+            return self._base.get(key, 0) + sum(shard.get(key, 0) for shard in self._shards.values())
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            totals = dict(self._base)
+            for shard in self._shards.values():
+                for key, value in list(shard.items()):
+                    totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def shard_count(self) -> int:
+        with self._lock:
+            return len(self._shards)
+
+
+@dataclass
+class MetricsCursor:
+    """增量读取的位置：各指标已读到的写入序号和计数器取值"""
+    positions: Dict[str, int] = field(default_factory=dict)
+    counters: Dict[str, int] = field(default_factory=dict)
+
+
+@dataclass
+class MetricsDelta:
+    cursor: MetricsCursor
+    events: Dict[str, Dict[str, np.ndarray]]
+    counters: Dict[str, int]
+    dropped: Dict[str, int]
+
+
+class PerformanceMonitor:
+    """性能监控
+
+    各类指标存放在固定容量的环形缓冲区中（浮点时间戳 + 数值列），
+    错误信息以编号存储；计数器按线程分片，读取时汇总。
+    各阶段耗时（api、ocr、page等）另外写入流式直方图，用于计算分位数。
+    定期轮询应使用 get_delta（按游标增量读取）或 get_window_summary（预聚合窗口），
+    get_statistics 会复制全部保留的记录。
+    长期保存使用 start_flusher，定期把新增记录追加到按日期分区的列式存储中。
+    """
+
+    # 不同错误信息的最大数量，超出后统一记为"其他错误"
+    MAX_ERROR_MESSAGES = 1024
+    OTHER_ERROR = "其他错误"
+
+    def __init__(self, capacity: int = 10000, bucket_seconds: float = 10.0, bucket_count: int = 60):
+        self.capacity = capacity
+
+        def buffer(fields: Dict[str, str], summed_fields: Sequence[str] = ()) -> RingBuffer:
+            return RingBuffer(capacity, fields, summed_fields,
+                              bucket_seconds=bucket_seconds, bucket_count=bucket_count)
+
+        self._buffers = {
+            'api_calls': buffer({'timestamp': 'f8', 'elapsed': 'f8', 'success': '?'}, ('elapsed', 'success')),
+            'errors': buffer({'timestamp': 'f8', 'code': 'i4'}),
+            'cache_hits': buffer({'timestamp': 'f8', 'hit': '?'}, ('hit',)),
+            'answer_quality': buffer({'timestamp': 'f8', 'score': 'f8'}, ('score',)),
+            'regenerations': buffer({'timestamp': 'f8', 'elapsed': 'f8', 'success': '?'}, ('elapsed', 'success')),
+        }
+        self._counters = ThreadLocalCounters()
+        self._error_codes: Dict[str, int] = {}
+        self._error_messages: List[str] = []
+        self._error_codes_lock = threading.Lock()
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._histograms_lock = threading.Lock()
+        self._listeners: Tuple[Callable, ...] = ()
+        self._listeners_lock = threading.Lock()
+        self._flush_cursor: Optional[MetricsCursor] = None
+        self._flush_lock = threading.Lock()
+        self._flusher_thread: Optional[threading.Thread] = None
+        self._flusher_stop = threading.Event()
+
+    def add_listener(self, listener: Callable) -> None:
+        """订阅指标事件，listener(event, timestamp, *values) 在写入线程中同步调用
+
+        事件：api_call(elapsed, success)、error()、cache_access(hit)、
+        answer_quality(score)、regeneration(elapsed, success)。listener应当足够轻量。
+        """
+        with self._listeners_lock:
+            self._listeners = self._listeners + (listener,)
+
+    def remove_listener(self, listener: Callable) -> None:
+        with self._listeners_lock:
+            self._listeners = tuple(l for l in self._listeners if l != listener)
+
+    def _notify(self, event: str, timestamp: float, *values) -> None:
+        for listener in self._listeners:
+            try:
+                listener(event, timestamp, *values)
+            except Exception as e:
+                logger.error(f"指标订阅回调失败: {e}")
+
+    def _error_code(self, message: str) -> int:
+        code = self._error_codes.get(message)
+        if code is not None:
+            return code
+        with self._error_codes_lock:
+            code = self._error_codes.get(message)
+            if code is None:
+                if len(self._error_messages) >= self.MAX_ERROR_MESSAGES:
+                    message = self.OTHER_ERROR
+                    code = self._error_codes.get(message)
+                if code is None:
+                    code = len(self._error_messages)
+                    self._error_messages.append(message)
+                    self._error_codes[message] = code
+            return code
+
     def record_api_call(self, elapsed: float, success: bool):
-        with self._metrics_lock:
-            self._api_call_count += 1
-            self._metrics['api_calls'].append({
-                'timestamp': datetime.now().isoformat(),
-                'elapsed': elapsed,
-                'success': success
-            })
-            if not success:
-                self._error_count += 1
-                
+        self._counters.add('api_calls')
+        if not success:
+            self._counters.add('errors')
+        timestamp = time.time()
+        self._buffers['api_calls'].append(timestamp, elapsed, success)
+        self.record_latency('api', elapsed)
+        if self._listeners:
+            self._notify('api_call', timestamp, elapsed, success)
+
+    def record_latency(self, stage: str, elapsed: float):
+        """记录某个阶段的耗时（秒）"""
+        self.get_histogram(stage).record(elapsed)
+
+    def get_histogram(self, stage: str) -> LatencyHistogram:
+        histogram = self._histograms.get(stage)
+        if histogram is None:
+            with self._histograms_lock:
+                histogram = self._histograms.setdefault(stage, LatencyHistogram())
+        return histogram
+
+    def get_latency_summary(self) -> Dict[str, Dict[str, float]]:
+        """各阶段耗时的 count/mean/max/p50/p95/p99"""
+        with self._histograms_lock:
+            histograms = dict(self._histograms)
+        return {stage: histogram.summary() for stage, histogram in histograms.items()}
+
     def record_error(self, error_message: str):
-        with self._metrics_lock:
-            self._error_count += 1
-            self._metrics['errors'].append({
-                'timestamp': datetime.now().isoformat(),
-                'message': error_message
-            })
-                
+        self._counters.add('errors')
+        timestamp = time.time()
+        self._buffers['errors'].append(timestamp, self._error_code(error_message))
+        if self._listeners:
+            self._notify('error', timestamp)
+
     def record_cache_access(self, hit: bool):
-        with self._metrics_lock:
-            self._metrics['cache_hits'].append({
-                'timestamp': datetime.now().isoformat(),
-                'hit': hit
-            })
-                
+        self._counters.add('cache_hits' if hit else 'cache_misses')
+        timestamp = time.time()
+        self._buffers['cache_hits'].append(timestamp, hit)
+        if self._listeners:
+            self._notify('cache_access', timestamp, hit)
+
     def record_answer_quality(self, score: float):
-        with self._metrics_lock:
-            self._metrics['answer_quality'].append({
-                'timestamp': datetime.now().isoformat(),
-                'score': score
-            })
-                
+        self._counters.add('answers_scored')
+        self._counters.add('answer_quality_sum', score)
+        timestamp = time.time()
+        self._buffers['answer_quality'].append(timestamp, score)
+        if self._listeners:
+            self._notify('answer_quality', timestamp, score)
+
+    def record_regeneration(self, elapsed: float, success: bool):
+        self._counters.add('regenerations')
+        timestamp = time.time()
+        self._buffers['regenerations'].append(timestamp, elapsed, success)
+        self.record_latency('regeneration', elapsed)
+        if self._listeners:
+            self._notify('regeneration', timestamp, elapsed, success)
+
+    def get_counters(self) -> Dict[str, float]:
+        """累计计数器（api_calls、errors、cache_hits、cache_misses、regenerations等）"""
+        return self._counters.snapshot()
+
+    def get_arrays(self, name: str) -> Dict[str, np.ndarray]:
+        """获取某类指标的列式数据（时间戳为epoch秒）"""
+        return self._buffers[name].snapshot()
+
+    def get_delta(self, cursor: Optional[MetricsCursor] = None) -> MetricsDelta:
+        """返回游标之后新增的记录和计数器增量，开销只与增量大小有关
+
+        首次调用传入None，之后传入上一次结果中的cursor。
+        """
+        cursor = cursor or MetricsCursor()
+        events, positions, dropped = {}, {}, {}
+        for name, buffer in self._buffers.items():
+            events[name], positions[name], dropped[name] = buffer.since(cursor.positions.get(name, 0))
+        counters = self._counters.snapshot()
+        counter_deltas = {key: value - cursor.counters.get(key, 0) for key, value in counters.items()}
+        return MetricsDelta(
+            cursor=MetricsCursor(positions=positions, counters=counters),
+            events=events,
+            counters=counter_deltas,
+            dropped=dropped
+        )
+
+    @property
+    def max_window(self) -> float:
+        """get_window_summary 支持的最长窗口（秒），即 bucket_seconds * bucket_count"""
+        return self._buffers['api_calls'].max_window
+
+    def get_window_summary(self, seconds: float = 60.0, now: Optional[float] = None) -> Dict:
+        """最近一段时间的预聚合统计（按分桶粒度），不扫描明细记录
+
+        Raises:
+            ValueError: seconds 超过 max_window，更早的分桶已被覆盖
+        """
+        windows = {name: buffer.window(seconds, now) for name, buffer in self._buffers.items()}
+        api_count, api_sums = windows['api_calls']
+        cache_count, cache_sums = windows['cache_hits']
+        quality_count, quality_sums = windows['answer_quality']
+        regen_count, regen_sums = windows['regenerations']
+        errors = windows['errors'][0] + api_count - api_sums['success']
+        return {
+            'window': seconds,
+            'api_calls': api_count,
+            'api_latency': api_sums['elapsed'] / api_count if api_count else 0.0,
+            'error_rate': errors / max(1, api_count),
+            'errors': int(errors),
+            'cache_accesses': cache_count,
+            'cache_hit_rate': cache_sums['hit'] / cache_count if cache_count else None,
+            'answers_scored': quality_count,
+            'answer_quality': quality_sums['score'] / quality_count if quality_count else None,
+            'regenerations': regen_count,
+            'regeneration_latency': regen_sums['elapsed'] / regen_count if regen_count else 0.0
+        }
+
+    def error_message(self, code: int) -> Optional[str]:
+        with self._error_codes_lock:
+            return self._error_messages[code] if 0 <= code < len(self._error_messages) else None
+
+    def _records(self, name: str) -> List[Dict]:
+        """把列式数据转换为字典列表，时间戳转为ISO格式"""
+        arrays = self.get_arrays(name)
+        timestamps = [datetime.fromtimestamp(ts).isoformat() for ts in arrays.pop('timestamp').tolist()]
+        if 'code' in arrays:
+            arrays['message'] = [self.error_message(code) for code in arrays.pop('code').tolist()]
+        columns = {key: list(values) if isinstance(values, list) else values.tolist()
+                   for key, values in arrays.items()}
+        return [
+            {'timestamp': timestamp, **{key: values[i] for key, values in columns.items()}}
+            for i, timestamp in enumerate(timestamps)
+        ]
+
+    def flush(self, store: MetricsStore) -> int:
+        """把上次flush之后新增的记录追加到store，返回写入条数"""
+        with self._flush_lock:
+            delta = self.get_delta(self._flush_cursor)
+            positions = dict(self._flush_cursor.positions) if self._flush_cursor else {}
+            written = 0
+            for name, columns in delta.events.items():
+                if delta.dropped[name]:
+                    logger.warning(f"指标 {name} 有 {delta.dropped[name]} 条记录在保存前已被覆盖")
+                if 'code' in columns:
+                    columns = dict(columns)
+                    columns['message'] = np.array(
+                        [self.error_message(code) or '' for code in columns.pop('code').tolist()], dtype=str
+                    )
+                try:
+                    written += store.append(name, columns)
+                    positions[name] = delta.cursor.positions[name]
+                except Exception as e:
+                    # 游标不前进，下次flush时重试
+                    logger.error(f"保存指标 {name} 失败: {e}")
+            self._flush_cursor = MetricsCursor(positions=positions, counters=delta.cursor.counters)
+            return written
+
+    def start_flusher(self, store: MetricsStore, interval: float = 60.0,
+                      compact_interval: float = 3600.0) -> None:
+        """在后台线程中每interval秒flush一次；interval应小于环形缓冲区写满所需的时间
+
+        启动时及之后每compact_interval秒合并一次store中已结束的日期分区，
+        避免按天查询时打开成千上万个小文件。
+        """
+        if self._flusher_thread is not None:
+            return
+        self._flusher_stop.clear()
+
+        def run():
+            next_compaction = time.monotonic()
+            while True:
+                if time.monotonic() >= next_compaction:
+                    store.compact(grace=max(3600.0, interval * 2))
+                    next_compaction = time.monotonic() + compact_interval
+                if self._flusher_stop.wait(interval):
+                    break
+                self.flush(store)
+            self.flush(store)
+
+        self._flusher_thread = threading.Thread(target=run, name="metrics-flusher", daemon=True)
+        self._flusher_thread.start()
+        logger.info(f"指标持久化已启动: {store.root}")
+
+    def stop_flusher(self, timeout: float = 10.0) -> None:
+        """停止后台线程，停止前写入剩余的记录"""
+        if self._flusher_thread is None:
+            return
+        self._flusher_stop.set()
+        self._flusher_thread.join(timeout=timeout)
+        self._flusher_thread = None
+
+    def save_statistics(self, path: str) -> None:
+        """把统计结果保存为JSON，供离线生成报告"""
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(self.get_statistics(), f, ensure_ascii=False)
+        except Exception as e:
+            logger.error(f"保存性能统计失败: {e}")
+
     def get_statistics(self) -> Dict:
-        with self._metrics_lock:
-            total_calls = max(1, self._api_call_count)
-            return {
-                'api_calls': list(self._metrics['api_calls']),
-                'cache_hits': list(self._metrics['cache_hits']),
-                'answer_quality': list(self._metrics['answer_quality']),
-                'errors': list(self._metrics['errors']),
-                'error_rate': float(self._error_count) / total_calls,
-                'total_errors': self._error_count,
-                'total_calls': total_calls
-            }
\ No newline at end of file
+        total_calls = max(1, self._counters.get('api_calls'))
+        error_count = self._counters.get('errors')
+        return {
+            'api_calls': self._records('api_calls'),
+            'cache_hits': self._records('cache_hits'),
+            'answer_quality': self._records('answer_quality'),
+            'errors': self._records('errors'),
+            'regenerations': self._records('regenerations'),
+            'latency': self.get_latency_summary(),
+            'error_rate': float(error_count) / total_calls,
+            'total_errors': error_count,
+            'total_calls': total_calls
+        }
@@ -0,0 +1,280 @@
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+from ..parser.element_finder import QuestionElement
+from . import tracing
+
+_SENTINEL = object()
+
+
+@dataclass
+class StageStats:
+    name: str
+    workers: int = 1
+    processed: int = 0
+    dropped: int = 0
+    errors: int = 0
+    busy_time: float = 0.0
+    queue_depth: int = 0
+    max_queue_depth: int = 0
+    queue_depth_total: int = 0
+    queue_samples: int = 0
+
+    def to_dict(self, elapsed: float) -> Dict:
+        return {
+            'workers': self.workers,
+            'processed': self.processed,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'busy_time': self.busy_time,
+            'avg_latency': self.busy_time / self.processed if self.processed else 0.0,
+            'throughput': self.processed / elapsed if elapsed > 0 else 0.0,
+            'utilization': self.busy_time / (elapsed * self.workers) if elapsed > 0 else 0.0,
+            'queue_depth': self.queue_depth,
+            'max_queue_depth': self.max_queue_depth,
+            'avg_queue_depth': (self.queue_depth_total / self.queue_samples
+                                if self.queue_samples else 0.0)
+        }
+
+
+class StagedPipeline:
+    """多阶段生产者/消费者流水线
+
+    每个阶段由若干工作线程组成，阶段之间通过有界队列连接，
+    下游处理慢时上游会被阻塞（背压）。阶段函数返回None表示丢弃该任务。
+    """
+
+    def __init__(self, queue_size: int = 2):
+        self.queue_size = queue_size
+        self._stages: List[Tuple[str, Callable[[Any], Any], int]] = []
+        self.stats: Dict[str, StageStats] = {}
+        self._lock = threading.Lock()
+        self._elapsed = 0.0
+
+    def add_stage(self, name: str, func: Callable[[Any], Any],
+                  workers: int = 1) -> 'StagedPipeline':
+        """添加处理阶段"""
+        self._stages.append((name, func, workers))
+        self.stats[name] = StageStats(name=name, workers=workers)
+        return self
+
+    def run(self, source: Iterable) -> List:
+        """运行流水线，返回最后一个阶段的输出"""
+        if not self._stages:
+            return list(source)
+
+        for name, _, workers in self._stages:
+            self.stats[name] = StageStats(name=name, workers=workers)
+
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self._stages]
+        queues.append(queue.Queue())
+        remaining = [workers for _, _, workers in self._stages]
+
+        threads = []
+        for index, (name, func, workers) in enumerate(self._stages):
+            for worker_id in range(workers):
+                thread = threading.Thread(
+                    target=self._run_stage,
+                    args=(index, func, queues, remaining),
+                    name=f"pipeline-{name}-{worker_id}",
+                    daemon=True
+                )
+                thread.start()
+                threads.append(thread)
+
+        start = time.perf_counter()
+        for item in source:
+            self._put(queues, 0, item)
+        queues[0].put(_SENTINEL)
+
+        results = []
+        while True:
+            item = queues[-1].get()
+            if item is _SENTINEL:
+                break
+            results.append(item)
+
+        for thread in threads:
+            thread.join()
+        self._elapsed = time.perf_counter() - start
+        return results
+
+    def _put(self, queues: List[queue.Queue], index: int, item: Any) -> None:
+        """放入第index个阶段的输入队列，并记录队列深度"""
+        target = queues[index]
+        target.put(item)
+        if index < len(self._stages):
+            depth = target.qsize()
+            with self._lock:
+                stats = self.stats[self._stages[index][0]]
+                stats.queue_depth = depth
+                stats.max_queue_depth = max(stats.max_queue_depth, depth)
+                stats.queue_depth_total += depth
+                stats.queue_samples += 1
+
+    def _run_stage(self, index: int, func: Callable[[Any], Any],
+                   queues: List[queue.Queue], remaining: List[int]) -> None:
+        name = self._stages[index][0]
+        in_queue = queues[index]
+        stats = self.stats[name]
+
+        while True:
+            item = in_queue.get()
+            if item is _SENTINEL:
+                # 让同阶段的其他线程也能收到结束信号
+                in_queue.put(_SENTINEL)
+                with self._lock:
+                    remaining[index] -= 1
+                    is_last = remaining[index] == 0
+                if is_last:
+                    queues[index + 1].put(_SENTINEL)
+                return
+
+            started = time.perf_counter()
+            try:
+                result = func(item)
+                failed = False
+            except Exception as e:
+                logger.error(f"流水线阶段 {name} 处理失败: {e}")
+                result = None
+                failed = True
+            elapsed = time.perf_counter() - started
+
+            with self._lock:
+                stats.processed += 1
+                stats.busy_time += elapsed
+                if failed:
+                    stats.errors += 1
+                elif result is None:
+                    stats.dropped += 1
+
+            if result is not None:
+                self._put(queues, index + 1, result)
+
+    def get_metrics(self) -> Dict:
+        """获取各阶段吞吐量与队列深度统计"""
+        with self._lock:
+            return {
+                'elapsed': self._elapsed,
+                'stages': {
+                    name: stats.to_dict(self._elapsed)
+                    for name, stats in self.stats.items()
+                }
+            }
+
+
+@dataclass
+class PageTask:
+    page_index: int
+    image: Any = None
+    started: float = 0.0
+    trace: Optional[tracing.Trace] = None
+    questions: List[QuestionElement] = field(default_factory=list)
+    answers: List[Tuple[str, bool]] = field(default_factory=list)
+    accepted: List[Tuple[QuestionElement, str, bool]] = field(default_factory=list)
+
+
+class QuestionnairePipeline:
+    """多页问卷流水线：截图 → 解析 → 生成答案 → 验证
+
+    第N+1页的OCR与第N页的答案生成并行进行。提供quality_gate时，
+    验证阶段会对低质量答案重新生成。开启追踪时每页生成一份追踪记录，
+    设置trace_dir则导出为Chrome trace JSON。
+    """
+
+    def __init__(self, capture: Callable[[int], Any], parser, auto_filler,
+                 answer_validator=None, queue_size: int = 2,
+                 answer_workers: int = 1, quality_gate=None, monitor=None,
+                 trace_dir: Optional[str] = None):
+        self.capture = capture
+        self.parser = parser
+        self.auto_filler = auto_filler
+        self.answer_validator = answer_validator
+        self.quality_gate = quality_gate
+        self.monitor = monitor
+        self.trace_dir = trace_dir
+        self.pipeline = (
+            StagedPipeline(queue_size=queue_size)
+            .add_stage('capture', self._capture_stage)
+            .add_stage('parse', self._parse_stage)
+            .add_stage('answer', self._answer_stage, workers=answer_workers)
+            .add_stage('validate', self._validate_stage)
+        )
+
+    def run(self, page_count: int) -> List[PageTask]:
+        """处理page_count页问卷，结果按页码排序"""
+        if self.quality_gate is not None:
+            # 各页共享同一份重新生成预算
+            self.quality_gate.start_questionnaire()
+        tasks = self.pipeline.run(range(page_count))
+        return sorted(tasks, key=lambda task: task.page_index)
+
+    def get_metrics(self) -> Dict:
+        return self.pipeline.get_metrics()
+
+    def _capture_stage(self, page_index: int) -> Optional[PageTask]:
+        started = time.perf_counter()
+        trace = tracing.start_trace('page', page_index=page_index)
+        with tracing.activate(trace), tracing.span('pipeline.capture'):
+            image = self.capture(page_index)
+        if image is None:
+            logger.warning(f"第 {page_index + 1} 页截图失败")
+            return None
+        return PageTask(page_index=page_index, image=image, started=started, trace=trace)
+
+    def _parse_stage(self, task: PageTask) -> PageTask:
+        started = time.perf_counter()
+        with tracing.activate(task.trace), tracing.span('pipeline.parse'):
+            elements = self.parser.parse_page(task.image)
+        if self.monitor:
+            self.monitor.record_latency('ocr', time.perf_counter() - started)
+        task.image = None  # 尽早释放截图内存
+        for elements_list in elements.values():
+            task.questions.extend(elements_list)
+        return task
+
+    def _answer_stage(self, task: PageTask) -> PageTask:
+        if task.questions:
+            with tracing.activate(task.trace), tracing.span('pipeline.answer'):
+                task.answers = self.auto_filler.batch_generate_answers(task.questions)
+        return task
+
+    def _validate_stage(self, task: PageTask) -> PageTask:
+        with tracing.activate(task.trace), tracing.span('pipeline.validate'):
+            self._validate(task)
+        if self.monitor:
+            self.monitor.record_latency('page', time.perf_counter() - task.started)
+        if task.trace is not None:
+            task.trace.finish()
+            if self.trace_dir:
+                task.trace.save_chrome_trace(
+                    os.path.join(self.trace_dir, f"page_{task.page_index + 1}.json")
+                )
+        return task
+
+    def _validate(self, task: PageTask) -> None:
+        if self.quality_gate is not None:
+            # 质量闸门内部完成评分、一致性检查和重新生成
+            for result in self.quality_gate.process(task.questions, task.answers):
+                if result.accepted:
+                    task.accepted.append((result.question, result.answer, result.is_cached))
+        else:
+            for question, (answer, is_cached) in zip(task.questions, task.answers):
+                if not answer:
+                    continue
+                if self.answer_validator is None or self.answer_validator.validate_and_store_answer(
+                    question.question_type,
+                    question.text,
+                    answer
+                ):
+                    task.accepted.append((question, answer, is_cached))
+
+        # 只有通过验证的答案才记入人设上下文
+        for question, answer, _ in task.accepted:
+            self.auto_filler.learn_answer(question, answer)
@@ -0,0 +1,231 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from loguru import logger
+
+# 阶段 -> 所属源文件；调用栈中任意一帧落在这些文件中的内存分配都计入该阶段
+STAGE_FILES: Dict[str, Tuple[str, ...]] = {
+    'capture': ('*/auto_questionnaire/utils/screenshot.py', '*/PIL/ImageGrab.py'),
+    'ocr': ('*/auto_questionnaire/parser/*', '*/pytesseract/*'),
+    'tokenize': ('*/auto_questionnaire/utils/tokenizer.py', '*/jieba/*'),
+    'llm': ('*/auto_questionnaire/ai/*',),
+    'cache': ('*/auto_questionnaire/utils/cache_manager.py', '*/auto_questionnaire/utils/auto_fill.py'),
+    'validate': ('*/auto_questionnaire/utils/answer_validator.py', '*/auto_questionnaire/utils/answer_evaluator.py',
+                 '*/auto_questionnaire/utils/quality_gate.py', '*/auto_questionnaire/utils/relevance.py'),
+    'monitoring': ('*/auto_questionnaire/utils/performance_monitor.py', '*/auto_questionnaire/monitoring/*'),
+}
+
+# Python 3.12起cProfile基于sys.monitoring：一个profiler即可看到所有线程，且同一时间只能启用一个
+SHARED_PROFILER = hasattr(sys, 'monitoring')
+
+
+class StackSampler:
+    """定期采样各线程的调用栈，输出折叠栈格式（flamegraph.pl、speedscope可直接读取）"""
+
+    def __init__(self, interval: float = 0.01, max_depth: int = 64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples = 0
+        self._stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                frames: List[str] = []
+                while frame is not None and len(frames) < self.max_depth:
+                    code = frame.f_code
+                    frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                frames.append(names.get(thread_id, str(thread_id)))
+                self._stacks[';'.join(reversed(frames))] += 1
+            self.samples += 1
+
+    def folded(self) -> str:
+        return ''.join(f"{stack} {count}\n" for stack, count in self._stacks.most_common())
+
+
+class RunProfiler:
+    """端到端运行的性能剖析
+
+    流水线各阶段在线程池中执行：Python 3.12及以上用一个cProfile覆盖所有线程，
+    更早的版本为每个线程各启用一个cProfile，结束后合并为一份pstats；
+    tracemalloc按阶段统计内存占用最多的代码行：每隔snapshot_interval秒检查一次，保留内存最高时的快照，
+    运行中途释放的大块分配（如OCR中间图像）也能统计到；可选定期采样所有线程的调用栈。
+    结果写入 output_dir/profile_<时间>/ 目录。
+    """
+
+    def __init__(self, output_dir: str = "reports", top_n: int = 20,
+                 sample_interval: Optional[float] = None, snapshot_interval: float = 1.0,
+                 traceback_frames: int = 25,
+                 stages: Optional[Dict[str, Sequence[str]]] = None):
+        self.output_dir = output_dir
+        self.top_n = top_n
+        self.sample_interval = sample_interval
+        self.snapshot_interval = snapshot_interval
+        self.traceback_frames = traceback_frames
+        self.stages = stages or STAGE_FILES
+        self.profile_dir: Optional[str] = None
+        self._profiles: List[cProfile.Profile] = []
+        self._profiles_lock = threading.Lock()
+        self._sampler: Optional[StackSampler] = None
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._snapshot_memory = -1
+        self._snapshot_lock = threading.Lock()
+        self._snapshot_stop = threading.Event()
+        self._snapshot_thread: Optional[threading.Thread] = None
+        self._peak_memory = 0
+
+    def _new_profile(self) -> cProfile.Profile:
+        profile = cProfile.Profile()
+        with self._profiles_lock:
+            self._profiles.append(profile)
+        return profile
+
+    def _thread_hook(self, frame, event, arg) -> None:
+        """新线程执行第一个Python调用时触发，为该线程启用独立的profiler"""
+        self._new_profile().enable()
+
+    def _take_snapshot(self) -> None:
+        """当前内存高于已保存的快照时重新拍摄快照"""
+        with self._snapshot_lock:
+            current = tracemalloc.get_traced_memory()[0]
+            if current > self._snapshot_memory:
+                self._snapshot = tracemalloc.take_snapshot()
+                self._snapshot_memory = current
+
+    def _watch_memory(self) -> None:
+        while not self._snapshot_stop.wait(self.snapshot_interval):
+            self._take_snapshot()
+
+    def start(self) -> None:
+        tracemalloc.start(self.traceback_frames)
+        # 辅助线程先于profiler启动，自身不被剖析
+        if self.sample_interval:
+            self._sampler = StackSampler(self.sample_interval)
+            self._sampler.start()
+        self._snapshot_stop.clear()
+        self._snapshot_thread = threading.Thread(target=self._watch_memory, name="memory-snapshot", daemon=True)
+        self._snapshot_thread.start()
+        if not SHARED_PROFILER:
+            threading.setprofile(self._thread_hook)
+        self._new_profile().enable()
+
+    def stop(self) -> None:
+        if not SHARED_PROFILER:
+            threading.setprofile(None)
+        with self._profiles_lock:
+            profiles = list(self._profiles)
+        for profile in profiles:
+            profile.disable()
+        if self._sampler is not None:
+            self._sampler.stop()
+        self._snapshot_stop.set()
+        if self._snapshot_thread is not None:
+            self._snapshot_thread.join(timeout=30)
+            self._snapshot_thread = None
+        self._take_snapshot()
+        self._peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    def __enter__(self) -> 'RunProfiler':
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        self.stop()
+        self.save()
+        return False
+
+    def stats(self) -> Optional[pstats.Stats]:
+        """合并所有线程的profiler"""
+        with self._profiles_lock:
+            profiles = list(self._profiles)
+        merged = None
+        for profile in profiles:
+            profile.create_stats()
+            if not profile.stats:
+                continue
+            if merged is None:
+                merged = pstats.Stats(profile)
+            else:
+                merged.add(profile)
+        return merged
+
+    def memory_by_stage(self) -> Dict[str, List[tracemalloc.Statistic]]:
+        """内存最高时，各阶段占用内存最多的top_n个代码行"""
+        if self._snapshot is None:
+            return {}
+        result = {}
+        for stage, patterns in self.stages.items():
+            snapshot = self._snapshot.filter_traces(
+                [tracemalloc.Filter(True, pattern, all_frames=True) for pattern in patterns]
+            )
+            result[stage] = snapshot.statistics('lineno')[:self.top_n]
+        return result
+
+    def _memory_report(self) -> str:
+        lines = [f"峰值内存: {self._peak_memory / 1024 / 1024:.1f} MiB，"
+                 f"快照时内存: {max(self._snapshot_memory, 0) / 1024 / 1024:.1f} MiB", ""]
+        for stage, statistics in self.memory_by_stage().items():
+            total = sum(stat.size for stat in statistics)
+            lines.append(f"== {stage}（前{len(statistics)}行合计 {total / 1024:.1f} KiB）==")
+            for stat in statistics:
+                frame = stat.traceback[0]
+                lines.append(f"{stat.size / 1024:10.1f} KiB {stat.count:8d} 次  {frame.filename}:{frame.lineno}")
+            lines.append("")
+        return '\n'.join(lines)
+
+    def save(self) -> Optional[str]:
+        """写出 profile.pstats、profile.txt、memory.txt，以及采样时的 stacks.folded"""
+        try:
+            self.profile_dir = os.path.join(
+                self.output_dir, f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            )
+            os.makedirs(self.profile_dir, exist_ok=True)
+
+            stats = self.stats()
+            if stats is not None:
+                stats.dump_stats(os.path.join(self.profile_dir, 'profile.pstats'))
+                text = io.StringIO()
+                stats.stream = text
+                stats.sort_stats('cumulative').print_stats(self.top_n * 3)
+                with open(os.path.join(self.profile_dir, 'profile.txt'), 'w', encoding='utf-8') as f:
+                    f.write(text.getvalue())
+
+            with open(os.path.join(self.profile_dir, 'memory.txt'), 'w', encoding='utf-8') as f:
+                f.write(self._memory_report())
+
+            if self._sampler is not None:
+                with open(os.path.join(self.profile_dir, 'stacks.folded'), 'w', encoding='utf-8') as f:
+                    f.write(self._sampler.folded())
+
+            logger.info(f"性能剖析结果已保存: {self.profile_dir}")
+            return self.profile_dir
+        except Exception as e:
+            logger.error(f"保存性能剖析结果失败: {e}")
+            return None
@@ -0,0 +1,234 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from loguru import logger
+
+from ..parser.element_finder import QuestionElement
+from .answer_evaluator import AnswerEvaluator, EvaluationResult
+from .tracing import bind_context, span
+
+
+@dataclass
+class GateResult:
+    question: QuestionElement
+    answer: str
+    is_cached: bool
+    evaluation: Optional[EvaluationResult]
+    regenerations: int = 0
+    accepted: bool = False
+
+
+@dataclass
+class RegenerationBudget:
+    """一份问卷的重新生成预算，由该问卷的所有页面共享
+
+    regenerations 为剩余的重新生成次数；seconds 为剩余的等待时间，
+    每页重新生成所花的时间从中扣除，限制整份问卷因重新生成增加的延迟。
+    """
+    regenerations: int
+    seconds: float
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def take(self, count: int) -> int:
+        """申请count次重新生成，返回实际获得的次数"""
+        with self._lock:
+            granted = max(0, min(count, self.regenerations))
+            self.regenerations -= granted
+            return granted
+
+    def charge(self, elapsed: float) -> None:
+        with self._lock:
+            self.seconds = max(0.0, self.seconds - elapsed)
+
+
+class QualityGate:
+    """答案质量闸门
+
+    结合 AnswerEvaluator 评分与 AnswerValidator 一致性检查，不合格的答案
+    并发重新生成。文本题按评分阈值判断；有选项的单选题和多选题按有效性判断：
+    所选选项都在选项列表中即合格（多选题的得分是选中比例，只选部分选项也是有效答案）。
+    每份问卷有重新生成次数预算和截止时间，超出后保留得分最高的答案。
+    每份问卷开始时调用 start_questionnaire()，之后各页的 process() 共享同一份预算。
+    答案只在闸门确定保留后才写回 AutoFiller 的缓存。
+    """
+
+    def __init__(self, auto_filler, evaluator: Optional[AnswerEvaluator] = None,
+                 answer_validator=None, threshold: float = 0.6,
+                 regeneration_budget: int = 5, deadline: float = 10.0,
+                 max_workers: int = 3, monitor=None):
+        self.auto_filler = auto_filler
+        self.evaluator = evaluator or AnswerEvaluator()
+        self.answer_validator = answer_validator
+        self.threshold = threshold
+        self.regeneration_budget = regeneration_budget
+        self.deadline = deadline
+        self.max_workers = max_workers
+        self.monitor = monitor
+        # 长期存在的线程池：超时未完成的任务在后台结束，不阻塞当前问卷
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._budget: Optional[RegenerationBudget] = None
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'questionnaires': 0,
+            'regenerations': 0,
+            'improved': 0,
+            'regeneration_time': 0.0,
+            'budget_exhausted': 0,
+            'deadline_exceeded': 0,
+            'rejected': 0
+        }
+
+    def start_questionnaire(self) -> RegenerationBudget:
+        """开始新的一份问卷，重置重新生成预算"""
+        self._budget = RegenerationBudget(self.regeneration_budget, self.deadline)
+        return self._budget
+
+    def process(self, questions: Sequence[QuestionElement],
+                answers: Sequence[Tuple[str, bool]],
+                budget: Optional[RegenerationBudget] = None) -> List[GateResult]:
+        """检查一页的全部答案，不合格的在所属问卷的剩余预算内重新生成
+
+        Args:
+            budget: 问卷的重新生成预算，默认使用最近一次 start_questionnaire() 创建的预算
+        """
+        budget = budget or self._budget or self.start_questionnaire()
+        started = time.monotonic()
+        deadline_at = started + budget.seconds
+        results = [
+            GateResult(question=q, answer=answer, is_cached=is_cached, evaluation=None)
+            for q, (answer, is_cached) in zip(questions, answers)
+        ]
+        best: Dict[int, Tuple[str, bool, EvaluationResult]] = {}
+
+        pending = list(range(len(results)))
+        while pending:
+            evaluations = self.evaluator.evaluate_many(
+                [results[i].question for i in pending],
+                [results[i].answer for i in pending]
+            )
+            failed = []
+            for i, evaluation in zip(pending, evaluations):
+                result = results[i]
+                result.evaluation = evaluation
+                previous = best.get(i)
+                if previous is None or evaluation.score > previous[2].score:
+                    if previous is not None:
+                        self._increment('improved')
+                    best[i] = (result.answer, result.is_cached, evaluation)
+                if self._passes(result) and self._store(result):
+                    result.accepted = True
+                else:
+                    failed.append(i)
+
+            if not failed:
+                break
+            if time.monotonic() >= deadline_at:
+                self._increment('deadline_exceeded')
+                break
+            granted = budget.take(len(failed))
+            if not granted:
+                self._increment('budget_exhausted')
+                break
+
+            pending = self._regenerate(results, failed[:granted], deadline_at)
+
+        if any(result.regenerations for result in results):
+            budget.charge(time.monotonic() - started)
+
+        # 未通过的问题保留得分最高的答案；重新生成过的问题把最终保留的答案写回缓存
+        for i, result in enumerate(results):
+            if not result.accepted and i in best:
+                result.answer, result.is_cached, result.evaluation = best[i]
+            if result.regenerations and result.answer:
+                self.auto_filler.cache_answer(result.question, result.answer)
+
+        rejected = sum(1 for result in results if not result.accepted)
+        with self._stats_lock:
+            self._stats['questionnaires'] += 1
+            self._stats['rejected'] += rejected
+        if self.monitor:
+            for result in results:
+                if result.evaluation is not None:
+                    self.monitor.record_answer_quality(result.evaluation.score)
+        return results
+
+    def _passes(self, result: GateResult) -> bool:
+        question = result.question
+        options = getattr(question, 'options', None)
+        if question.question_type == 'radio' and options:
+            return result.answer in options
+        if question.question_type == 'checkbox' and options:
+            selected = [option.strip() for option in result.answer.split(',')]
+            return all(selected) and all(option in options for option in selected)
+        return result.evaluation.score >= self.threshold
+
+    def _store(self, result: GateResult) -> bool:
+        if self.answer_validator is None:
+            return True
+        return self.answer_validator.validate_and_store_answer(
+            result.question.question_type,
+            result.question.text,
+            result.answer
+        )
+
+    def _regenerate(self, results: List[GateResult], indices: List[int],
+                    deadline_at: float) -> List[int]:
+        """并发重新生成答案，返回在截止时间前拿到新答案的问题下标"""
+        def regenerate(i: int):
+            started = time.perf_counter()
+            feedback = results[i].evaluation.feedback if results[i].evaluation else None
+            with span('quality_gate.regenerate'):
+                answer, _ = self.auto_filler.generate_answer(results[i].question, feedback=feedback)
+            return i, answer, time.perf_counter() - started
+
+        futures = {self._executor.submit(bind_context(regenerate), i) for i in indices}
+        completed = []
+        while futures:
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                break
+            done, futures = wait(futures, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    i, answer, elapsed = future.result()
+                except Exception as e:
+                    logger.error(f"重新生成答案失败: {e}")
+                    continue
+                results[i].regenerations += 1
+                self._record_regeneration(elapsed, bool(answer))
+                if answer and answer != results[i].answer:
+                    results[i].answer = answer
+                    results[i].is_cached = False
+                    completed.append(i)
+
+        if futures:
+            logger.warning(f"{len(futures)} 个答案未在截止时间前重新生成")
+            for future in futures:
+                future.cancel()
+            self._increment('deadline_exceeded')
+        return completed
+
+    def _record_regeneration(self, elapsed: float, success: bool) -> None:
+        with self._stats_lock:
+            self._stats['regenerations'] += 1
+            self._stats['regeneration_time'] += elapsed
+        if self.monitor:
+            self.monitor.record_regeneration(elapsed, success)
+
+    def _increment(self, key: str) -> None:
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    def get_metrics(self) -> Dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['avg_regeneration_latency'] = (
+            stats['regeneration_time'] / stats['regenerations'] if stats['regenerations'] else 0.0
+        )
+        return stats
+
+    def __del__(self):
+        self._executor.shutdown(wait=False)
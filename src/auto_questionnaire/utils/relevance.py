@@ -0,0 +1,169 @@
+import json
+import math
+import os
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+
+from .tokenizer import get_tokenizer
+
+_STOPWORDS = frozenset(
+    "的 了 是 我 你 您 他 她 它 在 和 与 及 或 有 也 都 就 这 那 吗 呢 吧 啊 "
+    "请 对 于 为 把 被 将 一个 什么 怎么 如何 哪些 是否".split()
+)
+
+
+@lru_cache(maxsize=8192)
+def tokenize(text: str) -> Tuple[str, ...]:
+    """分词并去除标点、空白和常见虚词"""
+    return tuple(
+        token for token in get_tokenizer().cut(text)
+        if token.strip() and any(ch.isalnum() for ch in token) and token not in _STOPWORDS
+    )
+
+
+class TfidfRelevanceScorer:
+    """基于TF-IDF余弦相似度的本地相关性评分
+
+    IDF词表只拟合一次并缓存到磁盘；批量评分时把所有问题和答案编码为
+    (行号, 词号) 稀疏坐标，用NumPy一次性求点积与范数。
+    """
+
+    CACHE_VERSION = 1
+
+    def __init__(self, cache_file: Optional[str] = None,
+                 base_score: float = 0.4,
+                 saturation: float = 0.5):
+        self.cache_file = cache_file
+        self.base_score = base_score
+        self.saturation = saturation
+        self.n_documents = 0
+        self.vocabulary: Dict[str, int] = {}
+        self.idf = np.empty(0, dtype=np.float64)
+        if cache_file:
+            self.load()
+
+    @property
+    def is_fitted(self) -> bool:
+        return self.n_documents > 0
+
+    @property
+    def default_idf(self) -> float:
+        """未登录词的IDF，视为只在当前文档中出现"""
+        return math.log(1 + self.n_documents) + 1
+
+    def fit(self, documents: Iterable[str]) -> 'TfidfRelevanceScorer':
+        """根据语料计算IDF并写入缓存；语料为空时保持未拟合状态，也不写缓存"""
+        document_frequency: Counter = Counter()
+        n_documents = 0
+        for document in documents:
+            n_documents += 1
+            document_frequency.update(set(tokenize(document)))
+        if not n_documents:
+            logger.info("TF-IDF语料为空，暂不拟合")
+            return self
+
+        tokens = sorted(document_frequency)
+        self.n_documents = n_documents
+        self.vocabulary = {token: i for i, token in enumerate(tokens)}
+        df = np.fromiter((document_frequency[t] for t in tokens), dtype=np.float64, count=len(tokens))
+        self.idf = np.log((1 + n_documents) / (1 + df)) + 1
+        logger.info(f"TF-IDF词表拟合完成: {n_documents} 篇文档, {len(tokens)} 个词")
+        if self.cache_file:
+            self.save()
+        return self
+
+    def save(self) -> None:
+        if not self.is_fitted:
+            return
+        try:
+            cache_dir = os.path.dirname(self.cache_file)
+            if cache_dir:
+                os.makedirs(cache_dir, exist_ok=True)
+            with open(self.cache_file, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'version': self.CACHE_VERSION,
+                    'n_documents': self.n_documents,
+                    'tokens': list(self.vocabulary),
+                    'idf': self.idf.tolist()
+                }, f, ensure_ascii=False)
+        except Exception as e:
+            logger.error(f"保存TF-IDF词表失败: {e}")
+
+    def load(self) -> bool:
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return False
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != self.CACHE_VERSION or not data.get('n_documents'):
+                return False
+            self.n_documents = data['n_documents']
+            self.vocabulary = {token: i for i, token in enumerate(data['tokens'])}
+            self.idf = np.asarray(data['idf'], dtype=np.float64)
+            return True
+        except Exception as e:
+            logger.error(f"加载TF-IDF词表失败: {e}")
+            return False
+
+    def load_or_fit(self, documents: Iterable[str]) -> 'TfidfRelevanceScorer':
+        """优先使用构造时加载的磁盘缓存，缓存不存在或为空时才拟合"""
+        if self.is_fitted:
+            return self
+        return self.fit(documents)
+
+    def similarity_batch(self, questions: Sequence[str], answers: Sequence[str]) -> np.ndarray:
+        """批量计算问题与答案的TF-IDF余弦相似度"""
+        n = len(questions)
+        if n == 0:
+            return np.empty(0, dtype=np.float64)
+
+        extra_ids: Dict[str, int] = {}
+        vocab_size = len(self.vocabulary)
+
+        def encode(texts: Sequence[str]):
+            rows, ids, counts = [], [], []
+            for row, text in enumerate(texts):
+                for token, count in Counter(tokenize(text)).items():
+                    token_id = self.vocabulary.get(token)
+                    if token_id is None:
+                        token_id = extra_ids.setdefault(token, vocab_size + len(extra_ids))
+                    rows.append(row)
+                    ids.append(token_id)
+                    counts.append(count)
+            return (np.asarray(rows, dtype=np.int64), np.asarray(ids, dtype=np.int64),
+                    np.asarray(counts, dtype=np.float64))
+
+        q_rows, q_ids, q_counts = encode(questions)
+        a_rows, a_ids, a_counts = encode(answers)
+
+        idf = np.concatenate([self.idf, np.full(len(extra_ids), self.default_idf)])
+        q_weights = q_counts * idf[q_ids] if q_ids.size else q_counts
+        a_weights = a_counts * idf[a_ids] if a_ids.size else a_counts
+
+        width = vocab_size + len(extra_ids)
+        _, q_match, a_match = np.intersect1d(
+            q_rows * width + q_ids, a_rows * width + a_ids,
+            assume_unique=True, return_indices=True
+        )
+        dots = np.bincount(q_rows[q_match], weights=q_weights[q_match] * a_weights[a_match], minlength=n)
+        q_norms = np.sqrt(np.bincount(q_rows, weights=q_weights ** 2, minlength=n))
+        a_norms = np.sqrt(np.bincount(a_rows, weights=a_weights ** 2, minlength=n))
+
+        norms = q_norms * a_norms
+        return np.divide(dots, norms, out=np.zeros(n, dtype=np.float64), where=norms > 0)
+
+    def score_batch(self, questions: Sequence[str], answers: Sequence[str]) -> np.ndarray:
+        """把相似度映射为 [base_score, 1] 的相关性得分
+
+        答案很少逐字复述问题，相似度达到saturation即视为完全相关；
+        与问题毫无词汇重合的答案得到base_score。
+        """
+        similarity = self.similarity_batch(questions, answers)
+        return self.base_score + (1 - self.base_score) * np.minimum(1.0, similarity / self.saturation)
+
+    def score(self, question: str, answer: str) -> float:
+        return float(self.score_batch([question], [answer])[0])
@@ -1,10 +1,89 @@
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
+from threading import Lock
+from typing import Optional
 
+import numpy as np
 from loguru import logger
-from PIL import ImageGrab
 
+from .lazy_import import lazy_import
+from .tracing import traced
 
+Image = lazy_import('PIL.Image')
+ImageGrab = lazy_import('PIL.ImageGrab')
+
+_save_executor: Optional[ThreadPoolExecutor] = None
+_save_executor_lock = Lock()
+
+
+def _get_save_executor() -> ThreadPoolExecutor:
+    """获取用于后台保存截图的单线程执行器"""
+    global _save_executor
+    with _save_executor_lock:
+        if _save_executor is None:
+            _save_executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="screenshot-saver"
+            )
+        return _save_executor
+
+
+def _save_image(image: 'Image.Image', screenshot_path: str) -> Optional[str]:
+    try:
+        image.save(screenshot_path)
+        logger.debug(f"截图已保存: {screenshot_path}")
+        return screenshot_path
+    except Exception as e:
+        logger.error(f"保存截图失败: {e}")
+        return None
+
+
+def save_screenshot_async(image, save_dir: str = "data/screenshots") -> Optional[Future]:
+    """在后台线程中保存截图，不阻塞识别流程
+    Args:
+        image: PIL图片或RGB格式的numpy数组
+        save_dir: 保存目录
+    Returns:
+        Future: 结果为截图文件路径，提交失败返回None
+    """
+    try:
+        Path(save_dir).mkdir(parents=True, exist_ok=True)
+        if isinstance(image, np.ndarray):
+            image = Image.fromarray(image)
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
+        screenshot_path = f"{save_dir}/screenshot_{timestamp}_{time.time_ns() % 1000000:06d}.png"
+        return _get_save_executor().submit(_save_image, image, screenshot_path)
+    except Exception as e:
+        logger.error(f"提交截图保存任务失败: {e}")
+        return None
+
+
+@traced('screenshot.capture')
+def capture_screen(region=None, debug_save_dir: Optional[str] = None) -> Optional[np.ndarray]:
+    """获取屏幕截图并直接返回内存中的图像数组
+    Args:
+        region: 截图区域 (left, top, right, bottom)
+        debug_save_dir: 调试用保存目录，设置后在后台异步保存PNG
+    Returns:
+        np.ndarray: RGB格式的图像数组 (H, W, 3)，失败返回None
+    """
+    try:
+        screenshot = ImageGrab.grab(bbox=region)
+        if screenshot.mode != "RGB":
+            screenshot = screenshot.convert("RGB")
+
+        if debug_save_dir:
+            save_screenshot_async(screenshot, debug_save_dir)
+
+        # 通过数组接口直接取出像素缓冲区，不经过PNG编解码
+        return np.asarray(screenshot)
+
+    except Exception as e:
+        logger.error(f"截图错误: {e}")
+        return None
+
+
+@traced('screenshot.capture')
 def take_screenshot(region=None, save_dir="data/screenshots"):
     """获取屏幕截图
     Args:
@@ -38,4 +117,4 @@ def get_screen_size():
         return screen.size
     except Exception as e:
         logger.error(f"获取屏幕尺寸失败: {e}")
-        return None 
\ No newline at end of file
+        return None
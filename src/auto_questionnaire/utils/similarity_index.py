@@ -0,0 +1,125 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+_PRIME = (1 << 31) - 1
+_MAX_HASH = _PRIME
+
+
+class MinHasher:
+    """基于 (a*x + b) mod p 哈希族的MinHash签名计算"""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        self.num_perm = num_perm
+        self.seed = seed
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, shingles: Iterable[int]) -> np.ndarray:
+        values = np.fromiter(shingles, dtype=np.uint64)
+        if values.size == 0:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        values %= _PRIME
+        hashed = (np.outer(self._a, values) + self._b[:, None]) % _PRIME
+        return hashed.min(axis=1)
+
+
+class MinHashLSHIndex:
+    """带容量上限的MinHash-LSH近邻索引
+
+    超过max_size时淘汰最早加入的条目；查询只返回少量候选，
+    历史较少时直接返回全部条目，保证小规模下结果精确。
+    """
+
+    def __init__(self, max_size: int = 1000, num_perm: int = 64, bands: int = 32,
+                 max_candidates: int = 16, linear_scan_limit: int = 32,
+                 hasher: Optional[MinHasher] = None):
+        if num_perm % bands:
+            raise ValueError("num_perm 必须能被 bands 整除")
+        self.max_size = max_size
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.max_candidates = max_candidates
+        self.linear_scan_limit = linear_scan_limit
+        self.hasher = hasher or MinHasher(num_perm)
+        self._entries: "OrderedDict[int, Tuple[Any, np.ndarray]]" = OrderedDict()
+        self._buckets: List[Dict[bytes, Set[int]]] = [{} for _ in range(bands)]
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [
+            signature[i * self.rows:(i + 1) * self.rows].tobytes()
+            for i in range(self.bands)
+        ]
+
+    def add(self, item: Any, shingles: Iterable[int],
+            signature: Optional[np.ndarray] = None) -> None:
+        """加入条目，超出容量时淘汰最旧的条目"""
+        if signature is None:
+            signature = self.hasher.signature(shingles)
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = (item, signature)
+        for band, key in zip(self._buckets, self._band_keys(signature)):
+            band.setdefault(key, set()).add(entry_id)
+
+        while len(self._entries) > self.max_size:
+            self._evict_oldest()
+
+    def _evict_oldest(self) -> None:
+        entry_id, (_, signature) = self._entries.popitem(last=False)
+        for band, key in zip(self._buckets, self._band_keys(signature)):
+            bucket = band.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del band[key]
+
+    def query(self, shingles: Iterable[int]) -> List[Any]:
+        """返回可能相似的候选条目，按碰撞次数从高到低排列"""
+        if len(self._entries) <= self.linear_scan_limit:
+            return [item for item, _ in reversed(self._entries.values())]
+
+        signature = self.hasher.signature(shingles)
+        collisions: Dict[int, int] = {}
+        for band, key in zip(self._buckets, self._band_keys(signature)):
+            for entry_id in band.get(key, ()):
+                collisions[entry_id] = collisions.get(entry_id, 0) + 1
+
+        ranked = sorted(collisions, key=collisions.get, reverse=True)
+        return [self._entries[entry_id][0] for entry_id in ranked[:self.max_candidates]]
+
+    def items(self) -> List[Any]:
+        return [item for item, _ in self._entries.values()]
+
+    def to_dict(self, encode: Callable[[Any], Dict]) -> Dict:
+        """序列化索引，签名一并保存，加载时无需重新计算"""
+        return {
+            'max_size': self.max_size,
+            'num_perm': self.hasher.num_perm,
+            'seed': self.hasher.seed,
+            'bands': self.bands,
+            'entries': [
+                {**encode(item), 'signature': signature.tolist()}
+                for item, signature in self._entries.values()
+            ]
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict, decode: Callable[[Dict], Tuple[Any, Iterable[int]]],
+                  **kwargs) -> 'MinHashLSHIndex':
+        """从to_dict的结果恢复索引，decode返回 (条目, 字符片段哈希)"""
+        hasher = MinHasher(data['num_perm'], data.get('seed', 1))
+        max_size = kwargs.pop('max_size', data['max_size'])
+        index = cls(max_size=max_size, num_perm=data['num_perm'],
+                    bands=data['bands'], hasher=hasher, **kwargs)
+        for entry in data['entries']:
+            item, shingles = decode(entry)
+            signature = np.asarray(entry['signature'], dtype=np.uint64)
+            index.add(item, shingles, signature=signature)
+        return index
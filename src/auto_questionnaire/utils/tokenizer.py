@@ -0,0 +1,219 @@
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import zlib
+from array import array
+from typing import Dict, Iterator, Optional
+
+from loguru import logger
+
+# 词典缓存文件格式版本，格式变化时递增
+CACHE_FORMAT_VERSION = 2
+_MAGIC = b"AQJBDICT"
+# magic, 格式版本, 词条数, 哈希表大小, 总词频, 键数据长度（每个键后跟一个换行符）
+_HEADER = struct.Struct("<8sIQQQQ")
+_EMPTY = -1
+
+_tokenizer = None
+_tokenizer_lock = threading.Lock()
+
+
+class MmapFrequencyDict:
+    """基于内存映射文件的只读词频表
+
+    文件中保存开放寻址哈希表，加载只需mmap，无需反序列化整个词典；
+    多个fork出的工作进程共享同一份页缓存。写入（如jieba.add_word）保存在内存覆盖层中。
+    每次查找都要在Python中计算crc32并切片比较，分词时比dict慢约3倍；
+    需要大量分词的进程应先用 to_dict() 转为普通dict。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, count, table_size, total, blob_size = _HEADER.unpack_from(self._mmap, 0)
+        if magic != _MAGIC or version != CACHE_FORMAT_VERSION:
+            raise ValueError(f"词典缓存格式不匹配: {path}")
+
+        self.total = total
+        self._count = count
+        self._mask = table_size - 1
+        view = memoryview(self._mmap)
+        offset = _HEADER.size
+        self._table = view[offset:offset + table_size * 8].cast('q')
+        offset += table_size * 8
+        self._offsets = view[offset:offset + (count + 1) * 8].cast('q')
+        offset += (count + 1) * 8
+        self._freqs = view[offset:offset + count * 8].cast('q')
+        offset += count * 8
+        self._blob = view[offset:offset + blob_size]
+        self._overlay: Dict[str, int] = {}
+
+    def _find(self, key: str) -> int:
+        data = key.encode('utf-8')
+        table, offsets, blob, mask = self._table, self._offsets, self._blob, self._mask
+        slot = zlib.crc32(data) & mask
+        while True:
+            index = table[slot]
+            if index == _EMPTY:
+                return -1
+            if blob[offsets[index]:offsets[index + 1] - 1] == data:
+                return index
+            slot = (slot + 1) & mask
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._overlay or self._find(key) >= 0
+
+    def __getitem__(self, key: str) -> int:
+        if key in self._overlay:
+            return self._overlay[key]
+        index = self._find(key)
+        if index < 0:
+            raise KeyError(key)
+        return self._freqs[index]
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __setitem__(self, key: str, value: int) -> None:
+        self._overlay[key] = value
+
+    def __len__(self) -> int:
+        return self._count + sum(1 for key in self._overlay if self._find(key) < 0)
+
+    def __iter__(self) -> Iterator[str]:
+        for index in range(self._count):
+            key = bytes(self._blob[self._offsets[index]:self._offsets[index + 1] - 1]).decode('utf-8')
+            if key not in self._overlay:
+                yield key
+        yield from self._overlay
+
+    def to_dict(self) -> Dict[str, int]:
+        """一次性读出全部词条，构建普通dict（约0.25秒，仍省去jieba重建前缀词典的时间）"""
+        keys = bytes(self._blob).decode('utf-8').split('\n')
+        keys.pop()
+        freq = dict(zip(keys, self._freqs.tolist()))
+        freq.update(self._overlay)
+        return freq
+
+
+def write_frequency_cache(freq: Dict[str, int], total: int, path: str) -> None:
+    """把词频表写成可内存映射的缓存文件（原子替换）"""
+    keys = list(freq)
+    encoded = [key.encode('utf-8') for key in keys]
+    table_size = 1
+    while table_size < len(keys) * 2:
+        table_size <<= 1
+    mask = table_size - 1
+
+    table = [_EMPTY] * table_size
+    for index, data in enumerate(encoded):
+        slot = zlib.crc32(data) & mask
+        while table[slot] != _EMPTY:
+            slot = (slot + 1) & mask
+        table[slot] = index
+
+    offsets = [0]
+    for data in encoded:
+        offsets.append(offsets[-1] + len(data) + 1)
+    blob = b''.join(data + b'\n' for data in encoded)
+
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, CACHE_FORMAT_VERSION, len(keys), table_size, total, len(blob)))
+            f.write(array('q', table).tobytes())
+            f.write(array('q', offsets).tobytes())
+            f.write(array('q', (freq[key] for key in keys)).tobytes())
+            f.write(blob)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _default_dict_path() -> str:
+    import jieba
+    return os.path.join(os.path.dirname(jieba.__file__), jieba.DEFAULT_DICT_NAME)
+
+
+def cache_file_path(cache_dir: str, dict_path: Optional[str] = None) -> str:
+    """根据jieba版本、词典文件和缓存格式生成带版本号的缓存文件路径"""
+    import jieba
+    dict_path = dict_path or _default_dict_path()
+    stat = os.stat(dict_path)
+    digest = hashlib.md5(
+        f"{os.path.abspath(dict_path)}:{stat.st_size}:{stat.st_mtime_ns}".encode('utf-8')
+    ).hexdigest()[:12]
+    return os.path.join(
+        cache_dir,
+        f"jieba_v{CACHE_FORMAT_VERSION}_{jieba.__version__}_{digest}.dict"
+    )
+
+
+def _build_frequency_cache(path: str, dict_path: Optional[str]) -> None:
+    import jieba
+    tokenizer = jieba.Tokenizer(dict_path) if dict_path else jieba.Tokenizer()
+    tokenizer.initialize()
+    write_frequency_cache(tokenizer.FREQ, tokenizer.total, path)
+    logger.info(f"已生成分词词典缓存: {path}")
+
+
+def default_cache_dir() -> str:
+    """未指定缓存目录时使用 $JIEBA_CACHE_DIR，否则与jieba自身的缓存放在同一临时目录"""
+    import jieba
+    return os.getenv('JIEBA_CACHE_DIR') or jieba.dt.tmp_dir or tempfile.gettempdir()
+
+
+def load_tokenizer(cache_dir: Optional[str] = None, dict_path: Optional[str] = None,
+                   in_memory: bool = True):
+    """创建使用缓存词典的jieba分词器，缓存不存在时先构建
+
+    Args:
+        in_memory: 为True时把缓存读入普通dict，分词速度与jieba相同；
+            为False时直接在mmap上查找，启动最快、fork出的进程共享内存，但分词约慢3倍
+    """
+    import jieba
+    cache_dir = cache_dir or default_cache_dir()
+    try:
+        path = cache_file_path(cache_dir, dict_path)
+        if not os.path.exists(path):
+            _build_frequency_cache(path, dict_path)
+        mapped = MmapFrequencyDict(path)
+        tokenizer = jieba.Tokenizer(dict_path) if dict_path else jieba.Tokenizer()
+        tokenizer.FREQ = mapped.to_dict() if in_memory else mapped
+        tokenizer.total = mapped.total
+        tokenizer.initialized = True
+        return tokenizer
+    except Exception as e:
+        logger.warning(f"加载分词词典缓存失败，使用jieba默认加载: {e}")
+        return jieba.dt
+
+
+def get_tokenizer():
+    """获取进程内共享的分词器，首次调用时加载"""
+    global _tokenizer
+    if _tokenizer is None:
+        with _tokenizer_lock:
+            if _tokenizer is None:
+                _tokenizer = load_tokenizer()
+    return _tokenizer
+
+
+def preload_tokenizer(cache_dir: Optional[str] = None) -> None:
+    """加载进程内共享的分词器并指定缓存目录；在fork工作进程前调用，使子进程直接复用"""
+    global _tokenizer
+    with _tokenizer_lock:
+        if _tokenizer is None:
+            _tokenizer = load_tokenizer(cache_dir)
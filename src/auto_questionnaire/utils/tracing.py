@@ -0,0 +1,203 @@
+import contextvars
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from loguru import logger
+
+_enabled = os.getenv('TRACING_ENABLED', '').lower() in ('1', 'true', 'yes')
+_span_ids = itertools.count(1)
+# 当前线程（或协程）所在的 (Trace, Span)
+_current: contextvars.ContextVar = contextvars.ContextVar('auto_questionnaire_span', default=None)
+
+
+@dataclass
+class Span:
+    id: int
+    name: str
+    parent_id: Optional[int]
+    start_ns: int
+    end_ns: int = 0
+    thread_id: int = 0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        """耗时（秒）"""
+        return (self.end_ns - self.start_ns) / 1e9
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+
+class _NoopSpan:
+    """关闭追踪时返回的空span，所有操作都不做任何事"""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    """一份问卷的追踪记录，保存所有已结束的span"""
+
+    def __init__(self, name: str, **attributes):
+        self.name = name
+        self.attributes = attributes
+        self.root = Span(id=next(_span_ids), name=name, parent_id=None,
+                         start_ns=time.perf_counter_ns(), thread_id=threading.get_ident(),
+                         attributes=dict(attributes))
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def _add(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def finish(self) -> None:
+        if not self.root.end_ns:
+            self.root.end_ns = time.perf_counter_ns()
+            self._add(self.root)
+
+    def tree(self) -> Dict:
+        """按父子关系组织的span树"""
+        with self._lock:
+            spans = list(self.spans)
+        children: Dict[Optional[int], List[Span]] = {}
+        for span in spans:
+            children.setdefault(span.parent_id, []).append(span)
+
+        def build(span: Span) -> Dict:
+            return {
+                'name': span.name,
+                'duration': span.duration,
+                'attributes': span.attributes,
+                'children': [build(child) for child in
+                             sorted(children.get(span.id, []), key=lambda s: s.start_ns)]
+            }
+        return build(self.root)
+
+    def to_chrome_trace(self) -> Dict:
+        """导出为Chrome trace格式（chrome://tracing、Perfetto可直接打开）"""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start_ns)
+        pid = os.getpid()
+        origin = self.root.start_ns
+        return {
+            'traceEvents': [
+                {
+                    'name': span.name,
+                    'cat': span.name.split('.', 1)[0],
+                    'ph': 'X',
+                    'ts': (span.start_ns - origin) / 1000,
+                    'dur': (span.end_ns - span.start_ns) / 1000,
+                    'pid': pid,
+                    'tid': span.thread_id,
+                    'args': {'span_id': span.id, 'parent_id': span.parent_id, **span.attributes}
+                }
+                for span in spans
+            ],
+            'displayTimeUnit': 'ms',
+            'otherData': {'trace': self.name, **self.attributes}
+        }
+
+    def save_chrome_trace(self, path: str) -> None:
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(self.to_chrome_trace(), f, ensure_ascii=False, default=str)
+        except Exception as e:
+            logger.error(f"保存追踪文件失败: {e}")
+
+
+def enable() -> None:
+    global _enabled
+    _enabled = True
+
+
+def disable() -> None:
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def start_trace(name: str, **attributes) -> Optional[Trace]:
+    """开始一份新的追踪；追踪关闭时返回None"""
+    return Trace(name, **attributes) if _enabled else None
+
+
+@contextmanager
+def activate(trace: Optional[Trace]) -> Iterator[Optional[Trace]]:
+    """在当前线程中把trace设为活动追踪，之后的span都挂在它的根span下"""
+    if trace is None:
+        yield None
+        return
+    token = _current.set((trace, trace.root))
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def _span(name: str, attributes: Dict[str, Any]) -> Iterator[Span]:
+    trace, parent = _current.get()
+    span = Span(id=next(_span_ids), name=name, parent_id=parent.id,
+                start_ns=time.perf_counter_ns(), thread_id=threading.get_ident(),
+                attributes=attributes)
+    token = _current.set((trace, span))
+    try:
+        yield span
+    finally:
+        span.end_ns = time.perf_counter_ns()
+        _current.reset(token)
+        trace._add(span)
+
+
+def span(name: str, **attributes):
+    """计时代码块的上下文管理器；不在活动追踪中时返回空span"""
+    if not _enabled or _current.get() is None:
+        return _NOOP_SPAN
+    return _span(name, attributes)
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """把整个函数调用记录为一个span的装饰器"""
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled or _current.get() is None:
+                return func(*args, **kwargs)
+            with _span(span_name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def bind_context(func: Callable) -> Callable:
+    """让提交到线程池的函数继承当前的追踪上下文"""
+    if not _enabled or _current.get() is None:
+        return func
+    context = contextvars.copy_context()
+    return functools.partial(context.run, func)
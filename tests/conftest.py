@@ -19,6 +19,21 @@ from auto_questionnaire.utils.auto_fill import AutoFiller
 from auto_questionnaire.utils.performance_monitor import PerformanceMonitor
 
 
+@pytest.fixture(scope="session", autouse=True)
+def jieba_cache_dir(tmp_path_factory):
+    """分词词典缓存（约20MB）写入临时目录，不写入工作目录"""
+    from auto_questionnaire.utils import tokenizer
+
+    cache_dir = str(tmp_path_factory.mktemp("jieba_cache"))
+    previous = os.environ.get("JIEBA_CACHE_DIR")
+    os.environ["JIEBA_CACHE_DIR"] = cache_dir
+    yield cache_dir
+    tokenizer._tokenizer = None
+    if previous is None:
+        os.environ.pop("JIEBA_CACHE_DIR", None)
+    else:
+        os.environ["JIEBA_CACHE_DIR"] = previous
+
 @pytest.fixture
 def mock_groq_handler():
     # 创建 mock 对象
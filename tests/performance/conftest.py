@@ -0,0 +1,29 @@
+import json
+import os
+import platform
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+# 基准测试结果（JSON）的输出路径
+BENCHMARK_OUTPUT = os.getenv(
+    "BENCHMARK_OUTPUT", str(Path(__file__).resolve().parents[1] / "reports" / "benchmark_results.json")
+)
+
+
+@pytest.fixture(scope="session")
+def benchmark_results():
+    """收集各基准测试的结果，测试会话结束时写入 BENCHMARK_OUTPUT"""
+    results = []
+    yield results
+    if not results:
+        return
+    os.makedirs(os.path.dirname(BENCHMARK_OUTPUT) or ".", exist_ok=True)
+    with open(BENCHMARK_OUTPUT, "w", encoding="utf-8") as f:
+        json.dump({
+            "created_at": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": results
+        }, f, ensure_ascii=False, indent=2)
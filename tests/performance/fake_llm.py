@@ -0,0 +1,108 @@
+"""基准测试用的模拟LLM后端
+
+延迟、token数、错误和429限流都由 (seed, 问题, 第几次请求) 决定，与线程调度无关，
+同样的配置每次运行得到同样的请求结果序列。模型时间按time_scale缩放后真实sleep，
+结果再换算回模型时间（被测代码自身的CPU开销也会按1/time_scale放大，time_scale不宜过小）。
+"""
+import hashlib
+import math
+import random
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional
+
+from auto_questionnaire.ai.groq_handler import GroqHandler
+
+
+@dataclass
+class LatencyModel:
+    ttft_median: float = 0.4        # 首token延迟中位数(秒)，对数正态分布
+    ttft_sigma: float = 0.5
+    tokens_mean: float = 60.0       # 答案token数，泊松分布近似
+    tokens_per_second: float = 120.0
+    error_rate: float = 0.0         # 服务端错误比例
+    rate_limit_rate: float = 0.0    # 429比例
+    time_scale: float = 0.01        # 模型1秒对应的真实秒数
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+class FakeLLMError(Exception):
+    pass
+
+
+class FakeRateLimitError(FakeLLMError):
+    def __init__(self, retry_after: float):
+        super().__init__(f"429 Too Many Requests, retry after {retry_after:.2f}s")
+        self.retry_after = retry_after
+
+
+@dataclass
+class FakeResponse:
+    latency: float       # 模型时间(秒)
+    tokens: int
+    status: int          # 200、429 或 500
+
+
+class FakeLLMBackend:
+    def __init__(self, model: Optional[LatencyModel] = None, seed: int = 0):
+        self.model = model or LatencyModel()
+        self.seed = seed
+        self._attempts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.tokens = 0
+
+    def plan(self, question: str, attempt: int) -> FakeResponse:
+        """某个问题第attempt次请求的结果，只取决于seed、问题和attempt"""
+        digest = hashlib.blake2b(f"{self.seed}:{attempt}:{question}".encode('utf-8'), digest_size=8).digest()
+        rng = random.Random(int.from_bytes(digest, 'big'))
+        model = self.model
+        ttft = model.ttft_median * math.exp(rng.gauss(0.0, model.ttft_sigma))
+        roll = rng.random()
+        if roll < model.rate_limit_rate:
+            return FakeResponse(latency=ttft * 0.1, tokens=0, status=429)
+        if roll < model.rate_limit_rate + model.error_rate:
+            return FakeResponse(latency=ttft, tokens=0, status=500)
+        tokens = max(1, int(rng.gauss(model.tokens_mean, math.sqrt(model.tokens_mean))))
+        return FakeResponse(latency=ttft + tokens / model.tokens_per_second, tokens=tokens, status=200)
+
+    def complete(self, question: str) -> str:
+        with self._lock:
+            attempt = self._attempts.get(question, 0)
+            self._attempts[question] = attempt + 1
+            self.calls += 1
+        response = self.plan(question, attempt)
+        time.sleep(response.latency * self.model.time_scale)
+        with self._lock:
+            if response.status == 429:
+                self.rate_limited += 1
+            elif response.status != 200:
+                self.errors += 1
+            else:
+                self.tokens += response.tokens
+        if response.status == 429:
+            raise FakeRateLimitError(retry_after=1.0)
+        if response.status != 200:
+            raise FakeLLMError("500 Internal Server Error")
+        return f"关于{question}的回答" + "。" * (response.tokens // 20)
+
+    def counters(self) -> Dict[str, int]:
+        with self._lock:
+            return {'calls': self.calls, 'errors': self.errors,
+                    'rate_limited': self.rate_limited, 'tokens': self.tokens}
+
+
+class FakeGroqHandler(GroqHandler):
+    """用模拟后端替换GroqHandler中的API调用，其余逻辑（超时、响应缓存、线程池）保持不变"""
+
+    def __init__(self, backend: FakeLLMBackend, timeout: int = 5, max_workers: int = 16):
+        super().__init__(timeout=timeout, max_workers=max_workers)
+        self.backend = backend
+
+    def _make_api_call(self, question: str, context: Optional[str] = None) -> str:
+        return self.backend.complete(question)
@@ -0,0 +1,223 @@
+"""合成中文问卷页面，用于OCR吞吐量和准确率基准测试
+
+每页随机组合文本题、单选题和多选题，字体、字号、DPI、题目长度和选项数量都可变，
+同时给出每道题的标准答案（类型、题干、选项、位置）。同样的seed生成完全相同的页面。
+
+单选题和多选题的每个选项前都有一个"[]"标记，而 ElementFinder 把含多个标记的题目一律判为多选题，
+因此单选题在当前解析规则下必然被判为多选题。标准答案中的 parser_type 记录按解析规则
+渲染结果应得的题型，评分时分别统计与真实题型、与 parser_type 一致的题数，
+以区分解析规则的局限和OCR识别错误。
+
+也可以直接运行，把页面和标准答案写入目录：
+    python tests/performance/synthetic_pages.py --output data/screenshots --count 20
+"""
+import argparse
+import json
+import os
+import random
+import re
+from dataclasses import asdict, dataclass, field
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from auto_questionnaire.parser.element_finder import ElementFinder
+
+# 常见的中文字体文件名（Noto/思源、文泉驿、Windows、macOS）
+CJK_FONT_NAMES = (
+    "NotoSansCJK-Regular.ttc", "NotoSerifCJK-Regular.ttc", "NotoSansSC-Regular.otf",
+    "SourceHanSansSC-Regular.otf", "wqy-zenhei.ttc", "wqy-microhei.ttc",
+    "simhei.ttf", "simsun.ttc", "msyh.ttc", "PingFang.ttc", "STHeiti Medium.ttc",
+)
+FONT_DIRS = ("/usr/share/fonts", "/usr/local/share/fonts", os.path.expanduser("~/.fonts"),
+             "C:/Windows/Fonts", "/System/Library/Fonts", "/Library/Fonts")
+
+TEXT_QUESTIONS = (
+    "请简单介绍一下您自己", "您平时如何安排周末的时间", "请描述一次让您印象深刻的旅行经历",
+    "您对目前的工作有什么建议", "您希望我们在哪些方面做出改进", "请说明您选择本产品的主要原因",
+)
+CHOICE_QUESTIONS = (
+    ("您的性别", ("男", "女")),
+    ("您的年龄段", ("18岁以下", "18-25岁", "26-35岁", "36岁以上")),
+    ("您每周运动几次", ("不运动", "一到两次", "三次以上")),
+    ("您通常通过什么方式了解新闻", ("电视", "报纸", "手机应用", "社交媒体")),
+    ("您对本次服务是否满意", ("非常满意", "满意", "一般", "不满意")),
+    ("您喜欢哪些休闲活动", ("阅读", "运动", "旅行", "音乐", "游戏")),
+)
+# 拼接在题干后面，制造不同长度的题目
+QUALIFIERS = ("", "（请如实填写）", "，并说明原因", "（可结合最近一年的情况回答）")
+
+
+@dataclass
+class SyntheticQuestion:
+    question_type: str          # text、radio 或 checkbox
+    text: str
+    options: Optional[List[str]] = None
+    box: Tuple[int, int, int, int] = (0, 0, 0, 0)   # x1, y1, x2, y2
+    rendered: str = ""          # 页面上渲染的整行文字（编号、题干和选项标记）
+    parser_type: str = ""       # 按 ElementFinder 的题型规则，渲染结果应得的题型
+
+
+@dataclass
+class SyntheticPage:
+    image: np.ndarray           # RGB，与 capture_screen 的返回值一致
+    questions: List[SyntheticQuestion]
+    font: str
+    font_size: int
+    dpi: int
+    seed: int
+
+    def ground_truth(self) -> Dict:
+        return {
+            "font": self.font, "font_size": self.font_size, "dpi": self.dpi, "seed": self.seed,
+            "questions": [asdict(question) for question in self.questions]
+        }
+
+
+def find_cjk_fonts() -> List[str]:
+    """查找可用的中文字体；OCR_BENCHMARK_FONTS（以os.pathsep分隔）优先"""
+    configured = [path for path in os.getenv("OCR_BENCHMARK_FONTS", "").split(os.pathsep) if path]
+    fonts = [path for path in configured if os.path.exists(path)]
+    for font_dir in FONT_DIRS:
+        if not os.path.isdir(font_dir):
+            continue
+        for root, _, files in os.walk(font_dir):
+            fonts.extend(os.path.join(root, name) for name in files if name in CJK_FONT_NAMES)
+    return sorted(set(fonts), key=fonts.index)
+
+
+class QuestionnairePageGenerator:
+    """按固定seed生成问卷页面
+
+    选项与题干渲染在同一行，每个选项前带选项标记（marker，ElementFinder按"[]"或"【】"识别题型）；
+    文本题下方画一个空白输入框。
+    """
+
+    def __init__(self, fonts: Sequence[str] = (), font_sizes: Sequence[int] = (14, 16, 18),
+                 dpis: Sequence[int] = (96, 144), questions_per_page: Tuple[int, int] = (4, 8),
+                 markers: Sequence[str] = ("[]",), width: int = 1280, seed: int = 0):
+        self.fonts = list(fonts)
+        self.font_sizes = list(font_sizes)
+        self.dpis = list(dpis)
+        self.questions_per_page = questions_per_page
+        self.markers = list(markers)
+        self.width = width
+        self.seed = seed
+        self._font_cache: Dict[Tuple[str, int], ImageFont.FreeTypeFont] = {}
+        self._parser = ElementFinder()
+
+    def _font(self, path: str, size: int) -> ImageFont.FreeTypeFont:
+        key = (path, size)
+        if key not in self._font_cache:
+            # 没有中文字体时使用Pillow内置字体（中文显示为方框），只用于测试版面和标准答案
+            self._font_cache[key] = ImageFont.truetype(path, size) if path else ImageFont.load_default(size)
+        return self._font_cache[key]
+
+    def _question(self, rng: random.Random) -> SyntheticQuestion:
+        question_type = rng.choice(("text", "radio", "checkbox"))
+        qualifier = rng.choice(QUALIFIERS)
+        if question_type == "text":
+            return SyntheticQuestion("text", rng.choice(TEXT_QUESTIONS) + qualifier)
+        text, options = rng.choice(CHOICE_QUESTIONS)
+        count = rng.randint(2, len(options))
+        return SyntheticQuestion(question_type, text + qualifier, list(options[:count]))
+
+    def generate(self, index: int) -> SyntheticPage:
+        """生成第index页"""
+        rng = random.Random(f"{self.seed}:{index}")
+        font_path = rng.choice(self.fonts) if self.fonts else ""
+        dpi = rng.choice(self.dpis)
+        font_size = round(rng.choice(self.font_sizes) * dpi / 72)
+        font = self._font(font_path, font_size)
+        width = round(self.width * dpi / 96)
+        margin = 2 * font_size
+        line_height = round(font_size * 1.6)
+
+        questions = [self._question(rng) for _ in range(rng.randint(*self.questions_per_page))]
+        height = margin * 2 + sum(line_height * (3 if q.question_type == "text" else 2) for q in questions)
+        image = Image.new("RGB", (width, height), "white")
+        draw = ImageDraw.Draw(image)
+
+        y = margin
+        for number, question in enumerate(questions, start=1):
+            line = f"{number}. {question.text}"
+            if question.options:
+                marker = rng.choice(self.markers)
+                line += "  " + "  ".join(f"{marker}{option}" for option in question.options)
+            question.rendered = line
+            question.parser_type = self._parser._identify_question_type(line)
+            draw.text((margin, y), line, fill=(30, 30, 30), font=font)
+            x1, y1, x2, y2 = draw.textbbox((margin, y), line, font=font)
+            if question.question_type == "text":
+                box_top = y + line_height
+                draw.rectangle((margin, box_top, width - margin, box_top + line_height - 6),
+                               outline=(160, 160, 160), width=max(1, dpi // 96))
+                y2 = box_top + line_height - 6
+                y += line_height
+            question.box = (x1, y1, x2, y2)
+            y += line_height * 2
+        return SyntheticPage(image=np.array(image), questions=questions, font=font_path,
+                             font_size=font_size, dpi=dpi, seed=self.seed)
+
+    def pages(self, count: int) -> List[SyntheticPage]:
+        return [self.generate(index) for index in range(count)]
+
+
+def _normalize(text: str) -> str:
+    """去掉编号、空白和选项部分，只比较题干"""
+    text = re.split(r"\[\]|【】", text, maxsplit=1)[0]
+    text = re.sub(r"\s+", "", text)
+    return re.sub(r"^\d+[.、．]", "", text)
+
+
+def score_page(page: SyntheticPage, elements: Sequence, threshold: float = 0.8) -> Dict[str, int]:
+    """把解析结果与标准答案逐题匹配
+
+    Returns:
+        questions: 题目数; found: 题干相似度达到threshold的题数; typed: 其中题型也正确的题数;
+        typed_as_rendered: 其中题型与 parser_type 一致的题数（排除解析规则本身的局限）;
+        options/options_found: 选项总数和识别到的选项数; extra: 无法匹配任何题目的多余元素数
+    """
+    remaining = list(elements)
+    result = {"questions": len(page.questions), "found": 0, "typed": 0, "typed_as_rendered": 0,
+              "options": 0, "options_found": 0, "extra": 0}
+    for question in page.questions:
+        expected = _normalize(question.text)
+        result["options"] += len(question.options or [])
+        best, best_ratio = None, threshold
+        for element in remaining:
+            ratio = SequenceMatcher(None, expected, _normalize(element.text)).ratio()
+            if ratio >= best_ratio:
+                best, best_ratio = element, ratio
+        if best is None:
+            continue
+        remaining.remove(best)
+        result["found"] += 1
+        result["typed"] += best.question_type == question.question_type
+        result["typed_as_rendered"] += best.question_type == question.parser_type
+        parsed_options = {re.sub(r"\s+", "", option) for option in (best.options or [])}
+        result["options_found"] += sum(option in parsed_options for option in question.options or [])
+    result["extra"] = len(remaining)
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="生成合成问卷页面和标准答案")
+    parser.add_argument("--output", default="data/screenshots")
+    parser.add_argument("--count", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.output, exist_ok=True)
+    generator = QuestionnairePageGenerator(fonts=find_cjk_fonts(), seed=args.seed)
+    for index, page in enumerate(generator.pages(args.count)):
+        name = os.path.join(args.output, f"synthetic_{args.seed}_{index:03d}")
+        Image.fromarray(page.image).save(f"{name}.png")
+        with open(f"{name}.json", "w", encoding="utf-8") as f:
+            json.dump(page.ground_truth(), f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import asyncio
+import os
+import time
+from datetime import datetime
+from itertools import product
+from typing import Dict, List, Optional
+
+import numpy as np
+import pytest
+
+from auto_questionnaire.parser.element_finder import QuestionElement
+from auto_questionnaire.utils.auto_fill import AutoFiller
+from auto_questionnaire.utils.cache_manager import CacheManager
+from auto_questionnaire.utils.performance_monitor import PerformanceMonitor
+from auto_questionnaire.utils.request_queue import RequestQueue
+from fake_llm import FakeGroqHandler, FakeLLMBackend, LatencyModel
+
+TIME_SCALE = float(os.getenv("BENCHMARK_TIME_SCALE", "0.01"))
+BATCH_SIZES = (4, 16)
+CACHE_HIT_RATIOS = (0.0, 0.5, 0.9)
+WORKER_COUNTS = (1, 4)
+
+
+def _questions(page: int, batch_size: int) -> List[QuestionElement]:
+    return [
+        QuestionElement(question_type="text", text=f"第{page}页的问题{i}：你平时如何安排周末？",
+                        position=(0, i * 40, 800, i * 40 + 30))
+        for i in range(batch_size)
+    ]
+
+
+def _model_seconds(wall_seconds: float) -> float:
+    return wall_seconds / TIME_SCALE
+
+
+def run_auto_filler(batch_size: int, cache_hit_ratio: float, workers: int, pages: int = 3,
+                    model: Optional[LatencyModel] = None, seed: int = 0) -> Dict:
+    """按页批量生成答案，返回吞吐量（题/模型秒）和页面延迟分位数"""
+    backend = FakeLLMBackend(model or LatencyModel(time_scale=TIME_SCALE), seed=seed)
+    monitor = PerformanceMonitor()
+    auto_filler = AutoFiller(FakeGroqHandler(backend, max_workers=workers), monitor=monitor,
+                             max_retries=3, max_workers=workers)
+
+    page_latencies, answered, cached = [], 0, 0
+    for page in range(pages):
+        questions = _questions(page, batch_size)
+        for question in questions[:round(batch_size * cache_hit_ratio)]:
+            auto_filler.cache[auto_filler._generate_cache_key(question)] = {
+                "answer": "缓存的答案", "timestamp": datetime.now().isoformat()
+            }
+        started = time.perf_counter()
+        results = auto_filler.batch_generate_answers(questions)
+        page_latencies.append(_model_seconds(time.perf_counter() - started))
+        answered += sum(1 for answer, _ in results if answer)
+        cached += sum(1 for _, is_cached in results if is_cached)
+
+    return {
+        "questions": pages * batch_size,
+        "answered": answered,
+        "cached": cached,
+        "throughput": pages * batch_size / sum(page_latencies),
+        "page_latency_p50": float(np.percentile(page_latencies, 50)),
+        "page_latency_p95": float(np.percentile(page_latencies, 95)),
+        **backend.counters()
+    }
+
+
+@pytest.mark.performance
+def test_fake_backend_is_deterministic():
+    """测试模拟后端的结果只取决于seed、问题和请求次数"""
+    model = LatencyModel(error_rate=0.1, rate_limit_rate=0.05)
+    first, second, other = FakeLLMBackend(model, seed=1), FakeLLMBackend(model, seed=1), FakeLLMBackend(model, seed=2)
+    plans = [first.plan(f"问题{i}", 0) for i in range(2000)]
+
+    assert plans == [second.plan(f"问题{i}", 0) for i in range(2000)]
+    assert plans != [other.plan(f"问题{i}", 0) for i in range(2000)]
+    assert sum(p.status == 500 for p in plans) / len(plans) == pytest.approx(0.1, abs=0.02)
+    assert sum(p.status == 429 for p in plans) / len(plans) == pytest.approx(0.05, abs=0.02)
+    latencies = [p.latency for p in plans if p.status == 200]
+    # 中位数约为 首token延迟中位数 + 平均token数 / 吞吐
+    assert np.median(latencies) == pytest.approx(0.4 + 60 / 120, rel=0.15)
+
+
+@pytest.mark.performance
+def test_auto_filler_throughput_grid(benchmark_results):
+    """测试AutoFiller在不同批量、缓存命中率和线程数下的吞吐量和页面p95延迟"""
+    results = {}
+    for batch_size, hit_ratio, workers in product(BATCH_SIZES, CACHE_HIT_RATIOS, WORKER_COUNTS):
+        metrics = run_auto_filler(batch_size, hit_ratio, workers)
+        results[batch_size, hit_ratio, workers] = metrics
+        benchmark_results.append({
+            "benchmark": "auto_filler",
+            "params": {"batch_size": batch_size, "cache_hit_ratio": hit_ratio, "workers": workers,
+                       "model": LatencyModel(time_scale=TIME_SCALE).to_dict()},
+            "metrics": metrics
+        })
+        assert metrics["answered"] == metrics["questions"]
+        assert metrics["cached"] == 3 * round(batch_size * hit_ratio)
+
+    print()
+    for (batch_size, hit_ratio, workers), metrics in results.items():
+        print(f"batch={batch_size:<3} hit={hit_ratio:.1f} workers={workers}: "
+              f"{metrics['throughput']:7.2f} 题/s, 页面p95 {metrics['page_latency_p95']:.2f}s")
+
+    for batch_size, hit_ratio in product(BATCH_SIZES, CACHE_HIT_RATIOS):
+        misses = batch_size - round(batch_size * hit_ratio)
+        if misses >= 4:
+            assert results[batch_size, hit_ratio, 4]["throughput"] > 2 * results[batch_size, hit_ratio, 1]["throughput"]
+    for batch_size, workers in product(BATCH_SIZES, WORKER_COUNTS):
+        assert results[batch_size, 0.9, workers]["throughput"] > results[batch_size, 0.0, workers]["throughput"]
+
+
+@pytest.mark.performance
+def test_auto_filler_with_errors_and_rate_limits(benchmark_results):
+    """测试服务端错误和429下的重试开销"""
+    model = LatencyModel(error_rate=0.1, rate_limit_rate=0.1, time_scale=TIME_SCALE)
+    clean = run_auto_filler(16, 0.0, 4, model=LatencyModel(time_scale=TIME_SCALE))
+    faulty = run_auto_filler(16, 0.0, 4, model=model)
+    benchmark_results.append({
+        "benchmark": "auto_filler_faults",
+        "params": {"batch_size": 16, "cache_hit_ratio": 0.0, "workers": 4, "model": model.to_dict()},
+        "metrics": faulty
+    })
+
+    assert faulty["answered"] >= 0.95 * faulty["questions"]
+    assert faulty["calls"] > clean["calls"]
+    assert faulty["errors"] + faulty["rate_limited"] == faulty["calls"] - faulty["answered"]
+
+
+@pytest.mark.performance
+def test_request_queue_concurrency(benchmark_results):
+    """测试RequestQueue批量请求在不同并发数下的吞吐量和请求p95延迟"""
+    results = {}
+    for max_concurrent in WORKER_COUNTS:
+        backend = FakeLLMBackend(LatencyModel(time_scale=TIME_SCALE))
+        handler = FakeGroqHandler(backend, max_workers=max_concurrent)
+        request_queue = RequestQueue(max_concurrent=max_concurrent, rate_limit=1000)
+        latencies = []
+
+        def request(i: int):
+            started = time.perf_counter()
+            answer = handler.generate_response(f"队列问题{i}")
+            latencies.append(_model_seconds(time.perf_counter() - started))
+            return answer
+
+        started = time.perf_counter()
+        answers = asyncio.run(request_queue.batch_requests([lambda i=i: request(i) for i in range(32)]))
+        elapsed = _model_seconds(time.perf_counter() - started)
+        request_queue.executor.shutdown(wait=True)
+
+        assert all(answers)
+        results[max_concurrent] = {
+            "requests": len(answers),
+            "throughput": len(answers) / elapsed,
+            "request_latency_p95": float(np.percentile(latencies, 95)),
+            **backend.counters()
+        }
+        benchmark_results.append({
+            "benchmark": "request_queue",
+            "params": {"max_concurrent": max_concurrent, "requests": 32},
+            "metrics": results[max_concurrent]
+        })
+
+    assert results[4]["throughput"] > 2 * results[1]["throughput"]
+
+
+@pytest.mark.performance
+@pytest.mark.parametrize("entries", [1000, 10000])
+def test_cache_manager_warm_up_and_save(tmp_path, benchmark_results, entries):
+    """测试CacheManager预热（串行调用LLM）和清理保存（JSON序列化）的耗时"""
+    backend = FakeLLMBackend(LatencyModel(time_scale=TIME_SCALE))
+    cache_manager = CacheManager(str(tmp_path / "cache.json"))
+    common_questions = _questions(0, 20)
+
+    started = time.perf_counter()
+    cache_manager.warm_up_cache(common_questions, FakeGroqHandler(backend))
+    warm_up = _model_seconds(time.perf_counter() - started)
+    assert backend.calls == len(common_questions)
+
+    timestamp = datetime.now().isoformat()
+    for question in _questions(1, entries):
+        cache_manager.cache[cache_manager._generate_cache_key(question)] = {
+            "answer": "我通常会在周末和朋友一起去爬山，然后找一家小店吃饭。", "timestamp": timestamp
+        }
+    started = time.perf_counter()
+    cache_manager.clean_cache(max_size=entries)
+    clean_wall = time.perf_counter() - started
+
+    assert len(cache_manager.cache) == entries
+    metrics = {
+        "warm_up_per_question": warm_up / len(common_questions),
+        "clean_and_save_ms": clean_wall * 1000,
+        "file_bytes": os.path.getsize(cache_manager.cache_file)
+    }
+    print(f"\n{entries} 条缓存清理并保存: {metrics['clean_and_save_ms']:.1f}ms")
+    benchmark_results.append({"benchmark": "cache_manager", "params": {"entries": entries}, "metrics": metrics})
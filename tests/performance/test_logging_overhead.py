@@ -0,0 +1,48 @@
+import json
+import sys
+import time
+
+import pytest
+from loguru import logger
+
+from auto_questionnaire.utils.log_config import LogConfig
+
+ANSWERS = 2000
+
+
+def _log_one_answer(i: int) -> None:
+    """模拟填写一个答案时热路径上的日志：识别结果、相似度调试信息、截图保存、速率限制警告"""
+    logger.info(f"识别到 {i % 7} 个问题元素")
+    logger.debug(f"答案相似度: {i / ANSWERS:.3f}")
+    logger.debug(f"截图已保存: page_{i}.png")
+    logger.warning(f"达到速率限制，等待 {i % 3 / 10:.2f} 秒")
+
+
+def _per_answer_overhead(tmp_path, name: str, **overrides) -> float:
+    config_file = tmp_path / f"{name}.json"
+    config_file.write_text(json.dumps({"log_path": str(tmp_path / name), "console": False, **overrides}))
+    config = LogConfig(str(config_file))
+    try:
+        start = time.perf_counter()
+        for i in range(ANSWERS):
+            _log_one_answer(i)
+        return (time.perf_counter() - start) / ANSWERS
+    finally:
+        config.close()
+
+
+@pytest.mark.performance
+def test_logging_overhead_per_answer(tmp_path):
+    """测试每个答案的日志开销：限流和api.log级别调整前后对比"""
+    try:
+        # 调整前的配置：api.log接收DEBUG，每条调试日志都要构造记录；重复警告全部输出
+        legacy = _per_answer_overhead(tmp_path, "legacy", api_level="DEBUG", rate_limit={"enabled": False})
+        default = _per_answer_overhead(tmp_path, "default")
+        structured = _per_answer_overhead(tmp_path, "json", json=True)
+    finally:
+        logger.add(sys.stderr)
+
+    print(f"\n每个答案的日志开销: 调整前 {legacy * 1e6:.1f}us, 默认 {default * 1e6:.1f}us, "
+          f"JSON {structured * 1e6:.1f}us")
+    assert default < legacy
+    assert structured < legacy
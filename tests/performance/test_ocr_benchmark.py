@@ -0,0 +1,145 @@
+import os
+import shutil
+import time
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from auto_questionnaire.parser.element_finder import ElementFinder, QuestionElement
+from auto_questionnaire.parser.ui_parser import QuestionnaireParser
+from synthetic_pages import QuestionnairePageGenerator, find_cjk_fonts, score_page
+
+PAGES = int(os.getenv("OCR_BENCHMARK_PAGES", "10"))
+# 待比较的OCR配置；ElementFinder默认使用第一项
+OCR_CONFIGS = ("--psm 6 -l chi_sim", "--psm 4 -l chi_sim", "--psm 11 -l chi_sim", "--psm 6 -l chi_sim+eng")
+
+
+def _tesseract_languages():
+    if shutil.which("tesseract") is None:
+        return set()
+    import pytesseract
+    try:
+        return set(pytesseract.get_languages(config=""))
+    except Exception:
+        return set()
+
+
+def test_generator_is_deterministic():
+    """测试同样的seed生成完全相同的页面和标准答案"""
+    first = QuestionnairePageGenerator(seed=3).generate(0)
+    second = QuestionnairePageGenerator(seed=3).generate(0)
+    other = QuestionnairePageGenerator(seed=4).generate(0)
+
+    assert np.array_equal(first.image, second.image)
+    assert first.ground_truth() == second.ground_truth()
+    assert first.ground_truth() != other.ground_truth()
+
+
+def test_generator_ground_truth_layout():
+    """测试标准答案的题型、选项和位置与渲染结果一致"""
+    generator = QuestionnairePageGenerator(dpis=(96, 192), questions_per_page=(6, 6))
+    for page in generator.pages(6):
+        height, width, channels = page.image.shape
+        assert channels == 3
+        assert width == round(1280 * page.dpi / 96)
+        assert len(page.questions) == 6
+
+        previous_bottom = 0
+        for question in page.questions:
+            assert question.question_type in ("text", "radio", "checkbox")
+            assert (question.options is None) == (question.question_type == "text")
+            x1, y1, x2, y2 = question.box
+            assert 0 <= x1 < x2 <= width and previous_bottom <= y1 < y2 <= height
+            # 题目区域内有深色的文字像素
+            assert page.image[y1:y2, x1:x2].min() < 100
+            previous_bottom = y2
+
+
+def test_score_page_matches_questions():
+    """测试按题干相似度匹配解析结果，并统计题型和选项"""
+    page = QuestionnairePageGenerator(questions_per_page=(5, 5), seed=1).generate(0)
+    elements = []
+    for number, question in enumerate(page.questions, start=1):
+        options = question.options or []
+        text = f"{number}. {question.text} " + " ".join(f"[]{option}" for option in options)
+        elements.append(QuestionElement(question.question_type, text.strip(), question.box, options or None))
+    elements.append(QuestionElement("text", "页脚 第1页", (0, 0, 1, 1)))
+
+    score = score_page(page, elements)
+    assert score["found"] == score["typed"] == score["questions"] == 5
+    radio_count = sum(question.question_type == "radio" for question in page.questions)
+    assert score["typed_as_rendered"] == 5 - radio_count
+    assert score["options_found"] == score["options"]
+    assert score["extra"] == 1
+
+    assert score_page(page, [])["found"] == 0
+
+
+def test_parser_type_matches_element_finder():
+    """测试标准答案中的 parser_type 与 ElementFinder 对渲染文字的实际判定一致
+
+    每个选项都带"[]"标记，ElementFinder 会把单选题判为多选题，这是解析规则的已知局限。
+    """
+    pages = QuestionnairePageGenerator(questions_per_page=(8, 8), seed=2).pages(5)
+    questions = [question for page in pages for question in page.questions]
+    ocr_data = {"text": [], "left": [], "top": [], "width": [], "height": []}
+    for question in questions:
+        for word in question.rendered.split() + [""]:
+            for key, value in zip(ocr_data, (word, 0, 0, 10, 10)):
+                ocr_data[key].append(value)
+
+    with patch("pytesseract.image_to_data", return_value=ocr_data):
+        elements = ElementFinder().find_elements(np.full((10, 10, 3), 255, dtype=np.uint8))
+
+    assert [element.question_type for element in elements] == [q.parser_type for q in questions]
+    assert any(q.question_type == "radio" for q in questions)
+    assert all(q.parser_type == "checkbox" for q in questions if q.question_type == "radio")
+
+
+@pytest.mark.performance
+@pytest.mark.parametrize("ocr_config", OCR_CONFIGS)
+def test_ocr_throughput_and_accuracy(benchmark_results, ocr_config):
+    """测试各OCR配置下 parse_page 的每秒页数和逐题准确率"""
+    languages = _tesseract_languages()
+    required = {part for part in ocr_config.split("-l ", 1)[1].split("+")}
+    if not required <= languages:
+        pytest.skip(f"tesseract 不可用或缺少语言包: {sorted(required - languages)}")
+    fonts = find_cjk_fonts()
+    if not fonts:
+        pytest.skip("没有可用的中文字体，可通过 OCR_BENCHMARK_FONTS 指定")
+
+    pages = QuestionnairePageGenerator(fonts=fonts, seed=0).pages(PAGES)
+    parser = QuestionnaireParser()
+    parser.element_finder.ocr_config = ocr_config
+
+    totals = {}
+    started = time.perf_counter()
+    for page in pages:
+        classified = parser.parse_page(page.image)
+        elements = [element for group in classified.values() for element in group]
+        for key, value in score_page(page, elements).items():
+            totals[key] = totals.get(key, 0) + value
+    elapsed = time.perf_counter() - started
+
+    metrics = {
+        "pages": len(pages),
+        "pages_per_second": len(pages) / elapsed,
+        "question_recall": totals["found"] / totals["questions"],
+        "type_accuracy": totals["typed"] / totals["questions"],
+        # 单选题按解析规则必然判为多选题，以下只统计OCR造成的题型错误
+        "rendered_type_accuracy": totals["typed_as_rendered"] / totals["questions"],
+        "option_recall": totals["options_found"] / max(1, totals["options"]),
+        "extra_elements": totals["extra"],
+    }
+    print(f"\n{ocr_config}: {metrics['pages_per_second']:.2f} 页/s, 题干召回 {metrics['question_recall']:.1%}, "
+          f"题型正确 {metrics['type_accuracy']:.1%}（按渲染标记 {metrics['rendered_type_accuracy']:.1%}）, "
+          f"选项召回 {metrics['option_recall']:.1%}")
+    benchmark_results.append({
+        "benchmark": "ocr",
+        "params": {"ocr_config": ocr_config, "fonts": [os.path.basename(font) for font in fonts]},
+        "metrics": metrics
+    })
+
+    assert metrics["pages_per_second"] > 0
+    assert 0 <= metrics["type_accuracy"] <= metrics["question_recall"] <= 1
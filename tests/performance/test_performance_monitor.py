@@ -1 +1,64 @@
-from auto_questionnaire.utils.performance_monitor import PerformanceMonitor
\ No newline at end of file
+import time
+
+import pytest
+
+from auto_questionnaire.monitoring.alert_manager import AlertManager
+from auto_questionnaire.utils.performance_monitor import PerformanceMonitor
+
+CALLS = 20000
+
+
+def _per_call(func, calls: int = CALLS) -> float:
+    started = time.perf_counter()
+    for i in range(calls):
+        func(i)
+    return (time.perf_counter() - started) / calls
+
+
+@pytest.mark.performance
+def test_record_overhead(benchmark_results, tmp_path):
+    """测试热路径上记录指标的单次开销，以及订阅告警规则后的额外开销"""
+    monitor = PerformanceMonitor()
+    record = _per_call(lambda i: monitor.record_api_call(0.1 + i % 10 / 100, i % 50 != 0))
+
+    alert_manager = AlertManager(str(tmp_path / "alert_config.json"))
+    subscribed = PerformanceMonitor()
+    alert_manager.subscribe(subscribed, start_timer=False)
+    record_subscribed = _per_call(lambda i: subscribed.record_api_call(0.1 + i % 10 / 100, i % 50 != 0))
+    alert_manager.close()
+
+    metrics = {"record_api_call_us": record * 1e6, "record_api_call_subscribed_us": record_subscribed * 1e6}
+    print(f"\nrecord_api_call: {metrics['record_api_call_us']:.1f}us, "
+          f"订阅告警后: {metrics['record_api_call_subscribed_us']:.1f}us")
+    benchmark_results.append({"benchmark": "monitor_record", "params": {"calls": CALLS}, "metrics": metrics})
+
+    assert record < 50e-6
+    assert record_subscribed < 100e-6
+
+
+@pytest.mark.performance
+def test_polling_cost(benchmark_results):
+    """测试满容量时增量读取、窗口统计与全量统计的耗时"""
+    monitor = PerformanceMonitor(capacity=10000)
+    for i in range(10000):
+        monitor.record_api_call(0.1, True)
+        monitor.record_cache_access(i % 3 != 0)
+    cursor = monitor.get_delta().cursor
+    monitor.record_api_call(0.2, True)
+
+    def timed(func, repeat: int) -> float:
+        started = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        return (time.perf_counter() - started) / repeat
+
+    metrics = {
+        "get_delta_ms": timed(lambda: monitor.get_delta(cursor), 200) * 1000,
+        "get_window_summary_ms": timed(lambda: monitor.get_window_summary(60), 200) * 1000,
+        "get_statistics_ms": timed(monitor.get_statistics, 5) * 1000,
+    }
+    print("\n" + ", ".join(f"{name}: {value:.3f}ms" for name, value in metrics.items()))
+    benchmark_results.append({"benchmark": "monitor_polling", "params": {"capacity": 10000}, "metrics": metrics})
+
+    assert metrics["get_delta_ms"] < metrics["get_statistics_ms"] / 10
+    assert metrics["get_window_summary_ms"] < metrics["get_statistics_ms"] / 10
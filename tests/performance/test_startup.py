@@ -0,0 +1,103 @@
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from auto_questionnaire.utils.tokenizer import load_tokenizer
+
+SRC_DIR = str(Path(__file__).resolve().parents[2] / "src")
+
+STARTUP_SCRIPT = """
+import time
+start = time.perf_counter()
+from auto_questionnaire.utils.answer_validator import AnswerValidator
+imported = time.perf_counter()
+AnswerValidator().validate_and_store_answer("text", "启动测试", "我平时喜欢在周末骑自行车")
+ready = time.perf_counter()
+print(f"{imported - start:.4f} {ready - imported:.4f}")
+"""
+
+
+@pytest.mark.performance
+def test_validator_startup_time(tmp_path):
+    """测试预生成词典缓存后验证器的启动耗时"""
+    cache_dir = str(tmp_path / "jieba_cache")
+    load_tokenizer(cache_dir)
+
+    env = {**os.environ, "JIEBA_CACHE_DIR": cache_dir, "PYTHONPATH": SRC_DIR}
+    output = subprocess.run(
+        [sys.executable, "-c", STARTUP_SCRIPT],
+        env=env, capture_output=True, text=True, check=True
+    ).stdout.split()
+    import_time, first_answer_time = float(output[-2]), float(output[-1])
+    print(f"\nimport: {import_time:.3f}s, 首次分词: {first_answer_time:.3f}s")
+
+    # 不使用缓存时jieba构建前缀词典约需1秒
+    assert first_answer_time < 0.5, f"首次分词耗时过长: {first_answer_time:.3f}s"
+
+
+def _cut_time(tokenizer, text: str, rounds: int = 100) -> float:
+    """每次分词的平均耗时（毫秒）"""
+    list(tokenizer.cut(text))
+    start = time.perf_counter()
+    for _ in range(rounds):
+        list(tokenizer.cut(text))
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+@pytest.mark.performance
+def test_tokenizer_throughput(tmp_path, benchmark_results):
+    """测试缓存词典的分词速度：读入dict后与jieba持平，mmap查找约慢3倍"""
+    import jieba
+
+    cache_dir = str(tmp_path / "jieba_cache")
+    in_memory = load_tokenizer(cache_dir)
+    mapped = load_tokenizer(cache_dir, in_memory=False)
+    jieba.initialize()
+    text = ("我平时喜欢在周末骑自行车锻炼身体，偶尔也会和朋友一起去郊外爬山。" * 8)[:200]
+
+    metrics = {name: _cut_time(tokenizer, text)
+               for name, tokenizer in (("jieba", jieba.dt), ("in_memory", in_memory), ("mmap", mapped))}
+    benchmark_results.append({"benchmark": "tokenizer_throughput", "params": {"chars": len(text)},
+                              "metrics": {f"{name}_ms_per_cut": value for name, value in metrics.items()}})
+    print("\n" + ", ".join(f"{name}: {value:.2f}ms" for name, value in metrics.items()))
+
+    assert metrics["in_memory"] < metrics["jieba"] * 1.5, f"分词速度明显低于jieba: {metrics}"
+
+
+# 冷启动不应加载的重量级依赖：OCR、截图、绘图、分词、告警配置校验
+HEAVY_MODULES = ("cv2", "pytesseract", "pandas", "PIL", "jieba", "pydantic", "matplotlib")
+# 导入 auto_questionnaire.main 的累计耗时上限（毫秒），延迟导入前约为700ms
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "500"))
+
+
+def _import_times(module: str) -> dict:
+    """用 python -X importtime 导入模块，返回 {模块名: 累计耗时(微秒)}"""
+    env = {**os.environ, "PYTHONPATH": SRC_DIR}
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env, capture_output=True, text=True, check=True
+    ).stderr
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.performance
+def test_main_import_is_lazy():
+    """测试导入入口模块时不加载重量级依赖，且冷启动耗时在预算内"""
+    times = _import_times("auto_questionnaire.main")
+
+    loaded = sorted(name for name in times if name.split(".")[0] in HEAVY_MODULES)
+    assert not loaded, f"启动时加载了重量级依赖: {loaded}"
+
+    import_ms = times["auto_questionnaire.main"] / 1000
+    print(f"\nimport auto_questionnaire.main: {import_ms:.1f}ms")
+    assert import_ms < IMPORT_BUDGET_MS, f"启动导入耗时过长: {import_ms:.1f}ms"
@@ -0,0 +1,96 @@
+import json
+import socket
+import time
+from email import message_from_bytes
+from email.header import decode_header, make_header
+from unittest.mock import Mock
+
+import pytest
+
+from auto_questionnaire.monitoring.alert_dispatcher import AlertDispatcher, SMTPConnectionPool
+from auto_questionnaire.monitoring.alert_manager import AlertManager
+
+
+class RecordingHandler:
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(message_from_bytes(envelope.content))
+        return '250 OK'
+
+
+@pytest.fixture
+def smtp_stub():
+    controller_module = pytest.importorskip("aiosmtpd.controller")
+    handler = RecordingHandler()
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    controller = controller_module.Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    yield controller, handler
+    controller.stop()
+
+
+def _subject(message):
+    return str(make_header(decode_header(message['Subject'])))
+
+
+def _pool(controller):
+    return SMTPConnectionPool("127.0.0.1", controller.port, timeout=5, use_starttls=False)
+
+
+def test_alerts_coalesced_into_digest(smtp_stub):
+    """测试窗口内的告警合并为一封邮件"""
+    controller, handler = smtp_stub
+    dispatcher = AlertDispatcher(_pool(controller), "alert@example.com", ["admin@example.com"],
+                                 coalesce_window=0.3)
+    for i in range(3):
+        dispatcher.submit(f"告警{i}", f"内容{i}")
+    dispatcher.close()
+
+    assert len(handler.messages) == 1
+    assert _subject(handler.messages[0]) == "[问卷系统告警] 3 条告警"
+    body = handler.messages[0].get_payload(decode=True).decode('utf-8')
+    assert "告警0" in body and "内容2" in body
+
+
+def test_connection_reused(smtp_stub):
+    """测试多次发送复用同一个SMTP连接"""
+    controller, handler = smtp_stub
+    pool = _pool(controller)
+    dispatcher = AlertDispatcher(pool, "alert@example.com", ["admin@example.com"], coalesce_window=0.05)
+    dispatcher.submit("第一次", "内容")
+    time.sleep(0.3)
+    dispatcher.submit("第二次", "内容")
+    dispatcher.close()
+
+    assert [_subject(message) for message in handler.messages] == [
+        "[问卷系统告警] 第一次", "[问卷系统告警] 第二次"
+    ]
+    assert pool.connections_opened == 1
+
+
+def test_slow_server_does_not_block_caller(tmp_path):
+    """测试邮件服务器很慢时check_metrics不被阻塞"""
+    config_file = tmp_path / "alert_config.json"
+    config_file.write_text(json.dumps({
+        "email_recipients": ["admin@example.com"],
+        "smtp_server": "smtp.example.com",
+        "smtp_port": 587,
+        "smtp_user": "alert@example.com",
+        "smtp_password": "",
+        "coalesce_window": 0
+    }), encoding='utf-8')
+    manager = AlertManager(config_file=str(config_file))
+    manager.dispatcher.pool = Mock()
+    manager.dispatcher.pool.send.side_effect = lambda msg: time.sleep(1.0)
+
+    start = time.time()
+    manager.check_metrics({'error_rate': 0.5, 'cache_hit_rate': 0.1})
+    elapsed = time.time() - start
+
+    assert elapsed < 0.1
+    manager.close()
+    assert manager.dispatcher.pool.send.call_count >= 1
@@ -0,0 +1,116 @@
+import time
+
+import numpy as np
+import pytest
+
+from auto_questionnaire.monitoring.alert_manager import AlertManager
+from auto_questionnaire.monitoring.rolling_window import RollingWindow
+from auto_questionnaire.utils.performance_monitor import PerformanceMonitor
+
+
+@pytest.fixture
+def alert_manager(tmp_path, monkeypatch):
+    manager = AlertManager(config_file=str(tmp_path / "missing.json"))
+    manager.sent = []
+    monkeypatch.setattr(manager, '_send_alert',
+                        lambda subject, message: manager.sent.append((subject, message)))
+    yield manager
+    manager.close()
+
+
+def test_rolling_window_expires_old_buckets():
+    """测试滑动窗口扣除过期的桶"""
+    window = RollingWindow(60, fields=1, bucket_count=6)
+    window.add(1000.0, 1.0)
+    window.add(1030.0, 2.0)
+    window.add(1055.0, 3.0)
+
+    assert window.totals(1055.0) == (3, [6.0])
+    assert window.totals(1065.0) == (2, [5.0])
+    assert window.totals(1095.0) == (1, [3.0])
+    assert window.totals(2000.0) == (0, [0.0])
+
+    window.add(1000.0, 9.0)  # 早于窗口的事件被忽略
+    assert window.totals(2000.0) == (0, [0.0])
+
+
+def test_rolling_window_add_many_matches_add():
+    """测试批量写入与逐个写入结果一致"""
+    timestamps = np.array([1000.0, 1003.0, 1030.0, 1055.0, 940.0])
+    values = np.array([1.0, 2.0, 3.0, 4.0, 9.0])
+    single, batch = RollingWindow(60, fields=1, bucket_count=6), RollingWindow(60, fields=1, bucket_count=6)
+    for timestamp, value in zip(timestamps, values):
+        single.add(timestamp, value)
+    batch.add_many(timestamps, values)
+
+    assert batch.totals(1055.0) == single.totals(1055.0) == (4, [10.0])
+    for now in (1065.0, 1095.0):
+        assert batch.totals(now) == single.totals(now)
+
+
+def test_subscribed_windows(alert_manager):
+    """测试订阅监控器后窗口随事件更新"""
+    monitor = PerformanceMonitor()
+    alert_manager.subscribe(monitor, start_timer=False)
+    for success in (True, True, True, False):
+        monitor.record_api_call(0.5, success)
+    monitor.record_error("解析失败")
+    monitor.record_cache_access(True)
+    monitor.record_cache_access(False)
+    monitor.record_answer_quality(0.9)
+
+    assert not monitor._listeners, "订阅不应在记录指标的热路径上增加回调"
+    stats = alert_manager.window_metrics("1m")
+    assert stats['api_calls'] == 4
+    assert stats['error_rate'] == 0.5
+    assert stats['api_latency'] == pytest.approx(0.5)
+    assert stats['cache_hit_rate'] == 0.5
+    assert stats['answer_quality'] == pytest.approx(0.9)
+
+    alert_manager.close()
+    monitor.record_api_call(0.5, True)
+    assert alert_manager.window_metrics("1m")['api_calls'] == 4
+
+
+def test_evaluate_rules(alert_manager):
+    """测试按窗口评估规则并遵守最少样本数和冷却时间"""
+    monitor = PerformanceMonitor()
+    alert_manager.subscribe(monitor, start_timer=False)
+    for _ in range(3):
+        monitor.record_api_call(0.1, False)
+    assert alert_manager.evaluate() == []  # 样本不足
+
+    for _ in range(3):
+        monitor.record_api_call(0.1, False)
+    assert alert_manager.evaluate() == ['error_rate']
+    assert "最近5m" in alert_manager.sent[0][0]
+    assert alert_manager.evaluate() == []  # 冷却中
+
+
+def test_latency_rule_uses_percentile(alert_manager):
+    """测试超过阈值的调用比例大于 1 - 分位点 时触发延迟告警"""
+    monitor = PerformanceMonitor()
+    alert_manager.subscribe(monitor, start_timer=False)
+    for _ in range(96):
+        monitor.record_api_call(1.0, True)
+    for _ in range(4):
+        monitor.record_api_call(8.0, True)
+    assert 'api_latency' not in alert_manager.evaluate()
+
+    for _ in range(4):
+        monitor.record_api_call(8.0, True)
+    assert 'api_latency' in alert_manager.evaluate()
+
+
+def test_timer_evaluation(alert_manager):
+    """测试后台定时评估"""
+    alert_manager.config.evaluation_interval = 0.05
+    monitor = PerformanceMonitor()
+    alert_manager.subscribe(monitor)
+    for _ in range(10):
+        monitor.record_answer_quality(0.1)
+
+    deadline = time.time() + 2
+    while not alert_manager.sent and time.time() < deadline:
+        time.sleep(0.02)
+    assert alert_manager.sent[0][0].startswith("指标 answer_quality 超出阈值")
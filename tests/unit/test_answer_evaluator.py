@@ -39,4 +39,52 @@ def test_evaluate_invalid_answer(answer_evaluator):
     )
     
     assert score.score < 0.6  # 分数应该较低
-    assert "答案需要改进" in score.feedback 
\ No newline at end of file
+    assert "答案需要改进" in score.feedback 
+
+def test_evaluate_many_matches_evaluate(answer_evaluator):
+    """测试批量评估与逐个评估结果一致"""
+    from auto_questionnaire.parser.element_finder import QuestionElement
+
+    options = ["选项A", "选项B", "选项C"]
+    cases = [
+        (QuestionElement('radio', '单选', (0, 0, 1, 1), options), "选项A"),
+        (QuestionElement('radio', '单选', (0, 0, 1, 1), options), "无效选项"),
+        (QuestionElement('radio', '无选项单选', (0, 0, 1, 1)), "随便"),
+        (QuestionElement('checkbox', '多选', (0, 0, 1, 1), options), "选项A, 选项C,其他"),
+        (QuestionElement('checkbox', '多选', (0, 0, 1, 1), options), "都不是"),
+        (QuestionElement('checkbox', '无选项多选', (0, 0, 1, 1)), "选项A"),
+        (QuestionElement('text', '请描述你的看法', (0, 0, 1, 1)), "短答案"),
+        (QuestionElement('text', '请描述你的看法', (0, 0, 1, 1)), "这是一个比较完整的答案，包含了必要的信息和合适的长度。" * 2),
+        (QuestionElement('text', '空答案', (0, 0, 1, 1)), ""),
+        (QuestionElement('unknown', '未知类型', (0, 0, 1, 1)), "答案"),
+    ]
+    questions = [q for q, _ in cases]
+    answers = [a for _, a in cases]
+
+    batch = answer_evaluator.evaluate_many(questions, answers)
+    single = [
+        answer_evaluator.evaluate(q.question_type, a, q.text, q.options)
+        for q, a in cases
+    ]
+    assert batch == single
+
+
+def test_tuned_thresholds_apply_to_both_paths():
+    """测试调整文本题评分参数后，批量评估与逐个评估仍然一致"""
+    from auto_questionnaire.parser.element_finder import QuestionElement
+
+    class StrictEvaluator(AnswerEvaluator):
+        TEXT_FULL_LENGTH = 40
+        TEXT_COMPLETE_LENGTH = 100
+        TEXT_MIN_FORMAT_LENGTH = 30
+        TEXT_SHORT_FORMAT_SCORE = 0.5
+
+    evaluator = StrictEvaluator()
+    question = QuestionElement('text', '请描述你的看法', (0, 0, 1, 1))
+    answer = "这是一个比较完整的答案，包含了必要的信息。"
+
+    batch = evaluator.evaluate_many([question], [answer])[0]
+    single = evaluator.evaluate('text', answer, question.text)
+    assert batch == single
+    assert single.details['format'] == 0.5
+    assert single.details['length'] == pytest.approx(len(answer) / 40)
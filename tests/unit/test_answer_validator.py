@@ -52,4 +52,73 @@ def test_answer_storage():
         question_type="text",
         question="测试问题",
         answer="完全不同的答案"
-    ) 
\ No newline at end of file
+    ) 
+
+def test_similarity_matches_reference():
+    """测试位并行序列相似度与逐字符LCS结果一致"""
+    from auto_questionnaire.utils.answer_validator import (
+        bounded_sequence_similarity, extract_features
+    )
+
+    def lcs(a, b):
+        prev = [0] * (len(b) + 1)
+        for x in a:
+            cur = [0]
+            for j, y in enumerate(b):
+                cur.append(prev[j] + 1 if x == y else max(prev[j + 1], cur[j]))
+            prev = cur
+        return prev[-1]
+
+    pairs = [
+        ("这是一个很好的答案", "这是一个不错的答案"),
+        ("第一个答案", "第一个答案的变体"),
+        ("完全不同的答案", "第一个答案的变体"),
+        ("", "任意答案"),
+    ]
+    for a, b in pairs:
+        expected = 2 * lcs(a, b) / (len(a) + len(b))
+        actual = bounded_sequence_similarity(extract_features(a), extract_features(b))
+        assert actual == pytest.approx(expected)
+
+
+def test_similarity_early_exit():
+    """测试无法达到阈值时提前退出"""
+    from auto_questionnaire.utils.answer_validator import (
+        bounded_sequence_similarity, extract_features
+    )
+
+    long_answer = extract_features("甲" * 200)
+    other = extract_features("乙" * 200)
+    assert bounded_sequence_similarity(long_answer, other, threshold=0.6) == 0.0
+    # 长度差距过大时无需计算
+    assert bounded_sequence_similarity(long_answer, extract_features("甲"), threshold=0.6) == 0.0
+
+
+def test_long_history_consistency():
+    """测试长历史记录下的一致性检查复用已存储的特征"""
+    validator = AnswerValidator(similarity_threshold=0.6)
+    for i in range(200):
+        validator.validate_and_store_answer("text", "长历史问题", "我每天都会锻炼身体")
+    assert len(validator._indexes["text:长历史问题"]) == 200
+    assert validator.validate_and_store_answer("text", "长历史问题", "我每天都会锻炼")
+    assert not validator.validate_and_store_answer("text", "长历史问题", "周末喜欢看电影")
+
+
+def test_bounded_history_and_persistence(tmp_path):
+    """测试历史容量上限及索引持久化"""
+    history_file = str(tmp_path / "answer_history.json")
+    validator = AnswerValidator(max_history=50, history_file=history_file)
+    for i in range(80):
+        assert validator.validate_and_store_answer("text", "兴趣爱好", f"我喜欢跑步和游泳{i}")
+    validator.validate_and_store_answer("radio", "性别", "男")
+
+    assert len(validator.previous_answers["text:兴趣爱好"]) == 50
+    validator.save_history()
+
+    restored = AnswerValidator(max_history=50, history_file=history_file)
+    assert list(restored.previous_answers["text:兴趣爱好"]) == \
+        list(validator.previous_answers["text:兴趣爱好"])
+    assert len(restored._indexes["text:兴趣爱好"]) == 50
+    assert restored.validate_and_store_answer("text", "兴趣爱好", "我喜欢跑步和游泳")
+    assert not restored.validate_and_store_answer("text", "兴趣爱好", "周末一般待在家里看书")
+    assert not restored.validate_and_store_answer("radio", "性别", "女")
@@ -0,0 +1,114 @@
+import json
+from unittest.mock import Mock
+
+import pytest
+
+from auto_questionnaire.ai.context_store import ContextStore
+from auto_questionnaire.ai.groq_handler import GroqHandler
+from auto_questionnaire.ai.prompt_builder import PromptBuilder
+from auto_questionnaire.parser.element_finder import QuestionElement
+from auto_questionnaire.utils.auto_fill import AutoFiller
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    path = tmp_path / "context_db.json"
+    path.write_text(json.dumps({
+        'facts': [
+            {'id': 1, 'text': "我是一名软件工程师，工作五年", 'topic': "职业"},
+            {'id': 2, 'text': "我每周跑步三次，喜欢户外运动", 'topic': "运动"},
+            {'id': 3, 'text': "我住在上海，通勤坐地铁", 'topic': "生活"},
+        ]
+    }, ensure_ascii=False), encoding='utf-8')
+    return str(path)
+
+
+def test_top_k_retrieval(db_file):
+    """测试按关键词检索最相关的事实"""
+    store = ContextStore(db_file)
+    assert len(store) == 3
+
+    facts = store.top_k("你平时喜欢什么运动？", k=2)
+    assert facts[0].id == 2
+    assert store.top_k("你的工作是什么？", k=1)[0].topic == "职业"
+    assert store.top_k("完全无关的问题", k=3) == []
+
+
+def test_empty_database(tmp_path):
+    """测试空的上下文数据库"""
+    path = tmp_path / "context_db.json"
+    path.write_text("{}", encoding='utf-8')
+    store = ContextStore(str(path))
+    assert len(store) == 0
+    assert store.top_k("任意问题") == []
+
+
+def test_incremental_persistence(db_file):
+    """测试新事实追加写入日志，重启后可恢复并可合并"""
+    store = ContextStore(db_file)
+    fact = store.learn_from_answer("你喜欢什么宠物？", "我养了一只猫")
+    assert store.learn_from_answer("你喜欢什么宠物？", "我养了一只猫") is fact
+
+    with open(store.journal_file, encoding='utf-8') as f:
+        assert len(f.readlines()) == 1
+
+    restored = ContextStore(db_file)
+    assert len(restored) == 4
+    assert restored.top_k("宠物", k=1)[0].text == fact.text
+
+    restored.compact()
+    compacted = ContextStore(db_file)
+    assert len(compacted) == 4
+    assert compacted.add_fact("新的事实").id == 5
+
+
+def test_prompt_includes_relevant_facts(db_file):
+    """测试提示中只包含相关的少量事实"""
+    builder = PromptBuilder(context_store=ContextStore(db_file), context_top_k=1)
+    prompt = builder.build_prompt("你平时喜欢什么运动？")
+    assert "跑步" in prompt
+    assert "软件工程师" not in prompt
+    assert "已知信息" not in PromptBuilder().build_prompt("你平时喜欢什么运动？")
+
+
+def test_auto_filler_uses_context(db_file):
+    """测试答案生成时传入检索到的上下文，答案通过验证后才记为新事实"""
+    handler = Mock(spec=GroqHandler)
+    handler.generate_response.return_value = "我喜欢跑步"
+    store = ContextStore(db_file)
+    auto_filler = AutoFiller(handler, prompt_builder=PromptBuilder(context_store=store))
+
+    question = QuestionElement(question_type='text', text="你喜欢什么运动？", position=(0, 0, 1, 1))
+    answer, _ = auto_filler.generate_answer(question)
+
+    assert answer == "我喜欢跑步"
+    assert "跑步三次" in handler.generate_response.call_args.kwargs['context']
+    assert len(store) == 3
+
+    auto_filler.learn_answer(question, answer)
+    assert len(store) == 4
+
+
+def test_pipeline_learns_only_accepted_answers(db_file):
+    """测试流水线只把通过一致性检查的答案记入上下文"""
+    from auto_questionnaire.utils.answer_validator import AnswerValidator
+    from auto_questionnaire.utils.pipeline import QuestionnairePipeline
+
+    store = ContextStore(db_file)
+    auto_filler = AutoFiller(Mock(spec=GroqHandler), prompt_builder=PromptBuilder(context_store=store))
+    auto_filler.batch_generate_answers = lambda questions: [("选项B", False) for _ in questions]
+    validator = AnswerValidator()
+    validator.validate_and_store_answer('radio', "你是否吸烟？", "选项A")
+
+    question = QuestionElement('radio', "你是否吸烟？", (0, 0, 1, 1), ["选项A", "选项B"])
+    parser = Mock()
+    parser.parse_page.return_value = {'radio': [question]}
+    pipeline = QuestionnairePipeline(capture=lambda page_index: page_index, parser=parser,
+                                     auto_filler=auto_filler, answer_validator=validator)
+    assert pipeline.run(1)[0].accepted == []
+    assert len(store) == 3
+
+    validator = AnswerValidator()
+    pipeline.answer_validator = validator
+    assert len(pipeline.run(1)[0].accepted) == 1
+    assert store.top_k("吸烟", k=1)[0].text == "你是否吸烟？ 选项B"
@@ -0,0 +1,101 @@
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from auto_questionnaire.parser.element_finder import ElementFinder
+from auto_questionnaire.parser.ui_parser import QuestionnaireParser
+from auto_questionnaire.utils import screenshot
+
+
+def _fake_ocr_data():
+    return {
+        'text': ['您的性别', '[]男', '[]女', '', '请描述您的看法', ''],
+        'left': [10, 10, 60, 0, 10, 0],
+        'top': [10, 40, 40, 0, 100, 0],
+        'width': [80, 40, 40, 0, 120, 0],
+        'height': [20, 20, 20, 0, 20, 0],
+    }
+
+
+def test_find_elements_from_array():
+    """测试直接识别内存中的图像数组"""
+    finder = ElementFinder()
+    image = np.full((200, 300, 3), 255, dtype=np.uint8)
+
+    with patch('pytesseract.image_to_data', return_value=_fake_ocr_data()) as mock_ocr, \
+            patch('cv2.imread') as mock_imread:
+        elements = finder.find_elements(image)
+
+    mock_imread.assert_not_called()
+    ocr_input = mock_ocr.call_args[0][0]
+    assert isinstance(ocr_input, Image.Image)
+    assert ocr_input.format == 'BMP', "OCR输入应避免PNG编码"
+    assert ocr_input.size == (300, 200)
+    assert len(elements) == 2
+    assert elements[0].position == (10, 10, 100, 60)
+
+
+def test_find_elements_from_path(tmp_path):
+    """测试兼容图片路径输入"""
+    image_path = tmp_path / "page.png"
+    Image.new('RGB', (300, 200), 'white').save(image_path)
+
+    with patch('pytesseract.image_to_data', return_value=_fake_ocr_data()):
+        elements = ElementFinder().find_elements(str(image_path))
+
+    assert len(elements) == 2
+
+
+def test_path_and_array_inputs_match(tmp_path):
+    """测试图片文件按RGB读取，与内存中的数组输入得到相同的OCR图像"""
+    image = np.zeros((20, 30, 3), dtype=np.uint8)
+    image[..., 0] = 200  # 红色通道，BGR/RGB颠倒时灰度值不同
+    image_path = tmp_path / "page.png"
+    Image.fromarray(image).save(image_path)
+
+    finder = ElementFinder()
+    from_path = finder._prepare_image(str(image_path))
+    from_array = finder._prepare_image(image)
+
+    assert np.array_equal(np.asarray(from_path), np.asarray(from_array))
+    assert np.array_equal(np.asarray(from_path.convert('L')), np.asarray(from_array.convert('L')))
+
+
+def test_find_elements_invalid_path(tmp_path):
+    """测试无法读取的图片"""
+    assert ElementFinder().find_elements(str(tmp_path / "missing.png")) == []
+
+
+def test_parse_page_from_array():
+    """测试问卷解析器接受图像数组"""
+    parser = QuestionnaireParser()
+    image = np.full((200, 300, 3), 255, dtype=np.uint8)
+
+    with patch('pytesseract.image_to_data', return_value=_fake_ocr_data()):
+        classified = parser.parse_page(image)
+
+    assert len(classified['checkbox']) == 1
+    assert len(classified['text']) == 1
+
+
+def test_capture_screen_async_save(tmp_path):
+    """测试截图直接返回数组，并在后台保存调试图片"""
+    fake_image = Image.new('RGB', (64, 32), 'white')
+
+    with patch.object(screenshot.ImageGrab, 'grab', return_value=fake_image):
+        array = screenshot.capture_screen(debug_save_dir=str(tmp_path))
+
+    assert array.shape == (32, 64, 3)
+    future = screenshot.save_screenshot_async(array, str(tmp_path))
+    saved_path = future.result(timeout=5)
+    assert saved_path and saved_path.endswith('.png')
+    screenshot._get_save_executor().submit(lambda: None).result(timeout=5)
+    assert len(list(tmp_path.glob('*.png'))) == 2
+
+
+def test_capture_screen_failure():
+    """测试截图失败返回None"""
+    with patch.object(screenshot.ImageGrab, 'grab', side_effect=OSError("no display")):
+        assert screenshot.capture_screen() is None
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from auto_questionnaire.utils.latency_histogram import LatencyHistogram
+
+
+@pytest.fixture
+def samples():
+    return np.random.default_rng(0).lognormal(mean=-1.0, sigma=0.8, size=20000)
+
+
+def test_quantiles_within_relative_accuracy(samples):
+    """测试分位数相对误差在精度范围内"""
+    histogram = LatencyHistogram(relative_accuracy=0.01)
+    for value in samples:
+        histogram.record(value)
+
+    for q in (0.5, 0.95, 0.99):
+        expected = np.quantile(samples, q, method='lower')
+        assert abs(histogram.quantile(q) - expected) / expected <= 0.02
+
+
+def test_record_many_matches_record(samples):
+    """测试批量写入与逐条写入结果一致"""
+    single = LatencyHistogram()
+    for value in samples[:1000]:
+        single.record(value)
+    batch = LatencyHistogram()
+    batch.record_many(samples[:1000])
+
+    assert single.summary() == pytest.approx(batch.summary())
+
+
+def test_merge(samples):
+    """测试合并两个直方图等价于合并样本"""
+    left, right, combined = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    left.record_many(samples[:5000])
+    right.record_many(samples[5000:])
+    combined.record_many(samples)
+
+    assert left.merge(right).summary() == pytest.approx(combined.summary())
+    with pytest.raises(ValueError):
+        left.merge(LatencyHistogram(relative_accuracy=0.05))
+
+
+def test_empty_and_out_of_range():
+    """测试空直方图和超出范围的取值"""
+    histogram = LatencyHistogram(max_value=10.0)
+    assert histogram.summary()['p99'] == 0.0
+
+    histogram.record(0.0)
+    histogram.record(100.0)
+    summary = histogram.summary()
+    assert summary['count'] == 2
+    assert summary['max'] == 100.0
+    assert summary['p99'] <= 100.0
@@ -0,0 +1,39 @@
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+from auto_questionnaire.utils.lazy_import import LazyModule, lazy_import
+
+SRC_DIR = str(Path(__file__).resolve().parents[2] / "src")
+
+
+def test_lazy_import_returns_loaded_module():
+    """测试已导入的模块直接返回模块本身"""
+    assert lazy_import("json") is sys.modules["json"]
+
+
+def test_lazy_module_loads_on_first_attribute_access():
+    """测试第一次访问属性时才导入模块"""
+    script = (
+        "import sys\n"
+        "from auto_questionnaire.utils.lazy_import import lazy_import\n"
+        "module = lazy_import('wave')\n"
+        "print('wave' in sys.modules)\n"
+        "module.open\n"
+        "print('wave' in sys.modules)\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script], env={"PYTHONPATH": SRC_DIR},
+        capture_output=True, text=True, check=True
+    ).stdout.split()
+    assert output == ["False", "True"]
+
+
+def test_lazy_module_sees_patched_attributes():
+    """测试代理每次从真实模块读取属性，mock.patch 替换同样生效"""
+    module = LazyModule("textwrap")
+    with patch("textwrap.dedent", return_value="patched"):
+        assert module.dedent("  x") == "patched"
+    assert module.dedent("  x") == "x"
+    assert "(loaded)" in repr(module)
@@ -0,0 +1,70 @@
+import json
+import sys
+
+import pytest
+from loguru import logger
+
+from auto_questionnaire.utils.log_config import LogConfig
+
+
+def _write_config(tmp_path, **overrides) -> str:
+    config = {"log_path": str(tmp_path / "logs"), "console": False, **overrides}
+    config_file = tmp_path / "logging_config.json"
+    config_file.write_text(json.dumps(config), encoding="utf-8")
+    return str(config_file)
+
+
+@pytest.fixture
+def log_config_factory(tmp_path):
+    configs = []
+
+    def create(**overrides) -> LogConfig:
+        config = LogConfig(_write_config(tmp_path, **overrides))
+        configs.append(config)
+        return config
+
+    yield create
+    for config in configs:
+        config.close()
+    logger.add(sys.stderr)
+
+
+def test_json_lines_format(log_config_factory, tmp_path):
+    """测试JSON Lines格式的文件日志"""
+    config = log_config_factory(json=True)
+    logger.bind(api=True, model="test").info("调用完成")
+    logger.error("出错了")
+    config.close()
+
+    app_lines = (tmp_path / "logs" / "app.log").read_text(encoding="utf-8").splitlines()
+    entries = [json.loads(line) for line in app_lines]
+    assert [entry["message"] for entry in entries] == ["调用完成", "出错了"]
+    assert entries[0]["extra"] == {"api": True, "model": "test"}
+    assert entries[1]["level"] == "ERROR"
+
+    api_lines = (tmp_path / "logs" / "api.log").read_text(encoding="utf-8").splitlines()
+    assert len(api_lines) == 1
+
+
+def _warn_rate_limited(wait_time: float) -> None:
+    logger.warning(f"达到速率限制，等待 {wait_time} 秒")
+
+
+def test_repeated_warnings_are_rate_limited(log_config_factory, tmp_path):
+    """测试同一位置的重复警告被限流，窗口结束后附带省略条数"""
+    config = log_config_factory(rate_limit={"enabled": True, "interval": 60, "burst": 2, "levels": ["WARNING"]})
+    for i in range(10):
+        _warn_rate_limited(i)
+    logger.info("其他日志不受影响")
+    logger.bind(log_key="other").warning("不同的键单独计数")
+
+    assert config.rate_limiter.suppressed == 8
+    config.rate_limiter.interval = 0
+    _warn_rate_limited(10)
+    config.close()
+
+    lines = (tmp_path / "logs" / "app.log").read_text(encoding="utf-8").splitlines()
+    assert sum("达到速率限制" in line for line in lines) == 3
+    assert any("期间省略 8 条相同日志" in line for line in lines)
+    assert any("其他日志不受影响" in line for line in lines)
+    assert any("不同的键单独计数" in line for line in lines)
@@ -0,0 +1,84 @@
+import urllib.request
+
+import pytest
+
+from auto_questionnaire.monitoring.metrics_exporter import CONTENT_TYPE, MetricsExporter
+
+
+@pytest.fixture
+def exporter(performance_monitor):
+    for elapsed in (0.02, 0.2, 2.0):
+        performance_monitor.record_api_call(elapsed, True)
+    performance_monitor.record_api_call(0.3, False)
+    performance_monitor.record_cache_access(True)
+    performance_monitor.record_cache_access(False)
+    performance_monitor.record_answer_quality(0.8)
+    exporter = MetricsExporter(performance_monitor, buckets=(0.1, 1.0))
+    yield exporter
+    exporter.stop()
+
+
+def _samples(text):
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            samples[name] = value
+    return samples
+
+
+def test_render_openmetrics(exporter):
+    """测试计数器、仪表盘和直方图的文本格式"""
+    text = exporter.render()
+    samples = _samples(text)
+
+    assert text.endswith("# EOF\n")
+    assert "# TYPE auto_questionnaire_api_calls counter" in text
+    assert samples['auto_questionnaire_api_calls_total'] == '4'
+    assert samples['auto_questionnaire_errors_total'] == '1'
+    assert samples['auto_questionnaire_cache_hits_total'] == '1'
+    assert samples['auto_questionnaire_cache_hit_rate{window="60s"}'] == '0.5'
+    assert samples['auto_questionnaire_error_rate{window="60s"}'] == '0.25'
+    bucket = 'auto_questionnaire_stage_latency_seconds_bucket{stage="api",le="%s"}'
+    assert samples[bucket % '0.1'] == '1'
+    assert samples[bucket % '1'] == '3'
+    assert samples[bucket % '+Inf'] == '4'
+    assert samples['auto_questionnaire_stage_latency_seconds_count{stage="api"}'] == '4'
+
+
+def test_histogram_render_cached(exporter, performance_monitor):
+    """测试样本数未变化时复用已渲染的直方图"""
+    exporter.render()
+    cached = exporter._histogram_cache['api'][1]
+    exporter.render()
+    assert exporter._histogram_cache['api'][1] is cached
+
+    performance_monitor.record_api_call(0.05, True)
+    samples = _samples(exporter.render())
+    assert samples['auto_questionnaire_stage_latency_seconds_count{stage="api"}'] == '5'
+
+
+def test_http_endpoint(exporter):
+    """测试HTTP端点返回OpenMetrics文本"""
+    port = exporter.start_http_server(port=0)
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+        body = response.read().decode('utf-8')
+        assert response.headers['Content-Type'] == CONTENT_TYPE
+    assert 'auto_questionnaire_api_calls_total 4' in body
+
+
+def test_textfile_writer(exporter, tmp_path):
+    """测试定期重写textfile"""
+    path = tmp_path / "metrics" / "auto_questionnaire.prom"
+    exporter.start_textfile_writer(str(path), interval=0.05)
+    exporter.stop()
+
+    content = path.read_text(encoding='utf-8')
+    assert 'auto_questionnaire_api_calls_total 4' in content
+    assert not list(path.parent.glob('*.tmp'))
+
+
+def test_window_must_fit_monitor_buckets(performance_monitor):
+    """测试仪表盘窗口超过监控器分桶覆盖时间时在创建时报错"""
+    with pytest.raises(ValueError):
+        MetricsExporter(performance_monitor, window=performance_monitor.max_window + 1)
@@ -0,0 +1,118 @@
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from auto_questionnaire.utils.metrics_store import MetricsStore
+from auto_questionnaire.utils.performance_monitor import PerformanceMonitor
+
+DAY = 86400
+# 2024-01-01 00:00:00 UTC
+BASE = datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return MetricsStore(str(tmp_path / "metrics"))
+
+
+def test_append_partitions_by_date(store):
+    """测试跨天的记录拆分写入各自的日期分区"""
+    timestamps = np.array([BASE + DAY + 5, BASE + 10, BASE + DAY + 1, BASE + 20])
+    written = store.append('api_calls', {'timestamp': timestamps, 'elapsed': np.array([4.0, 1.0, 3.0, 2.0])})
+
+    assert written == 4
+    assert store.metrics() == ['api_calls']
+    assert sorted(os.listdir(os.path.join(store.root, 'api_calls'))) == ['date=2024-01-01', 'date=2024-01-02']
+
+    result = store.query('api_calls')
+    assert result['elapsed'].tolist() == [1.0, 2.0, 3.0, 4.0]
+    assert np.all(np.diff(result['timestamp']) >= 0)
+
+
+def test_query_time_range_and_columns(store):
+    """测试按时间范围和列读取，范围外的分区和数据块不会被读取"""
+    for day in range(3):
+        timestamps = BASE + day * DAY + np.arange(10, dtype=float)
+        store.append('api_calls', {'timestamp': timestamps, 'elapsed': timestamps - BASE,
+                                   'success': np.ones(10, dtype=bool)})
+
+    result = store.query('api_calls', start=BASE + DAY + 3, end=BASE + DAY + 7, columns=['elapsed'])
+    assert set(result) == {'timestamp', 'elapsed'}
+    assert result['elapsed'].tolist() == [DAY + 3.0, DAY + 4.0, DAY + 5.0, DAY + 6.0]
+    assert store.query('api_calls', start=BASE + 5 * DAY) == {}
+    assert store.query('missing') == {}
+
+    chunks = list(store._chunks('api_calls', BASE + DAY, BASE + DAY + 100))
+    assert len(chunks) == 1
+
+
+def test_monitor_flush_is_incremental(store):
+    """测试监控器只追加上次flush之后的新记录，错误编号保存为错误信息"""
+    monitor = PerformanceMonitor()
+    monitor.record_api_call(0.2, True)
+    monitor.record_error("超时")
+    assert monitor.flush(store) == 2
+
+    monitor.record_api_call(0.4, False)
+    monitor.record_cache_access(True)
+    assert monitor.flush(store) == 2
+    assert monitor.flush(store) == 0
+
+    assert store.query('api_calls')['elapsed'].tolist() == [0.2, 0.4]
+    assert store.query('errors')['message'].tolist() == ["超时"]
+    assert store.query('cache_hits')['hit'].tolist() == [True]
+
+
+def test_flusher_writes_remaining_records_on_stop(store):
+    """测试后台flush线程停止时写入剩余记录"""
+    monitor = PerformanceMonitor()
+    monitor.start_flusher(store, interval=60)
+    monitor.record_answer_quality(0.9)
+    monitor.stop_flusher()
+
+    assert store.query('answer_quality')['score'].tolist() == [0.9]
+
+
+def test_compact_merges_ended_partitions(store):
+    """测试已结束的日期分区合并为一个块，当天的分区和查询结果不变"""
+    for day in range(2):
+        for i in range(5):
+            store.append('api_calls', {'timestamp': np.array([BASE + day * DAY + 10 - i]),
+                                       'elapsed': np.array([float(day * 10 + i)])})
+    before = store.query('api_calls')
+
+    # 第二天刚开始：第一天已结束，第二天仍在写入
+    assert store.compact(grace=60, now=BASE + DAY + 3600) == 5
+    assert len(list(store._chunks('api_calls', BASE, BASE + DAY))) == 1
+    assert len(list(store._chunks('api_calls', BASE + DAY, BASE + 2 * DAY))) == 5
+    assert sorted(os.listdir(os.path.join(store.root, 'api_calls'))) == ['date=2024-01-01', 'date=2024-01-02']
+
+    after = store.query('api_calls')
+    assert after['timestamp'].tolist() == before['timestamp'].tolist()
+    assert sorted(after['elapsed'].tolist()) == sorted(before['elapsed'].tolist())
+    assert store.compact(grace=60, now=BASE + DAY + 3600) == 0
+
+
+def test_main_stops_flusher_on_error(monkeypatch):
+    """测试运行出错时仍会停止后台flush线程（写入剩余记录）、关闭导出器和告警"""
+    from unittest.mock import MagicMock
+
+    from auto_questionnaire import main as main_module
+
+    monitor, exporter, alert_manager = MagicMock(), MagicMock(), MagicMock()
+    for name in ('GroqHandler', 'CacheManager', 'RequestQueue', 'AnswerValidator', 'ContextStore'):
+        monkeypatch.setattr(main_module, name, MagicMock())
+    # main.py 使用了未导入的 ModelConfig，这里补上，使初始化能进行到启动后台线程之后
+    monkeypatch.setattr(main_module, 'ModelConfig', MagicMock(), raising=False)
+    monkeypatch.setattr(main_module, 'PerformanceMonitor', lambda: monitor)
+    monkeypatch.setattr(main_module, 'MetricsExporter', lambda _: exporter)
+    monkeypatch.setattr('auto_questionnaire.monitoring.alert_manager.AlertManager', lambda: alert_manager)
+    monkeypatch.setattr(main_module, 'AutoFiller', MagicMock(side_effect=RuntimeError("初始化失败")))
+
+    main_module.main()
+
+    monitor.stop_flusher.assert_called_once()
+    exporter.stop.assert_called_once()
+    alert_manager.close.assert_called_once()
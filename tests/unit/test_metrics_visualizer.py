@@ -1,7 +1,10 @@
 import os
 import pytest
+import numpy as np
 from datetime import datetime, timedelta
-from auto_questionnaire.monitoring.metrics_visualizer import MetricsVisualizer
+from auto_questionnaire.monitoring.metrics_visualizer import (
+    MetricsVisualizer, _resample_latency, _resample_rate, _to_frame
+)
 
 @pytest.fixture
 def sample_metrics_data():
@@ -65,4 +68,100 @@ def test_empty_metrics(tmp_path):
     # 验证报告内容
     with open(os.path.join(report_path, 'report.html'), 'r') as f:
         content = f.read()
-        assert 'No metrics data available' in content
\ No newline at end of file
+        assert 'No metrics data available' in content
+
+
+def test_downsampling_bounded_by_buckets(tmp_path):
+    """测试大量事件按时间分桶后桶数不超过上限"""
+    base_time = datetime(2024, 1, 1)
+    api_calls = [
+        {'elapsed': 0.1 + (i % 10) / 10, 'success': True,
+         'timestamp': (base_time + timedelta(seconds=i * 2)).isoformat()}
+        for i in range(43200)
+    ]
+    cache_hits = [
+        {'hit': i % 4 != 0, 'timestamp': (base_time + timedelta(seconds=i * 2)).isoformat()}
+        for i in range(43200)
+    ]
+    visualizer = MetricsVisualizer(output_dir=str(tmp_path), max_buckets=100)
+
+    latency = _resample_latency(_to_frame(api_calls, 'elapsed'), visualizer.max_buckets)
+    assert len(latency) <= 100
+    assert latency['count'].sum() == 43200
+    assert (latency['min'] <= latency['mean']).all()
+    assert (latency['p95'] <= latency['max']).all()
+
+    hit_rate = _resample_rate(_to_frame(cache_hits, 'hit'), 'hit', visualizer.max_buckets)
+    assert len(hit_rate) <= 100
+    assert hit_rate['mean'].mean() == pytest.approx(0.75, abs=0.01)
+
+    report_path = visualizer.generate_report({'api_calls': api_calls, 'cache_hits': cache_hits})
+    assert os.path.exists(os.path.join(report_path, 'cache_hits.png'))
+
+
+def test_plotting_libraries_imported_lazily():
+    """测试导入监控模块时不加载绘图库"""
+    import subprocess
+    import sys
+
+    code = (
+        "import sys\n"
+        "import auto_questionnaire.monitoring.metrics_visualizer\n"
+        "heavy = [m for m in ('matplotlib', 'seaborn', 'pandas') if m in sys.modules]\n"
+        "assert not heavy, heavy\n"
+    )
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env)
+    assert result.returncode == 0, result.stderr
+
+
+def test_parallel_rendering(sample_metrics_data, tmp_path):
+    """测试在进程池中并行渲染图表"""
+    visualizer = MetricsVisualizer(output_dir=str(tmp_path), workers=3)
+    report_path = visualizer.generate_report(sample_metrics_data)
+
+    for filename in ('api_latency.png', 'answer_quality.png', 'cache_hits.png'):
+        assert os.path.exists(os.path.join(report_path, filename))
+
+
+def test_report_cli(tmp_path):
+    """测试 --report 根据保存的指标文件生成报告"""
+    from auto_questionnaire.main import cli
+    from auto_questionnaire.utils.performance_monitor import PerformanceMonitor
+
+    monitor = PerformanceMonitor()
+    for i in range(5):
+        monitor.record_api_call(0.1 * (i + 1), True)
+        monitor.record_cache_access(i % 2 == 0)
+        monitor.record_answer_quality(0.8)
+    metrics_file = tmp_path / "metrics.json"
+    monitor.save_statistics(str(metrics_file))
+
+    output_dir = tmp_path / "reports"
+    assert cli(['--report', '--metrics-file', str(metrics_file), '--output-dir', str(output_dir)]) == 0
+    report_dirs = list(output_dir.iterdir())
+    assert len(report_dirs) == 1
+    assert (report_dirs[0] / 'report.html').exists()
+    assert (report_dirs[0] / 'api_latency.png').exists()
+
+
+def test_report_from_metrics_store(tmp_path):
+    """测试 --metrics-dir 按时间范围从列式存储生成报告"""
+    from auto_questionnaire.main import cli
+    from auto_questionnaire.utils.metrics_store import MetricsStore
+
+    store = MetricsStore(str(tmp_path / "metrics"))
+    now = datetime.now().timestamp()
+    timestamps = now - np.arange(100, dtype=float)[::-1]
+    store.append('api_calls', {'timestamp': timestamps, 'elapsed': np.linspace(0.1, 1.0, 100),
+                               'success': np.ones(100, dtype=bool)})
+    store.append('cache_hits', {'timestamp': timestamps, 'hit': np.arange(100) % 2 == 0})
+
+    output_dir = tmp_path / "reports"
+    start = datetime.fromtimestamp(now - 50).isoformat()
+    assert cli(['--report', '--metrics-dir', store.root, '--start', start,
+                '--output-dir', str(output_dir)]) == 0
+    report_dir = next(output_dir.iterdir())
+    assert (report_dir / 'api_latency.png').exists()
+    assert (report_dir / 'cache_hits.png').exists()
+    assert not (report_dir / 'answer_quality.png').exists()
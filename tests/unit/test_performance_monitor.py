@@ -0,0 +1,188 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pytest
+
+from auto_questionnaire.utils.performance_monitor import PerformanceMonitor, RingBuffer, ThreadLocalCounters
+
+
+def test_ring_buffer_overwrites_oldest():
+    """测试环形缓冲区写满后覆盖最旧记录并保持顺序"""
+    buffer = RingBuffer(3, {'value': 'f8'})
+    for i in range(5):
+        buffer.append(float(i))
+
+    assert len(buffer) == 3
+    assert buffer.total == 5
+    assert buffer.snapshot()['value'].tolist() == [2.0, 3.0, 4.0]
+
+
+def test_statistics_format_compatible(performance_monitor):
+    """测试统计结果保持原有的字典列表格式"""
+    performance_monitor.record_api_call(0.5, True)
+    performance_monitor.record_api_call(0.3, False)
+    performance_monitor.record_cache_access(True)
+    performance_monitor.record_answer_quality(0.8)
+    performance_monitor.record_error("连接超时")
+
+    stats = performance_monitor.get_statistics()
+
+    assert stats['total_calls'] == 2
+    assert stats['total_errors'] == 2
+    assert stats['error_rate'] == 1.0
+    assert stats['api_calls'][0]['elapsed'] == 0.5
+    assert stats['api_calls'][1]['success'] is False
+    assert stats['cache_hits'][0]['hit'] is True
+    assert stats['answer_quality'][0]['score'] == 0.8
+    assert stats['errors'][0]['message'] == "连接超时"
+    datetime.fromisoformat(stats['api_calls'][0]['timestamp'])
+
+
+def test_memory_bounded():
+    """测试记录数量不超过容量"""
+    monitor = PerformanceMonitor(capacity=100)
+    for i in range(1000):
+        monitor.record_api_call(0.1, True)
+        monitor.record_error(f"错误{i}")
+
+    stats = monitor.get_statistics()
+    assert len(stats['api_calls']) == 100
+    assert len(stats['errors']) == 100
+    assert stats['total_calls'] == 1000
+    assert stats['total_errors'] == 1000
+    assert len(monitor._error_messages) <= PerformanceMonitor.MAX_ERROR_MESSAGES
+
+
+def test_concurrent_counters():
+    """测试多线程写入时计数准确"""
+    monitor = PerformanceMonitor(capacity=1000)
+
+    def worker():
+        for _ in range(500):
+            monitor.record_api_call(0.01, True)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = monitor.get_statistics()
+    assert stats['total_calls'] == 4000
+    assert len(stats['api_calls']) == 1000
+    arrays = monitor.get_arrays('api_calls')
+    assert (arrays['elapsed'] == 0.01).all()
+
+
+def test_counter_shards_released_with_threads():
+    """测试线程结束后其计数分片合并进基础计数，分片数不随线程池重建而增长"""
+    counters = ThreadLocalCounters()
+    for _ in range(20):
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            list(executor.map(lambda _: counters.add('answers'), range(30)))
+
+    assert counters.get('answers') == 600
+    assert counters.snapshot() == {'answers': 600}
+    assert counters.shard_count() == 0
+
+    counters.add('answers')
+    assert counters.shard_count() == 1
+    assert counters.get('answers') == 601
+
+
+def test_latency_percentiles(performance_monitor):
+    """测试各阶段延迟分位数"""
+    for i in range(1, 101):
+        performance_monitor.record_api_call(i / 100, True)
+        performance_monitor.record_latency('ocr', 0.2)
+
+    latency = performance_monitor.get_statistics()['latency']
+
+    assert latency['api']['count'] == 100
+    assert latency['api']['p50'] == pytest.approx(0.5, rel=0.03)
+    assert latency['api']['p99'] == pytest.approx(0.99, rel=0.03)
+    assert latency['ocr']['p95'] == pytest.approx(0.2, rel=0.02)
+
+
+def test_alert_on_latency_percentile(performance_monitor, tmp_path, monkeypatch):
+    """测试api_latency告警使用延迟分位数"""
+    from auto_questionnaire.monitoring.alert_manager import AlertManager
+
+    manager = AlertManager(config_file=str(tmp_path / "missing.json"))
+    sent = []
+    monkeypatch.setattr(manager, '_send_alert', lambda subject, message: sent.append(subject))
+
+    for _ in range(90):
+        performance_monitor.record_api_call(1.0, True)
+    for _ in range(10):
+        performance_monitor.record_api_call(8.0, True)
+    manager.check_metrics(performance_monitor.get_statistics())
+
+    assert sent == ["指标 api_latency 超出阈值"]
+
+
+def test_ring_buffer_since_cursor():
+    """测试按游标增量读取，包括被覆盖的记录数"""
+    buffer = RingBuffer(4, {'timestamp': 'f8', 'value': 'f8'})
+    for i in range(3):
+        buffer.append(0.0, float(i))
+    data, cursor, dropped = buffer.since(0)
+    assert data['value'].tolist() == [0.0, 1.0, 2.0]
+    assert (cursor, dropped) == (3, 0)
+
+    for i in range(3, 9):
+        buffer.append(0.0, float(i))
+    data, cursor, dropped = buffer.since(cursor)
+    assert data['value'].tolist() == [5.0, 6.0, 7.0, 8.0]
+    assert (cursor, dropped) == (9, 2)
+
+    data, cursor, dropped = buffer.since(cursor)
+    assert len(data['value']) == 0 and cursor == 9
+
+
+def test_get_delta(performance_monitor):
+    """测试只返回上次游标之后的新记录和计数器增量"""
+    performance_monitor.record_api_call(0.2, True)
+    performance_monitor.record_error("超时")
+    first = performance_monitor.get_delta()
+    assert len(first.events['api_calls']['elapsed']) == 1
+    assert first.counters == {'api_calls': 1, 'errors': 1}
+
+    performance_monitor.record_api_call(0.4, False)
+    performance_monitor.record_cache_access(True)
+    second = performance_monitor.get_delta(first.cursor)
+    assert second.events['api_calls']['elapsed'].tolist() == [0.4]
+    assert second.events['cache_hits']['hit'].tolist() == [True]
+    assert len(second.events['errors']['code']) == 0
+    assert second.counters == {'api_calls': 1, 'errors': 1, 'cache_hits': 1}
+    assert not any(second.dropped.values())
+
+
+def test_window_summary():
+    """测试预聚合窗口统计只包含窗口内的分桶"""
+    monitor = PerformanceMonitor(bucket_seconds=10, bucket_count=6)
+    now = time.time()
+    monitor._buffers['api_calls'].append(now - 300, 9.0, False)
+    for elapsed, success in [(0.2, True), (0.4, True), (0.6, False)]:
+        monitor._buffers['api_calls'].append(now, elapsed, success)
+    monitor._buffers['cache_hits'].append(now, True)
+    monitor._buffers['cache_hits'].append(now, False)
+
+    summary = monitor.get_window_summary(60, now=now)
+
+    assert summary['api_calls'] == 3
+    assert summary['api_latency'] == pytest.approx(0.4)
+    assert summary['error_rate'] == pytest.approx(1 / 3)
+    assert summary['cache_hit_rate'] == 0.5
+    assert summary['answer_quality'] is None
+
+
+def test_window_longer_than_buckets_rejected():
+    """测试超过分桶覆盖时间的窗口直接报错，而不是静默截断"""
+    monitor = PerformanceMonitor(bucket_seconds=10, bucket_count=6)
+    assert monitor.max_window == 60
+    assert monitor.get_window_summary(60)['window'] == 60
+    with pytest.raises(ValueError):
+        monitor.get_window_summary(61)
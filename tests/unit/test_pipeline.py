@@ -0,0 +1,76 @@
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from auto_questionnaire.parser.element_finder import QuestionElement
+from auto_questionnaire.utils.answer_validator import AnswerValidator
+from auto_questionnaire.utils.pipeline import QuestionnairePipeline, StagedPipeline
+
+
+def test_stages_overlap():
+    """测试各阶段并行处理不同的页面"""
+    def slow(item):
+        time.sleep(0.1)
+        return item
+
+    pipeline = StagedPipeline(queue_size=1).add_stage('parse', slow).add_stage('answer', slow)
+
+    start = time.time()
+    results = pipeline.run(range(6))
+    elapsed = time.time() - start
+
+    assert sorted(results) == list(range(6))
+    assert elapsed < 1.0, f"流水线应重叠执行，实际耗时 {elapsed:.2f} 秒"
+
+
+def test_stage_metrics_and_errors():
+    """测试阶段统计、丢弃和错误处理"""
+    def parse(item):
+        if item == 2:
+            raise ValueError("解析错误")
+        return None if item == 3 else item * 10
+
+    pipeline = (
+        StagedPipeline(queue_size=2)
+        .add_stage('parse', parse)
+        .add_stage('answer', lambda item: item + 1, workers=2)
+    )
+    results = pipeline.run(range(5))
+    metrics = pipeline.get_metrics()
+
+    assert sorted(results) == [1, 11, 41]
+    parse_stats = metrics['stages']['parse']
+    assert parse_stats['processed'] == 5
+    assert parse_stats['errors'] == 1
+    assert parse_stats['dropped'] == 1
+    assert parse_stats['max_queue_depth'] <= 2
+    assert metrics['stages']['answer']['processed'] == 3
+    assert metrics['stages']['answer']['throughput'] > 0
+
+
+def test_questionnaire_pipeline():
+    """测试多页问卷流水线"""
+    pages = {
+        0: [QuestionElement(question_type='text', text='第一页问题', position=(0, 0, 10, 10))],
+        1: [QuestionElement(question_type='text', text='第二页问题', position=(0, 0, 10, 10))],
+    }
+    parser = Mock()
+    parser.parse_page.side_effect = lambda image: {'text': pages[image]}
+    auto_filler = Mock()
+    auto_filler.batch_generate_answers.side_effect = (
+        lambda questions: [(f"{q.text}的答案", False) for q in questions]
+    )
+
+    pipeline = QuestionnairePipeline(
+        capture=lambda page_index: page_index if page_index in pages else None,
+        parser=parser,
+        auto_filler=auto_filler,
+        answer_validator=AnswerValidator()
+    )
+    results = pipeline.run(3)
+
+    assert [task.page_index for task in results] == [0, 1]
+    assert results[1].accepted[0][1] == "第二页问题的答案"
+    assert results[0].image is None
+    assert pipeline.get_metrics()['stages']['capture']['dropped'] == 1
@@ -0,0 +1,66 @@
+import pstats
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from auto_questionnaire.utils.profiler import RunProfiler
+
+
+def _allocate_in_worker(n: int) -> int:
+    data = [bytearray(1024) for _ in range(n)]
+    deadline = time.perf_counter() + 0.1
+    while time.perf_counter() < deadline:
+        pass
+    return len(data)
+
+
+def _workload() -> None:
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="profile-worker") as executor:
+        assert sum(executor.map(_allocate_in_worker, [200, 200])) == 400
+
+
+def test_run_profiler_collects_worker_threads(tmp_path):
+    """测试合并各线程的cProfile、按阶段统计内存最高时的分配并采样调用栈"""
+    profiler = RunProfiler(str(tmp_path), top_n=5, sample_interval=0.005, snapshot_interval=0.02,
+                           stages={'worker': (__file__,)})
+    with profiler:
+        _workload()
+
+    profile_dir = tmp_path / next(p.name for p in tmp_path.iterdir())
+    assert profiler.profile_dir == str(profile_dir)
+    assert {p.name for p in profile_dir.iterdir()} == {
+        'profile.pstats', 'profile.txt', 'memory.txt', 'stacks.folded'
+    }
+
+    functions = {name for _, _, name in pstats.Stats(str(profile_dir / 'profile.pstats')).stats}
+    assert '_allocate_in_worker' in functions
+
+    worker_stats = profiler.memory_by_stage()['worker']
+    assert worker_stats and worker_stats[0].size >= 200 * 1024
+    assert '== worker' in (profile_dir / 'memory.txt').read_text(encoding='utf-8')
+    assert 'profile-worker' in (profile_dir / 'stacks.folded').read_text(encoding='utf-8')
+
+
+def test_run_profiler_does_not_break_thread_pool(tmp_path):
+    """测试剖析期间新建的工作线程能正常运行（Python 3.12起同一时间只能启用一个cProfile）"""
+    executor = ThreadPoolExecutor(max_workers=3)
+    try:
+        with RunProfiler(str(tmp_path), snapshot_interval=0.05):
+            futures = [executor.submit(_allocate_in_worker, 10) for _ in range(3)]
+            assert [future.result(timeout=10) for future in futures] == [10, 10, 10]
+    finally:
+        executor.shutdown(wait=False)
+
+
+def test_profile_cli(tmp_path):
+    """测试 --profile 把剖析结果写入报告输出目录"""
+    from auto_questionnaire import main as main_module
+
+    with patch.object(main_module, 'main', side_effect=lambda pages: _workload()) as mock_main:
+        assert main_module.cli(['--profile', '--pages', '2', '--output-dir', str(tmp_path)]) == 0
+
+    mock_main.assert_called_once_with(2)
+    profile_dir = next(tmp_path.iterdir())
+    assert profile_dir.name.startswith('profile_')
+    assert (profile_dir / 'profile.pstats').exists()
+    assert not (profile_dir / 'stacks.folded').exists()
@@ -0,0 +1,173 @@
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from auto_questionnaire.parser.element_finder import QuestionElement
+from auto_questionnaire.utils.answer_validator import AnswerValidator
+from auto_questionnaire.utils.performance_monitor import PerformanceMonitor
+from auto_questionnaire.ai.groq_handler import GroqHandler
+from auto_questionnaire.utils.auto_fill import AutoFiller
+from auto_questionnaire.utils.quality_gate import QualityGate
+
+GOOD_ANSWER = "我平时每天都会阅读技术书籍，并且会把学到的内容整理成笔记。"
+
+
+def _radio(text):
+    return QuestionElement('radio', text, (0, 0, 100, 20), ["选项A", "选项B"])
+
+
+def _text(text):
+    return QuestionElement('text', text, (0, 0, 100, 20))
+
+
+def test_low_quality_answers_regenerated_concurrently():
+    """测试不合格答案并发重新生成，并附带评估反馈"""
+    def generate(question, feedback=None):
+        time.sleep(0.2)
+        return "选项A", False
+
+    auto_filler = Mock()
+    auto_filler.generate_answer.side_effect = generate
+    gate = QualityGate(auto_filler, threshold=0.6, max_workers=3)
+
+    questions = [_radio(f"问题{i}") for i in range(3)]
+    start = time.time()
+    results = gate.process(questions, [("无效选项", True)] * 3)
+    elapsed = time.time() - start
+
+    assert all(result.accepted for result in results)
+    assert all(result.answer == "选项A" and not result.is_cached for result in results)
+    assert elapsed < 0.5, f"重新生成应并发执行，实际耗时 {elapsed:.2f} 秒"
+    for call in auto_filler.generate_answer.call_args_list:
+        assert call.kwargs['feedback']
+
+
+def test_regeneration_budget_respected():
+    """测试重新生成次数不超过预算，并保留原答案"""
+    auto_filler = Mock()
+    auto_filler.generate_answer.return_value = ("还是无效", False)
+    gate = QualityGate(auto_filler, regeneration_budget=2)
+
+    results = gate.process([_radio(f"问题{i}") for i in range(4)], [("无效选项", False)] * 4)
+
+    assert auto_filler.generate_answer.call_count == 2
+    assert not any(result.accepted for result in results)
+    metrics = gate.get_metrics()
+    assert metrics['regenerations'] == 2
+    assert metrics['rejected'] == 4
+    assert metrics['budget_exhausted'] == 1
+
+
+def test_budget_shared_across_pages():
+    """测试同一份问卷的各页共享重新生成预算，新问卷重置预算"""
+    auto_filler = Mock()
+    auto_filler.generate_answer.return_value = ("还是无效", False)
+    gate = QualityGate(auto_filler, regeneration_budget=3)
+
+    gate.start_questionnaire()
+    gate.process([_radio("问题1"), _radio("问题2")], [("无效选项", False)] * 2)
+    gate.process([_radio("问题3"), _radio("问题4")], [("无效选项", False)] * 2)
+    assert auto_filler.generate_answer.call_count == 3
+    assert gate.get_metrics()['budget_exhausted'] == 1
+
+    budget = gate.start_questionnaire()
+    gate.process([_radio("问题5")], [("无效选项", False)])
+    assert auto_filler.generate_answer.call_count == 5
+    assert budget.regenerations == 1
+
+
+def test_partial_checkbox_selection_accepted():
+    """测试只选部分选项的有效多选答案直接通过，不触发重新生成"""
+    auto_filler = Mock()
+    gate = QualityGate(auto_filler, threshold=0.6)
+    question = QuestionElement('checkbox', "您喜欢哪些运动", (0, 0, 100, 20), ["跑步", "游泳", "篮球", "足球"])
+
+    results = gate.process([question, question], [("跑步,游泳", False), ("跑步,滑雪", False)])
+
+    assert results[0].accepted
+    assert results[0].regenerations == 0
+    assert results[0].evaluation.score == 0.5
+    assert not results[1].accepted
+    auto_filler.generate_answer.assert_called_once()
+    assert gate.get_metrics()['rejected'] == 1
+
+
+def test_deadline_respected():
+    """测试超过截止时间后不再等待慢速的重新生成"""
+    def generate(question, feedback=None):
+        time.sleep(1.0)
+        return "选项A", False
+
+    auto_filler = Mock()
+    auto_filler.generate_answer.side_effect = generate
+    gate = QualityGate(auto_filler, deadline=0.2)
+
+    start = time.time()
+    results = gate.process([_radio("问题")], [("无效选项", False)])
+    elapsed = time.time() - start
+
+    assert elapsed < 0.6
+    assert results[0].answer == "无效选项"
+    assert not results[0].accepted
+    assert gate.get_metrics()['deadline_exceeded'] >= 1
+
+
+def test_best_answer_kept():
+    """测试新答案更差时保留得分最高的答案"""
+    auto_filler = Mock()
+    auto_filler.generate_answer.return_value = ("", False)
+    gate = QualityGate(auto_filler, threshold=0.99, regeneration_budget=3)
+
+    results = gate.process([_text("请描述你的学习习惯")], [("每天阅读", True)])
+
+    assert results[0].answer == "每天阅读"
+    assert results[0].is_cached
+    assert not results[0].accepted
+
+
+def test_rejected_regeneration_not_cached():
+    """测试未被采用的重新生成答案不会写入缓存，缓存中保留闸门最终保留的答案"""
+    handler = Mock(spec=GroqHandler)
+    handler.generate_response.return_value = "x"
+    auto_filler = AutoFiller(handler)
+    gate = QualityGate(auto_filler, threshold=0.99, regeneration_budget=1)
+    question = _text("请描述你的学习习惯")
+
+    results = gate.process([question], [("我每天阅读技术书籍", False)])
+
+    assert handler.generate_response.call_count == 1
+    assert not results[0].accepted
+    assert results[0].answer == "我每天阅读技术书籍"
+    assert auto_filler.cache[auto_filler._generate_cache_key(question)]['answer'] == "我每天阅读技术书籍"
+
+
+def test_consistency_failure_triggers_regeneration():
+    """测试与历史答案不一致时也会重新生成"""
+    validator = AnswerValidator()
+    validator.validate_and_store_answer('radio', "问题", "选项A")
+    auto_filler = Mock()
+    auto_filler.generate_answer.return_value = ("选项A", False)
+    gate = QualityGate(auto_filler, answer_validator=validator)
+
+    results = gate.process([_radio("问题")], [("选项B", False)])
+
+    assert results[0].accepted
+    assert results[0].answer == "选项A"
+    assert results[0].regenerations == 1
+
+
+def test_regeneration_metrics_recorded():
+    """测试重新生成的次数与耗时记录到性能监控"""
+    monitor = PerformanceMonitor()
+    auto_filler = Mock()
+    auto_filler.generate_answer.return_value = (GOOD_ANSWER, False)
+    gate = QualityGate(auto_filler, monitor=monitor)
+
+    gate.process([_text("请描述你的阅读习惯"), _text("你喜欢阅读吗")], [("", False), (GOOD_ANSWER, True)])
+
+    stats = monitor.get_statistics()
+    assert len(stats['regenerations']) == 1
+    assert stats['regenerations'][0]['success']
+    assert len(stats['answer_quality']) == 2
+    assert gate.get_metrics()['avg_regeneration_latency'] >= 0
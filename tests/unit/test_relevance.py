@@ -0,0 +1,79 @@
+import json
+
+import numpy as np
+import pytest
+
+from auto_questionnaire.utils.answer_evaluator import AnswerEvaluator
+from auto_questionnaire.utils.relevance import TfidfRelevanceScorer
+
+CORPUS = [
+    "你平时如何锻炼身体？",
+    "我每周跑步三次",
+    "你对人工智能的未来发展有什么看法？",
+    "人工智能会改变很多行业",
+    "请描述你的工作经历",
+    "我做过三年软件开发工作",
+]
+
+
+def test_relevance_separates_off_topic():
+    """测试相关答案得分高于无关答案"""
+    scorer = TfidfRelevanceScorer().fit(CORPUS)
+    question = "你平时如何锻炼身体？"
+    on_topic, off_topic = scorer.score_batch(
+        [question, question],
+        ["我每天早上跑步锻炼身体", "今天的晚饭很好吃"]
+    )
+    assert on_topic > off_topic
+    assert off_topic == pytest.approx(scorer.base_score)
+
+
+def test_batch_matches_single():
+    """测试批量计算与逐个计算一致"""
+    scorer = TfidfRelevanceScorer().fit(CORPUS)
+    questions = CORPUS[0::2]
+    answers = CORPUS[1::2]
+    batch = scorer.similarity_batch(questions, answers)
+    single = [scorer.similarity_batch([q], [a])[0] for q, a in zip(questions, answers)]
+    np.testing.assert_allclose(batch, single)
+    assert scorer.similarity_batch([], []).size == 0
+
+
+def test_vocabulary_cached_on_disk(tmp_path):
+    """测试IDF词表只拟合一次并从磁盘加载"""
+    cache_file = str(tmp_path / "tfidf.json")
+    fitted = TfidfRelevanceScorer(cache_file=cache_file).load_or_fit(CORPUS)
+
+    loaded = TfidfRelevanceScorer(cache_file=cache_file)
+    assert loaded.is_fitted
+    assert loaded.load_or_fit([]) is loaded
+    assert loaded.vocabulary == fitted.vocabulary
+    np.testing.assert_allclose(loaded.idf, fitted.idf)
+
+
+def test_empty_fit_not_cached(tmp_path):
+    """测试空语料不写缓存，之后有语料时会重新拟合"""
+    cache_file = tmp_path / "tfidf.json"
+    empty = TfidfRelevanceScorer(cache_file=str(cache_file)).load_or_fit([])
+    assert not empty.is_fitted
+    assert not cache_file.exists()
+
+    # 旧版本可能已写入空词表，加载时视为没有缓存
+    cache_file.write_text(
+        json.dumps({'version': TfidfRelevanceScorer.CACHE_VERSION, 'n_documents': 0, 'tokens': [], 'idf': []}),
+        encoding='utf-8'
+    )
+    scorer = TfidfRelevanceScorer(cache_file=str(cache_file))
+    assert not scorer.is_fitted
+    scorer.load_or_fit(CORPUS)
+    assert scorer.n_documents == len(CORPUS)
+    assert TfidfRelevanceScorer(cache_file=str(cache_file)).n_documents == len(CORPUS)
+
+
+def test_evaluator_uses_relevance():
+    """测试答案评估使用相关性评分"""
+    evaluator = AnswerEvaluator(TfidfRelevanceScorer().fit(CORPUS))
+    relevant = evaluator.evaluate('text', "我平时通过跑步和游泳锻炼身体", "你平时如何锻炼身体？")
+    irrelevant = evaluator.evaluate('text', "我觉得今天的晚饭非常好吃", "你平时如何锻炼身体？")
+    assert relevant.details['relevance'] > irrelevant.details['relevance']
+    assert relevant.score > irrelevant.score
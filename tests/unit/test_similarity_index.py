@@ -0,0 +1,53 @@
+import zlib
+
+import pytest
+
+from auto_questionnaire.utils.similarity_index import MinHasher, MinHashLSHIndex
+
+
+def _shingles(text):
+    return {zlib.crc32(text[i:i + 2].encode('utf-8')) for i in range(len(text) - 1)}
+
+
+def test_minhash_estimates_jaccard():
+    """测试MinHash签名的相同比例近似Jaccard相似度"""
+    hasher = MinHasher(num_perm=256)
+    a = set(range(0, 100))
+    b = set(range(50, 150))
+    sig_a, sig_b = hasher.signature(a), hasher.signature(b)
+    estimate = (sig_a == sig_b).mean()
+    assert estimate == pytest.approx(1 / 3, abs=0.1)
+    assert (hasher.signature(a) == sig_a).all()
+
+
+def test_query_returns_few_candidates():
+    """测试大规模历史下只返回少量候选"""
+    index = MinHashLSHIndex(max_size=2000, max_candidates=8, linear_scan_limit=16)
+    for i in range(1000):
+        text = f"第{i}号用户偏好第{i * 7}类商品"
+        index.add(text, _shingles(text))
+    target = "我平时喜欢在周末骑自行车锻炼身体"
+    index.add(target, _shingles(target))
+
+    candidates = index.query(_shingles("我平时喜欢在周末骑自行车"))
+    assert len(candidates) <= 8
+    assert candidates[0] == target
+
+
+def test_eviction_and_round_trip():
+    """测试淘汰最旧条目及序列化恢复"""
+    index = MinHashLSHIndex(max_size=3, linear_scan_limit=0)
+    texts = ["答案甲一号", "答案乙二号", "答案丙三号", "答案丁四号"]
+    for text in texts:
+        index.add(text, _shingles(text))
+
+    assert index.items() == texts[1:]
+    assert texts[0] not in index.query(_shingles(texts[0]))
+
+    restored = MinHashLSHIndex.from_dict(
+        index.to_dict(lambda text: {'text': text}),
+        lambda entry: (entry['text'], _shingles(entry['text'])),
+        linear_scan_limit=0
+    )
+    assert restored.items() == texts[1:]
+    assert restored.query(_shingles(texts[3]))[0] == texts[3]
@@ -0,0 +1,115 @@
+from unittest.mock import patch
+
+import cv2
+import numpy as np
+import pytest
+
+from auto_questionnaire.parser.element_finder import QuestionElement
+from auto_questionnaire.parser.template_registry import TemplateRegistry
+from auto_questionnaire.parser.ui_parser import QuestionnaireParser
+
+
+def _make_page(offsets):
+    """生成带有若干黑色文本块的页面"""
+    image = np.full((400, 600, 3), 255, dtype=np.uint8)
+    for y in offsets:
+        cv2.rectangle(image, (40, y), (400, y + 20), (0, 0, 0), -1)
+    return image
+
+
+@pytest.fixture
+def sample_elements():
+    return [
+        QuestionElement(
+            question_type='radio',
+            text='您的性别 []男 []女',
+            position=(40, 40, 400, 60),
+            options=['您的性别', '男', '女']
+        ),
+        QuestionElement(
+            question_type='text',
+            text='请描述您的看法',
+            position=(40, 120, 400, 140)
+        )
+    ]
+
+
+def test_fingerprint_stable():
+    """测试相同布局的指纹一致，不同布局的指纹不同"""
+    registry = TemplateRegistry(template_dir="unused_templates_dir")
+    with patch('pytesseract.image_to_string', return_value="问卷 标题\n"):
+        fp1 = registry.fingerprint(_make_page([40, 120, 200]))
+        fp2 = registry.fingerprint(_make_page([40, 120, 200]))
+        fp3 = registry.fingerprint(_make_page([40, 200]))
+
+    assert fp1.layout_hash == fp2.layout_hash
+    assert fp1.layout_hash != fp3.layout_hash
+    assert len(fp1.blocks) == 3
+    assert fp1.anchors == ["问卷标题"] * 3
+
+
+def test_save_and_match_template(tmp_path, sample_elements):
+    """测试模板保存后可在新实例中命中"""
+    template_dir = str(tmp_path / "templates")
+    registry = TemplateRegistry(template_dir=template_dir)
+    page = _make_page([40, 120])
+
+    with patch('pytesseract.image_to_string', return_value="问卷标题"):
+        fingerprint = registry.fingerprint(page)
+        assert registry.match(fingerprint) is None
+        assert registry.save_template(fingerprint, sample_elements)
+
+        reloaded = TemplateRegistry(template_dir=template_dir)
+        matched = reloaded.match(reloaded.fingerprint(page))
+
+    assert len(reloaded) == 1
+    assert matched == sample_elements
+
+
+def test_anchor_mismatch(tmp_path, sample_elements):
+    """测试布局相同但锚点文字不同时不命中"""
+    registry = TemplateRegistry(template_dir=str(tmp_path))
+    page = _make_page([40, 120])
+
+    with patch('pytesseract.image_to_string', return_value="问卷标题"):
+        registry.save_template(registry.fingerprint(page), sample_elements)
+    with patch('pytesseract.image_to_string', return_value="完全不同的另一份调查"):
+        assert registry.match(registry.fingerprint(page)) is None
+
+
+def test_parser_skips_ocr_on_template_hit(tmp_path, sample_elements):
+    """测试命中模板时跳过整页OCR，未命中时保存新模板"""
+    registry = TemplateRegistry(template_dir=str(tmp_path))
+    parser = QuestionnaireParser(template_registry=registry, save_new_templates=True)
+    page = _make_page([40, 120])
+
+    with patch('pytesseract.image_to_string', return_value="问卷标题"), \
+            patch.object(parser.element_finder, 'find_elements',
+                         return_value=sample_elements) as mock_find:
+        first = parser.parse_page(page)
+        second = parser.parse_page(page)
+
+    assert mock_find.call_count == 1
+    assert first == second
+    assert len(second['radio']) == 1
+    assert len(second['text']) == 1
+
+
+def test_parser_path_input_fingerprint_matches_array(tmp_path):
+    """测试图片路径输入与数组输入得到相同的页面指纹"""
+    page = _make_page([40, 120])
+    page[:, :300] = (255, 255, 0)  # 彩色背景：按BGR当作RGB转灰度时会改变二值化结果
+    cv2.rectangle(page, (40, 200), (400, 220), (0, 0, 255), -1)
+    image_path = tmp_path / "page.png"
+    cv2.imwrite(str(image_path), cv2.cvtColor(page, cv2.COLOR_RGB2BGR))
+
+    registry = TemplateRegistry(template_dir=str(tmp_path / "templates"))
+    parser = QuestionnaireParser(template_registry=registry)
+    with patch('pytesseract.image_to_string', return_value="问卷标题"), \
+            patch.object(registry, 'fingerprint', wraps=registry.fingerprint) as mock_fingerprint, \
+            patch.object(parser.element_finder, 'find_elements', return_value=[]):
+        parser.parse_page(str(image_path))
+        parser.parse_page(page)
+
+    from_path, from_array = (call.args[0] for call in mock_fingerprint.call_args_list)
+    assert np.array_equal(from_path, from_array)
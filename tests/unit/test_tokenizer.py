@@ -0,0 +1,47 @@
+import jieba
+import pytest
+
+from auto_questionnaire.utils.tokenizer import (
+    MmapFrequencyDict, cache_file_path, load_tokenizer, write_frequency_cache
+)
+
+
+def test_frequency_dict_round_trip(tmp_path):
+    """测试内存映射词频表的读写"""
+    path = str(tmp_path / "freq.dict")
+    freq = {"问卷": 10, "问": 0, "调查": 5, "答案": 3}
+    write_frequency_cache(freq, 18, path)
+
+    mapped = MmapFrequencyDict(path)
+    assert mapped.total == 18
+    assert len(mapped) == 4
+    assert mapped["问卷"] == 10
+    assert "问" in mapped and mapped["问"] == 0
+    assert "不存在" not in mapped
+    assert mapped.get("不存在") is None
+    assert sorted(mapped) == sorted(freq)
+
+    # 写入进入覆盖层，不修改缓存文件
+    mapped["新词"] = 7
+    assert mapped["新词"] == 7
+    assert "新词" not in MmapFrequencyDict(path)
+    assert mapped.to_dict() == {**freq, "新词": 7}
+
+
+def test_cached_tokenizer_matches_jieba(tmp_path):
+    """测试使用缓存词典的分词结果与jieba一致"""
+    cache_dir = str(tmp_path / "cache")
+    tokenizer = load_tokenizer(cache_dir)
+    assert type(tokenizer.FREQ) is dict
+    assert (tmp_path / "cache").exists()
+
+    # 第二次加载直接复用缓存文件
+    mapped = load_tokenizer(cache_dir, in_memory=False)
+    assert isinstance(mapped.FREQ, MmapFrequencyDict)
+    assert mapped.FREQ.path == cache_file_path(cache_dir)
+    assert mapped.total == tokenizer.total
+
+    for text in ["我平时喜欢在周末骑自行车锻炼身体", "南京市长江大桥欢迎您"]:
+        expected = list(jieba.cut(text))
+        assert list(tokenizer.cut(text)) == expected
+        assert list(mapped.cut(text)) == expected
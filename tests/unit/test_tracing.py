@@ -0,0 +1,122 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock
+
+import pytest
+
+from auto_questionnaire.parser.element_finder import QuestionElement
+from auto_questionnaire.utils import tracing
+from auto_questionnaire.utils.auto_fill import AutoFiller
+from auto_questionnaire.utils.performance_monitor import PerformanceMonitor
+from auto_questionnaire.utils.pipeline import QuestionnairePipeline
+
+
+@pytest.fixture
+def tracing_enabled():
+    tracing.enable()
+    yield
+    tracing.disable()
+
+
+@tracing.traced('test.work')
+def work(value):
+    with tracing.span('test.inner', value=value):
+        return value * 2
+
+
+def test_disabled_is_noop():
+    """测试关闭追踪时不创建span"""
+    tracing.disable()
+    assert tracing.start_trace('page') is None
+    assert tracing.span('test') is tracing.span('other')
+    assert work(2) == 4
+
+
+def test_span_tree(tracing_enabled):
+    """测试span按调用关系组成树"""
+    trace = tracing.start_trace('page', page_index=0)
+    with tracing.activate(trace):
+        with tracing.span('pipeline.parse'):
+            work(1)
+        work(2)
+    trace.finish()
+
+    tree = trace.tree()
+    assert tree['name'] == 'page'
+    assert [child['name'] for child in tree['children']] == ['pipeline.parse', 'test.work']
+    assert tree['children'][0]['children'][0]['name'] == 'test.work'
+    assert tree['children'][1]['children'][0]['attributes'] == {'value': 2}
+
+
+def test_bind_context_across_threads(tracing_enabled):
+    """测试线程池中的span挂在提交任务的span下"""
+    trace = tracing.start_trace('page')
+    with tracing.activate(trace), tracing.span('pipeline.answer'):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [executor.submit(tracing.bind_context(work), v) for v in range(3)]
+            results = [future.result() for future in futures]
+    trace.finish()
+
+    answer = trace.tree()['children'][0]
+    assert results == [0, 2, 4]
+    assert len(answer['children']) == 3
+    assert all(child['name'] == 'test.work' for child in answer['children'])
+
+
+def test_chrome_trace_export(tracing_enabled, tmp_path):
+    """测试导出Chrome trace JSON"""
+    trace = tracing.start_trace('page', page_index=3)
+    with tracing.activate(trace):
+        work(1)
+    trace.finish()
+    path = tmp_path / "trace.json"
+    trace.save_chrome_trace(str(path))
+
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    events = {event['name']: event for event in data['traceEvents']}
+    assert set(events) == {'page', 'test.work', 'test.inner'}
+    assert all(event['ph'] == 'X' and event['dur'] >= 0 for event in events.values())
+    assert events['test.inner']['args']['parent_id'] == events['test.work']['args']['span_id']
+    assert data['otherData']['page_index'] == 3
+
+
+def test_api_call_latency_measured():
+    """测试记录实际的API调用耗时"""
+    def slow_response(question, context=None):
+        time.sleep(0.05)
+        return "回答"
+
+    groq_handler = Mock()
+    groq_handler.generate_response.side_effect = slow_response
+    monitor = PerformanceMonitor()
+    auto_filler = AutoFiller(groq_handler, monitor=monitor)
+
+    auto_filler.generate_answer(QuestionElement('text', "问题", (0, 0, 10, 10)))
+
+    assert monitor.get_statistics()['api_calls'][0]['elapsed'] >= 0.05
+
+
+def test_pipeline_page_traces(tracing_enabled, tmp_path):
+    """测试流水线为每页生成追踪记录"""
+    parser = Mock()
+    parser.parse_page.return_value = {'text': [QuestionElement('text', "问题", (0, 0, 10, 10))]}
+    groq_handler = Mock()
+    groq_handler.generate_response.return_value = "回答"
+
+    pipeline = QuestionnairePipeline(
+        capture=lambda page_index: page_index,
+        parser=parser,
+        auto_filler=AutoFiller(groq_handler),
+        trace_dir=str(tmp_path)
+    )
+    pages = pipeline.run(2)
+
+    tree = pages[0].trace.tree()
+    stages = [child['name'] for child in tree['children']]
+    assert stages == ['pipeline.capture', 'pipeline.parse', 'pipeline.answer', 'pipeline.validate']
+    generate = tree['children'][2]['children'][0]
+    assert generate['name'] == 'answer.generate'
+    assert [child['name'] for child in generate['children']] == ['cache.lookup', 'answer.build_context', 'cache.save']
+    assert (tmp_path / "page_2.json").exists()